@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+"""
+Benchmark: custo por mensagem de construir os providers a cada chamada
+(comportamento antigo, ``ZAIProvider()`` / ``GroqProvider()`` por mensagem)
+vs. usar os clientes do ``ProviderRegistry``.
+
+Sobe um servidor local que imita os endpoints de chat da ZAI e do Groq
+(ZAI_BASE_URL / GROQ_BASE_URL) e conta as conexões TCP abertas, então não
+depende de rede externa. Sem TLS o custo de conexão medido aqui é um piso:
+contra as APIs reais cada conexão nova ainda paga o handshake TLS.
+
+    python benchmarks/bench_providers.py [iterações]
+"""
+
+import asyncio
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+class StubChatHandler(BaseHTTPRequestHandler):
+    """Responde qualquer POST .../chat/completions no formato da OpenAI."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, como as APIs reais
+    # sem isso o Nagle + delayed ACK somam ~40ms a cada resposta em keep-alive
+    disable_nagle_algorithm = True
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with self.lock:
+            StubChatHandler.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("content-length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("content-length", 0)))
+        body = json.dumps(
+            {
+                "id": "bench",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": "stub",
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": "ok"},
+                    }
+                ],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+            }
+        ).encode()
+        self.send_response(200)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+def start_stub() -> ThreadingHTTPServer:
+    server = QuietServer(("127.0.0.1", 0), StubChatHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    # Lidos na importação de providers.config e pelo SDK do Groq
+    os.environ["ZAI_BASE_URL"] = f"{base}/zai/"
+    os.environ["GROQ_BASE_URL"] = base
+    os.environ.setdefault("ZAI_API_KEY", "bench")
+    os.environ.setdefault("GROQ_API_KEY", "bench")
+    # as cotas compartilhadas (providers/quota.py) não devem frear o stub
+    os.environ.setdefault("ZAI_RPM", "1000000")
+    os.environ.setdefault("GROQ_CHAT_RPM", "1000000")
+    os.environ.setdefault("GROQ_CHAT_RPD", "1000000")
+    return server
+
+
+def measure(name: str, fn, iterations: int) -> tuple[list[float], int]:
+    """Retorna as latências (ms) e quantas conexões novas foram abertas."""
+    fn()  # descarta a primeira chamada (imports, cache do SO)
+    before = StubChatHandler.connections
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    opened = StubChatHandler.connections - before
+    timings.sort()
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(
+        f"{name:<16} mean={statistics.mean(timings):7.2f}ms "
+        f"median={statistics.median(timings):7.2f}ms p95={p95:7.2f}ms "
+        f"conexões={opened}"
+    )
+    return timings, opened
+
+
+def main() -> int:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    server = start_stub()
+
+    from domain import init_database
+    from providers.groq import GroqProvider
+    from providers.registry import ProviderRegistry
+    from providers.zai import ZAIProvider
+
+    # cria a tabela das cotas, consultada a cada chamada
+    init_database()
+    registry = ProviderRegistry()
+    loop = asyncio.new_event_loop()
+
+    start = time.perf_counter()
+    print(f"Registry warm(): {loop.run_until_complete(registry.warm())}", end=" ")
+    print(f"em {(time.perf_counter() - start) * 1000:.2f}ms")
+
+    construct, _ = measure("construção ZAI", ZAIProvider, iterations)
+
+    zai_before, _ = measure(
+        "zai por chamada", lambda: ZAIProvider().complete("ping"), iterations
+    )
+    zai_after, _ = measure(
+        "zai registry", lambda: registry.zai().complete("ping"), iterations
+    )
+    groq_before, _ = measure(
+        "groq por chamada",
+        lambda: loop.run_until_complete(GroqProvider().achat("ping")),
+        iterations,
+    )
+    groq_after, _ = measure(
+        "groq registry",
+        lambda: loop.run_until_complete(registry.groq().achat("ping")),
+        iterations,
+    )
+
+    for name, before, after in (
+        ("zai", zai_before, zai_after),
+        ("groq", groq_before, groq_after),
+    ):
+        saved = statistics.median(before) - statistics.median(after)
+        print(f"Overhead removido por chamada ({name}, mediana): {saved:.2f}ms")
+    print(f"Construção ZAI+Groq (mediana): {statistics.median(construct):.2f}ms")
+
+    loop.run_until_complete(registry.aclose())
+    loop.close()
+    server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
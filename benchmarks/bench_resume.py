@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+"""
+Benchmark: latência do /resume em função do tamanho do conteúdo, prompt
+único (comportamento antigo) vs. map-reduce (``MapReduceSummarizer``).
+
+Os dois caminhos passam pelo ``ProviderRouter`` real, com backends
+simulados cuja latência segue um modelo simples: tempo até o primeiro byte
++ tokens de entrada / vazão de prefill + tokens de saída / vazão de decode.
+Cada backend tem um limite de tokens por requisição (janela de contexto da
+ZAI; limite por requisição do plano gratuito do Groq) acima do qual a
+chamada falha, como nas APIs reais. O relógio é acelerado por SCALE para o
+benchmark rodar em segundos; os tempos impressos são os simulados.
+
+    python benchmarks/bench_resume.py [concorrência] [tokens por pedaço]
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# 1s simulado = 10ms reais
+SCALE = 0.01
+LENGTHS = [1_000, 3_000, 8_000, 24_000, 64_000, 160_000]
+SENTENCE = "Esta é uma frase de exemplo do conteúdo transcrito com várias palavras. "
+
+# ttfb (s), prefill (tokens/s), decode (tokens/s), máximo de tokens por requisição
+PROFILES = {
+    "zai": (1.0, 2_000, 60, 128_000),
+    "groq": (0.3, 8_000, 400, 6_000),
+}
+MAP_OUTPUT_TOKENS = 180
+FINAL_OUTPUT_TOKENS = 250
+
+
+def document(tokens: int) -> str:
+    from providers.tokens import count_tokens
+
+    per_sentence = count_tokens(SENTENCE)
+    sentences = [SENTENCE] * (tokens // per_sentence)
+    # parágrafos de 10 frases, como um artigo ou uma transcrição pontuada
+    return "\n\n".join(
+        "".join(sentences[i:i + 10]).strip() for i in range(0, len(sentences), 10)
+    )
+
+
+def simulated_backend(name: str):
+    from providers.factory import ProviderError
+    from providers.router import Backend, CircuitBreaker
+    from providers.tokens import count_tokens
+
+    ttfb, prefill, decode, max_tokens = PROFILES[name]
+
+    def output_tokens(message: str) -> int:
+        return MAP_OUTPUT_TOKENS if "Resuma a parte" in message else FINAL_OUTPUT_TOKENS
+
+    async def prefill_wait(message: str) -> None:
+        tokens = count_tokens(message)
+        if tokens > max_tokens:
+            await asyncio.sleep(ttfb * SCALE)
+            raise ProviderError(f"{name}: request too large ({tokens} tokens)")
+        await asyncio.sleep((ttfb + tokens / prefill) * SCALE)
+
+    async def call(message: str) -> str:
+        await prefill_wait(message)
+        out = output_tokens(message)
+        await asyncio.sleep(out / decode * SCALE)
+        return "resumo " * (out // 2)
+
+    async def stream(message: str):
+        await prefill_wait(message)
+        out = output_tokens(message)
+        for _ in range(out // 10):
+            await asyncio.sleep(10 / decode * SCALE)
+            yield "resumo " * 5
+
+    return Backend(name, call, breaker=CircuitBreaker(name), stream=stream, model=name)
+
+
+async def run_once(content: str, map_reduce: bool, concurrency: int, chunk_tokens: int):
+    """Retorna (primeiro token, total) em segundos simulados, ou None se falhou."""
+    from providers.factory import ProviderError
+    from providers.router import ProviderRouter
+    from providers.summarize import MapReduceSummarizer
+
+    router = ProviderRouter(
+        [simulated_backend("zai"), simulated_backend("groq")], hedge_after=8 * SCALE
+    )
+    # prompt único = map-reduce com pedaço maior que qualquer documento
+    summarizer = MapReduceSummarizer(
+        router,
+        chunk_tokens=chunk_tokens if map_reduce else sys.maxsize,
+        concurrency=concurrency,
+    )
+    start = time.perf_counter()
+    first = None
+    try:
+        async for _ in summarizer.astream("Título", content, "Resuma"):
+            if first is None:
+                first = time.perf_counter() - start
+    except ProviderError:
+        return None
+    return first / SCALE, (time.perf_counter() - start) / SCALE
+
+
+def main() -> int:
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    chunk_tokens = int(sys.argv[2]) if len(sys.argv) > 2 else 3000
+
+    from providers.tokens import chunk_text, count_tokens
+
+    print(
+        f"map-reduce: {chunk_tokens} tokens por pedaço, "
+        f"até {concurrency} chamadas simultâneas (tempos simulados)"
+    )
+    print(f"{'tokens':>8} {'partes':>6} | {'prompt único':>22} | {'map-reduce':>22}")
+    for length in LENGTHS:
+        content = document(length)
+        tokens = count_tokens(content)
+        parts = len(chunk_text(content, chunk_tokens)) if tokens > chunk_tokens else 1
+        row = [f"{tokens:>8} {parts:>6}"]
+        for map_reduce in (False, True):
+            runs = [
+                asyncio.run(run_once(content, map_reduce, concurrency, chunk_tokens))
+                for _ in range(3)
+            ]
+            if any(run is None for run in runs):
+                row.append(f"{'falhou (contexto)':>22}")
+                continue
+            first = statistics.median(run[0] for run in runs)
+            total = statistics.median(run[1] for run in runs)
+            row.append(f"1º token {first:5.1f}s total {total:5.1f}s")
+        print(" | ".join(row))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
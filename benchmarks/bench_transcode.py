@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""
+Benchmark do estágio de recompressão (telegrambot/handlers/transcode.py).
+
+Gera clipes de amostra com o ffmpeg (lavfi testsrc2 + tom senoidal) em
+algumas durações e mede o tempo de ffprobe + transcodificação e o tamanho
+final. O limite é reduzido (--limit-mb) para que clipes curtos já
+precisem ser recomprimidos.
+
+    python benchmarks/bench_transcode.py [--limit-mb 8] [--durations 15,60,180]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from telegrambot.handlers.transcode import (
+    fit_to_upload_limit,
+    plan_transcode,
+    probe_media,
+)
+
+
+def make_clip(path: str, duration: int) -> None:
+    subprocess.run(
+        [
+            "ffmpeg", "-y", "-v", "error",
+            "-f", "lavfi", "-i", f"testsrc2=size=1920x1080:rate=30:duration={duration}",
+            "-f", "lavfi", "-i", f"sine=frequency=440:duration={duration}",
+            "-c:v", "libx264", "-preset", "ultrafast", "-b:v", "8M",
+            "-c:a", "aac", "-b:a", "192k",
+            "-shortest", path,
+        ],
+        check=True,
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--limit-mb", type=float, default=8)
+    parser.add_argument("--durations", default="15,60,180")
+    args = parser.parse_args()
+    limit_bytes = int(args.limit_mb * 1024 * 1024)
+
+    print(f"{'duração':>8} {'original':>10} {'alvo':>14} {'final':>10} {'tempo':>8} {'x real':>7}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for duration in (int(d) for d in args.durations.split(",")):
+            path = os.path.join(tmpdir, f"clip_{duration}.mp4")
+            make_clip(path, duration)
+            original = os.path.getsize(path)
+
+            info = probe_media(path)
+            plan = plan_transcode(info, limit_bytes)
+
+            start = time.perf_counter()
+            out = fit_to_upload_limit(path, limit_bytes)
+            elapsed = time.perf_counter() - start
+
+            print(
+                f"{duration:>7}s {original / 1e6:>8.1f}MB "
+                f"{plan.video_kbps:>6}k@{plan.height or info.height}p "
+                f"{os.path.getsize(out) / 1e6:>8.1f}MB {elapsed:>7.1f}s "
+                f"{duration / elapsed:>6.1f}x"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,361 @@
+#!/usr/bin/env python
+"""
+Benchmark do pipeline de transcrição, sem serviços externos.
+
+Gera fixtures de "fala" sintética (sílabas com formantes de vogais, que o
+VAD Silero reconhece como fala) em algumas durações, serve os arquivos num
+site local para o yt-dlp e sobe um servidor falso da API do Groq
+(GROQ_BASE_URL). Cada combinação de modelo e compute_type roda num
+subprocesso próprio, para que o pico de RSS e o tempo de carga sejam
+medidos do zero:
+
+- local: ``transcribe_audio`` (download, VAD, whisper local) e
+  ``transcription_handler`` sem Groq, o que mede o tempo até o primeiro
+  texto no status;
+- groq: os mesmos dois caminhos contra o servidor falso, mais N áudios de
+  voz simultâneos no handler.
+
+    python benchmarks/bench_transcription.py [--models base,small]
+        [--compute-types int8,float32] [--durations 15,60,300]
+        [--groq-latency 0.5] [--concurrency 8]
+
+Sem acesso ao HuggingFace os modelos locais não carregam; essas linhas
+aparecem com o erro e o resto do benchmark continua.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import types
+from functools import partial
+from http.server import BaseHTTPRequestHandler, SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+SAMPLING_RATE = 16000
+# (frequência, largura de banda) dos três primeiros formantes de /a/, /i/, /o/
+VOWELS = [
+    ((700, 130), (1220, 70), (2600, 160)),
+    ((300, 60), (2300, 100), (3000, 150)),
+    ((500, 80), (900, 80), (2400, 150)),
+]
+
+
+# --- fixtures -------------------------------------------------------------
+
+
+def syllable(duration: float, f0: float, formants) -> np.ndarray:
+    n = int(duration * SAMPLING_RATE)
+    t = np.arange(n) / SAMPLING_RATE
+    phase = 2 * np.pi * np.cumsum(f0 * (1 + 0.05 * np.sin(2 * np.pi * 3 * t))) / SAMPLING_RATE
+    wave = np.zeros(n)
+    for k in range(1, int(3800 / f0)):
+        amplitude = sum(1 / (1 + ((k * f0 - fc) / bw) ** 2) for fc, bw in formants)
+        wave += amplitude * np.sin(k * phase)
+    return wave * np.hanning(n)
+
+
+def babble(seconds: int, seed: int) -> np.ndarray:
+    """Frases de 3 a 7 sílabas separadas por pausas, até ``seconds``."""
+    rng = np.random.default_rng(seed)
+    parts, total = [], 0
+    while total < seconds * SAMPLING_RATE:
+        for _ in range(rng.integers(3, 8)):
+            parts.append(
+                syllable(rng.uniform(0.12, 0.3), rng.uniform(100, 160), VOWELS[rng.integers(3)])
+            )
+            parts.append(np.zeros(int(0.04 * SAMPLING_RATE)))
+        parts.append(np.zeros(int(rng.uniform(0.6, 1.2) * SAMPLING_RATE)))
+        total = sum(len(part) for part in parts)
+    audio = np.concatenate(parts)[: seconds * SAMPLING_RATE]
+    return (0.5 * audio / np.abs(audio).max()).astype(np.float32)
+
+
+def make_fixtures(root: str, durations: list[int]) -> dict[int, str]:
+    from telegrambot.handlers.audio_encoding import encode_opus
+
+    fixtures = {}
+    for seed, seconds in enumerate(durations):
+        path = os.path.join(root, f"voice_{seconds}s.ogg")
+        with open(path, "wb") as f:
+            f.write(encode_opus(babble(seconds, seed)))
+        fixtures[seconds] = path
+    return fixtures
+
+
+# --- servidores locais ----------------------------------------------------
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class QuietServer(ThreadingHTTPServer):
+    # o backlog padrão (5) serializa as rajadas de uploads simultâneos
+    request_queue_size = 64
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+class StubGroqHandler(BaseHTTPRequestHandler):
+    """Imita /openai/v1/audio/transcriptions: latência fixa + por MB enviado."""
+
+    latency = 0.5
+    seconds_per_mb = 0.2
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        size = int(self.headers.get("content-length", 0))
+        self.rfile.read(size)
+        time.sleep(self.latency + self.seconds_per_mb * size / 1e6)
+        body = json.dumps(
+            {"text": f" stub transcript of {size} bytes", "language": "portuguese"}
+        ).encode()
+        self.send_response(200)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(handler) -> ThreadingHTTPServer:
+    server = QuietServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# --- worker (subprocesso) -------------------------------------------------
+
+
+def fake_voice_update(path: str, seconds: int, edits: list):
+    """Update mínimo para o transcription_handler, registrando cada edição."""
+    start = time.perf_counter()
+
+    class Message:
+        async def edit_text(self, text, **kwargs):
+            edits.append((time.perf_counter() - start, text))
+
+    class File:
+        file_id = f"bench{time.monotonic_ns()}"
+
+        async def download_to_drive(self, custom_path):
+            with open(path, "rb") as src, open(custom_path, "wb") as dst:
+                dst.write(src.read())
+
+        async def download_to_memory(self, out):
+            with open(path, "rb") as src:
+                out.write(src.read())
+
+    class Voice:
+        file_unique_id = f"bench{time.monotonic_ns()}"
+        duration = seconds
+
+        async def get_file(self):
+            return File()
+
+    class VoiceMessage:
+        chat_id = 0
+        voice = Voice()
+        video_note = None
+
+        async def reply_text(self, text, **kwargs):
+            return Message()
+
+    return types.SimpleNamespace(
+        effective_user=types.SimpleNamespace(id=0, first_name="Bench"),
+        message=VoiceMessage(),
+    )
+
+
+async def run_handler(path: str, seconds: int) -> dict:
+    from telegrambot.handlers.transcription import transcription_handler
+
+    edits = []
+    start = time.perf_counter()
+    await transcription_handler(fake_voice_update(path, seconds, edits), None)
+    return {
+        "latency": time.perf_counter() - start,
+        # a primeira edição com texto parcial (a última é o resultado final)
+        "first_text": edits[0][0] if len(edits) > 1 else None,
+        "ok": bool(edits) and "disse:" in edits[-1][1],
+    }
+
+
+async def run_concurrent(fixtures: dict, concurrency: int) -> dict:
+    seconds, path = min(fixtures.items())
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *[run_handler(path, seconds) for _ in range(concurrency)]
+    )
+    return {
+        "latency": time.perf_counter() - start,
+        "ok": all(result["ok"] for result in results),
+    }
+
+
+def worker(args) -> dict:
+    import logging
+
+    logging.basicConfig(level=logging.WARNING)
+    from domain import init_database
+    from telegrambot.handlers.utils import transcribe_audio
+    from telegrambot.handlers.whisper_models import rss_mb, whisper_models
+
+    init_database()
+    fixtures = {int(k): v for k, v in json.loads(args.fixtures).items()}
+    report = {"rows": [], "load_time": None, "model_rss": None}
+    model_size = args.model if args.mode == "local" else None
+
+    if model_size:
+        try:
+            whisper_models.get(model_size)
+        except Exception as e:
+            report["error"] = f"{type(e).__name__}: {e}"
+            report["peak_rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+            return report
+        stats = whisper_models.stats[model_size]
+        report["load_time"], report["model_rss"] = stats["load_time"], stats["rss_mb"]
+
+    for seconds, path in sorted(fixtures.items()):
+        row = {"seconds": seconds}
+        url = f"{args.site}/{os.path.basename(path)}"
+        start = time.perf_counter()
+        try:
+            text, _title, origin = transcribe_audio(url, model_size, "")
+            row["pipeline"] = time.perf_counter() - start
+            row["origin"] = origin.name
+            row["words"] = len((text or "").split())
+        except Exception as e:
+            row["error"] = f"{type(e).__name__}: {e}"
+        row["handler"] = asyncio.run(run_handler(path, seconds))
+        report["rows"].append(row)
+
+    if args.mode == "groq" and args.concurrency > 1:
+        report["concurrent"] = asyncio.run(run_concurrent(fixtures, args.concurrency))
+        report["concurrency"] = args.concurrency
+    report["peak_rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    report["rss"] = rss_mb()
+    return report
+
+
+# --- orquestração ---------------------------------------------------------
+
+
+def spawn(args, mode: str, model: str, compute_type: str, fixtures, site: str, groq_url: str) -> dict:
+    env = dict(
+        os.environ,
+        WHISPER_COMPUTE_TYPE=compute_type,
+        WHISPER_LOCAL_MODELS=model,
+        GROQ_BASE_URL=groq_url,
+        # sem chave o scheduler nem tenta o Groq
+        GROQ_API_KEY="stub" if mode == "groq" else "",
+        GROQ_MAX_RETRIES="0",
+    )
+    with tempfile.TemporaryDirectory() as workdir:
+        # cwd próprio: database.sqlite (e o cache de transcrições) começa vazio
+        proc = subprocess.run(
+            [
+                sys.executable, os.path.abspath(__file__), "--worker",
+                "--mode", mode, "--model", model,
+                "--fixtures", json.dumps(fixtures), "--site", site,
+                "--concurrency", str(args.concurrency),
+            ],
+            cwd=workdir, env=env, capture_output=True, text=True,
+        )
+    try:
+        return json.loads(proc.stdout.strip().splitlines()[-1])
+    except (IndexError, json.JSONDecodeError):
+        return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr else "no output"}
+
+
+def fmt(value, spec=".2f", width=8) -> str:
+    return f"{value:>{width}{spec}}" if isinstance(value, (int, float)) else f"{'-':>{width}}"
+
+
+def print_report(label: str, report: dict) -> None:
+    print(f"\n{label}")
+    if "error" in report and not report.get("rows"):
+        print(f"   erro: {report['error'].splitlines()[0]}")
+        return
+    if report.get("load_time") is not None:
+        print(
+            f"   carga do modelo {report['load_time']:.1f}s, "
+            f"+{report['model_rss']:.0f}MB RSS"
+        )
+    print(f"   pico RSS {fmt(report.get('peak_rss'), '.0f', 0)}MB")
+    print(f"   {'áudio':>6} {'pipeline':>9} {'RTF':>6} {'handler':>8} {'1º texto':>9} origem")
+    for row in report["rows"]:
+        pipeline = row.get("pipeline")
+        rtf = pipeline / row["seconds"] if pipeline else None
+        handler = row["handler"]
+        print(
+            f"   {row['seconds']:>5}s {fmt(pipeline, '.2f', 8)}s {fmt(rtf, '.3f', 6)} "
+            f"{fmt(handler['latency'], '.2f', 7)}s {fmt(handler['first_text'], '.2f', 8)}s "
+            f"{row.get('origin', row.get('error', '-'))}"
+        )
+    if "concurrent" in report:
+        concurrent = report["concurrent"]
+        print(
+            f"   {report['concurrency']} áudios simultâneos no handler: "
+            f"{concurrent['latency']:.2f}s "
+            f"({'ok' if concurrent['ok'] else 'falhou'})"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--models", default="base,small")
+    parser.add_argument("--compute-types", default="int8")
+    parser.add_argument("--durations", default="15,60,300")
+    parser.add_argument("--groq-latency", type=float, default=0.5)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--mode", help=argparse.SUPPRESS)
+    parser.add_argument("--model", help=argparse.SUPPRESS)
+    parser.add_argument("--fixtures", help=argparse.SUPPRESS)
+    parser.add_argument("--site", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(worker(args)))
+        return 0
+
+    with tempfile.TemporaryDirectory() as root:
+        durations = [int(d) for d in args.durations.split(",")]
+        start = time.perf_counter()
+        fixtures = make_fixtures(root, durations)
+        print(f"Fixtures {durations}s geradas em {time.perf_counter() - start:.1f}s")
+
+        site = serve(partial(QuietHandler, directory=root))
+        site_url = f"http://127.0.0.1:{site.server_address[1]}"
+        StubGroqHandler.latency = args.groq_latency
+        groq = serve(StubGroqHandler)
+        groq_url = f"http://127.0.0.1:{groq.server_address[1]}"
+
+        report = spawn(args, "groq", "base", "int8", fixtures, site_url, groq_url)
+        print_report(f"Groq (stub, latência {args.groq_latency}s)", report)
+
+        # Sem Groq: o handler usa o whisper local e transmite os segmentos
+        for compute_type in args.compute_types.split(","):
+            for model in args.models.split(","):
+                report = spawn(args, "local", model, compute_type, fixtures, site_url, groq_url)
+                print_report(f"Local {model} ({compute_type})", report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
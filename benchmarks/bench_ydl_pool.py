@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""
+Benchmark: custo por chamada de um probe do yt-dlp, construindo um YoutubeDL
+novo a cada chamada (comportamento antigo) vs. usando o pool pré-aquecido.
+
+Roda contra um site local servindo um arquivo de mídia fixo, então não
+depende de rede externa.
+
+    python benchmarks/bench_ydl_pool.py [iterações]
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import yt_dlp
+
+from telegrambot.handlers.utils import get_ydl_opts, get_ydl_pool
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class QuietServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # O yt-dlp fecha a conexão assim que identifica o tipo da mídia
+        pass
+
+
+def start_fixture_site(root: str) -> ThreadingHTTPServer:
+    with open(os.path.join(root, "clip.mp4"), "wb") as f:
+        f.write(os.urandom(256 * 1024))
+    server = QuietServer(("127.0.0.1", 0), partial(QuietHandler, directory=root))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def per_call_probe(url: str) -> None:
+    with yt_dlp.YoutubeDL(get_ydl_opts({"skip_download": True})) as ydl:
+        ydl.extract_info(url, download=False)
+
+
+def pooled_probe(url: str) -> None:
+    with get_ydl_pool("probe").acquire() as ydl:
+        ydl.extract_info(url, download=False)
+
+
+def measure(name: str, fn, url: str, iterations: int) -> list[float]:
+    fn(url)  # descarta a primeira chamada (imports, cache do SO)
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(url)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(
+        f"{name:<12} mean={statistics.mean(timings):7.2f}ms "
+        f"median={statistics.median(timings):7.2f}ms p95={p95:7.2f}ms"
+    )
+    return timings
+
+
+def main() -> int:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+    with tempfile.TemporaryDirectory() as root:
+        server = start_fixture_site(root)
+        url = f"http://127.0.0.1:{server.server_address[1]}/clip.mp4"
+
+        start = time.perf_counter()
+        get_ydl_pool("probe").warm()
+        print(f"Pool warm-up: {(time.perf_counter() - start) * 1000:.2f}ms")
+
+        before = measure("per-call", per_call_probe, url, iterations)
+        after = measure("pooled", pooled_probe, url, iterations)
+        saved = statistics.median(before) - statistics.median(after)
+        print(f"Overhead removido por chamada (mediana): {saved:.2f}ms")
+
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
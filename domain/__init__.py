@@ -1,26 +1,89 @@
-from .entities import FeatureEntity, MessageEntity
+from .entities import (
+    FeatureEntity,
+    LlmResponseEntity,
+    MediaShareEntity,
+    MessageEntity,
+    SpeakerProfileEntity,
+    TldrSegment,
+    TranscriptEntity,
+)
+from .links import canonicalize_link
 from .models import (
+    ChatSummaryChunk,
     Feature,
+    LlmCacheStats,
+    LlmResponseCache,
+    MediaShare,
     Message,
+    QuotaBucket,
+    SpeakerModelQuality,
+    SpeakerProfile,
     SteamProfileState,
+    TranscriptCache,
     claim_game_notification,
     db,
     init_database,
 )
-from .repositories import FeatureRepository, MessageRepository
-from .services import FeatureService, MessageService
+from .repositories import (
+    ChatSummaryRepository,
+    FeatureRepository,
+    LlmCacheRepository,
+    MediaShareRepository,
+    MessageRepository,
+    QuotaRepository,
+    SpeakerProfileRepository,
+    TranscriptRepository,
+)
+from .services import (
+    ChatSummaryService,
+    FeatureService,
+    LlmCacheService,
+    MediaShareService,
+    MessageService,
+    QuotaService,
+    SpeakerProfileService,
+    TranscriptService,
+    compact_messages,
+)
 
 __all__ = [
     "FeatureEntity",
+    "LlmResponseEntity",
+    "MediaShareEntity",
     "MessageEntity",
+    "SpeakerProfileEntity",
+    "TldrSegment",
+    "TranscriptEntity",
+    "canonicalize_link",
+    "ChatSummaryChunk",
     "Feature",
+    "LlmCacheStats",
+    "LlmResponseCache",
+    "MediaShare",
     "Message",
+    "QuotaBucket",
+    "SpeakerModelQuality",
+    "SpeakerProfile",
     "SteamProfileState",
+    "TranscriptCache",
     "claim_game_notification",
     "db",
     "init_database",
+    "ChatSummaryRepository",
     "FeatureRepository",
+    "LlmCacheRepository",
+    "MediaShareRepository",
     "MessageRepository",
+    "QuotaRepository",
+    "SpeakerProfileRepository",
+    "TranscriptRepository",
+    "ChatSummaryService",
     "FeatureService",
+    "LlmCacheService",
+    "MediaShareService",
     "MessageService",
+    "QuotaService",
+    "SpeakerProfileService",
+    "TranscriptService",
+    "compact_messages",
 ]
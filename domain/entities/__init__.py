@@ -2,7 +2,20 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional
 
+from .chat_summary import TldrSegment
 from .feature import FeatureEntity
+from .llm_response import LlmResponseEntity
+from .media_share import MediaShareEntity
 from .message import MessageEntity
+from .speaker_profile import SpeakerProfileEntity
+from .transcript import TranscriptEntity
 
-__all__ = ["FeatureEntity", "MessageEntity"]
+__all__ = [
+    "TldrSegment",
+    "FeatureEntity",
+    "LlmResponseEntity",
+    "MediaShareEntity",
+    "MessageEntity",
+    "SpeakerProfileEntity",
+    "TranscriptEntity",
+]
@@ -0,0 +1,21 @@
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass
+class TldrSegment:
+    """Trecho contíguo de mensagens do /tldr, em ordem cronológica.
+
+    Either an already summarized chunk (``summary`` set, no ``lines``) or
+    raw ``lines`` ("remetente: texto", compacted); ``seal`` marks a full
+    window that should be summarized and stored as a new chunk.
+    ``raw_lines`` keeps the uncompacted lines to measure what was saved.
+    """
+
+    start_id: int
+    end_id: int
+    message_count: int
+    lines: list[str] = field(default_factory=list)
+    summary: Optional[str] = None
+    seal: bool = False
+    raw_lines: list[str] = field(default_factory=list)
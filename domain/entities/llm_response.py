@@ -0,0 +1,13 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+
+@dataclass
+class LlmResponseEntity:
+    key: str
+    kind: str
+    text: str
+    model: Optional[str] = None
+    created_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
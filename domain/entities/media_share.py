@@ -0,0 +1,12 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+
+@dataclass
+class MediaShareEntity:
+    link: str
+    canonical_link: str
+    sender: str
+    chat_id: int
+    created_at: Optional[datetime] = None
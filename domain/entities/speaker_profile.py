@@ -0,0 +1,11 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class SpeakerProfileEntity:
+    chat_id: int
+    user_id: int
+    # None enquanto o idioma/modelo ainda não foram aprendidos
+    language: Optional[str] = None
+    model_size: Optional[str] = None
@@ -0,0 +1,13 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+
+@dataclass
+class TranscriptEntity:
+    key: str
+    text: str
+    language: Optional[str] = None
+    title: Optional[str] = None
+    origin: Optional[str] = None
+    created_at: Optional[datetime] = None
@@ -0,0 +1,106 @@
+import re
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+# Parâmetros de rastreamento/compartilhamento que não mudam o conteúdo
+TRACKING_PARAMS = {
+    "fbclid",
+    "feature",
+    "gclid",
+    "igsh",
+    "igshid",
+    "mibextid",
+    "ref",
+    "ref_src",
+    "ref_url",
+    "rdid",
+    "share_url",
+    "si",
+}
+TRACKING_PREFIXES = ("utm_",)
+
+HOST_PREFIXES = ("www.", "m.", "mobile.", "web.")
+HOST_ALIASES = {
+    "x.com": "twitter.com",
+    "fxtwitter.com": "twitter.com",
+    "vxtwitter.com": "twitter.com",
+    "fixupx.com": "twitter.com",
+    "fixvx.com": "twitter.com",
+    "youtu.be": "youtube.com",
+    "instagr.am": "instagram.com",
+    "ddinstagram.com": "instagram.com",
+    "fb.watch": "facebook.com",
+}
+
+YOUTUBE_ID = re.compile(r"^/(?:shorts|embed|live|v)/([\w-]{11})")
+INSTAGRAM_SHORTCODE = re.compile(r"^/(?:[\w.]+/)?(?:reels?|p|tv)/([\w-]+)")
+FACEBOOK_REEL = re.compile(r"^/reels?/(\d+)")
+TWITTER_STATUS = re.compile(r"^/(?:[\w]+|i(?:/web)?)/status(?:es)?/(\d+)")
+BSKY_POST = re.compile(r"^/profile/([^/]+)/post/([\w]+)")
+
+
+def _normalize_host(host: str) -> str:
+    host = host.lower().split(":", 1)[0]
+    for prefix in HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    return HOST_ALIASES.get(host, host)
+
+
+def _site_key(host: str, path: str, query: dict) -> Optional[str]:
+    if host == "youtube.com":
+        match = YOUTUBE_ID.match(path)
+        if match:
+            return f"youtube:{match.group(1)}"
+        if path == "/watch" and query.get("v"):
+            return f"youtube:{query['v']}"
+        if re.fullmatch(r"/[\w-]{11}", path):  # youtu.be/<id>
+            return f"youtube:{path[1:]}"
+    elif host == "instagram.com":
+        match = INSTAGRAM_SHORTCODE.match(path)
+        if match:
+            return f"instagram:{match.group(1)}"
+    elif host == "facebook.com":
+        match = FACEBOOK_REEL.match(path)
+        if match:
+            return f"facebook:reel:{match.group(1)}"
+    elif host == "twitter.com":
+        match = TWITTER_STATUS.match(path)
+        if match:
+            return f"twitter:{match.group(1)}"
+    elif host == "bsky.app":
+        match = BSKY_POST.match(path)
+        if match:
+            return f"bsky:{match.group(1).lower()}/{match.group(2)}"
+    return None
+
+
+def canonicalize_link(link: str) -> str:
+    """Returns a stable key for a media link.
+
+    Known hosts (YouTube, Instagram, Facebook reels, Twitter/X, Bluesky) map
+    to ``<site>:<content id>``, so ``/reel/`` vs ``/reels/``, ``x.com`` vs
+    ``twitter.com``, mobile hosts and share parameters all collapse to one
+    key. Other links become a normalized URL without tracking parameters.
+    """
+    link = link.strip()
+    parts = urlsplit(link if "://" in link else f"https://{link}")
+    host = _normalize_host(parts.hostname or "")
+    path = re.sub(r"/{2,}", "/", parts.path).rstrip("/") or "/"
+    query = dict(parse_qsl(parts.query, keep_blank_values=False))
+
+    key = _site_key(host, path, query)
+    if key:
+        return key
+
+    query = {
+        k: v
+        for k, v in query.items()
+        if k.lower() not in TRACKING_PARAMS
+        and not k.lower().startswith(TRACKING_PREFIXES)
+    }
+    normalized = f"https://{host}{path}"
+    if query:
+        normalized += "?" + urlencode(sorted(query.items()))
+    return normalized
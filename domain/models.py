@@ -4,6 +4,7 @@ from typing import Optional
 from peewee import (
     BooleanField,
     DateTimeField,
+    FloatField,
     IntegerField,
     Model,
     SqliteDatabase,
@@ -92,12 +93,141 @@ def claim_game_notification(
 class MediaShare(BaseModel):
     """Quem já enviou cada link de mídia no grupo (detecção de repetidos)."""
     link = TextField(index=True)
+    canonical_link = TextField(null=True)
     sender = TextField()
     chat_id = IntegerField()
     created_at = DateTimeField(default=datetime.now)
 
     class Meta:
         table_name = "media_share"
+        indexes = ((("chat_id", "canonical_link", "created_at"), False),)
+
+
+def _migrate_media_share(batch_size: int = 500):
+    """Adds canonical_link to old media_share tables and backfills it."""
+    from .links import canonicalize_link
+
+    columns = [c.name for c in db.get_columns("media_share")]
+    if "canonical_link" not in columns:
+        db.execute_sql("ALTER TABLE media_share ADD COLUMN canonical_link TEXT")
+    MediaShare.create_table(safe=True)  # cria índices que faltarem
+
+    while True:
+        rows = list(
+            MediaShare.select(MediaShare.id, MediaShare.link)
+            .where(MediaShare.canonical_link.is_null())
+            .limit(batch_size)
+        )
+        if not rows:
+            break
+        with db.atomic():
+            for row in rows:
+                MediaShare.update(canonical_link=canonicalize_link(row.link)).where(
+                    MediaShare.id == row.id
+                ).execute()
+
+
+class TranscriptCache(BaseModel):
+    """Transcrições já feitas, por identidade da mídia (file_unique_id, link, hash)."""
+    key = TextField(unique=True)
+    text = TextField()
+    language = TextField(null=True)
+    title = TextField(null=True)
+    origin = TextField(null=True)
+    size = IntegerField(default=0)
+    hits = IntegerField(default=0)
+    created_at = DateTimeField(default=datetime.now)
+    last_used_at = DateTimeField(default=datetime.now, index=True)
+
+    class Meta:
+        table_name = "transcript_cache"
+
+
+class SpeakerProfile(BaseModel):
+    """Idioma aprendido de quem manda áudios, por chat."""
+    chat_id = IntegerField()
+    user_id = IntegerField()
+    language = TextField(null=True)
+    # detecções seguidas do mesmo idioma com alta confiança
+    language_streak = IntegerField(default=0)
+    samples = IntegerField(default=0)
+    updated_at = DateTimeField(default=datetime.now)
+
+    class Meta:
+        table_name = "speaker_profile"
+        indexes = ((("chat_id", "user_id"), True),)
+
+
+class SpeakerModelQuality(BaseModel):
+    """Qualidade (avg_logprob médio) de cada modelo whisper para um falante."""
+    chat_id = IntegerField()
+    user_id = IntegerField()
+    model_size = TextField()
+    samples = IntegerField(default=0)
+    avg_logprob = FloatField(default=0.0)
+    updated_at = DateTimeField(default=datetime.now)
+
+    class Meta:
+        table_name = "speaker_model_quality"
+        indexes = ((("chat_id", "user_id", "model_size"), True),)
+
+
+class LlmResponseCache(BaseModel):
+    """Respostas de LLM já geradas, por chave de prompt/modelo ou de conteúdo."""
+    key = TextField(unique=True)
+    kind = TextField()
+    model = TextField(null=True)
+    text = TextField()
+    size = IntegerField(default=0)
+    hits = IntegerField(default=0)
+    created_at = DateTimeField(default=datetime.now)
+    expires_at = DateTimeField(index=True)
+    last_used_at = DateTimeField(default=datetime.now, index=True)
+
+    class Meta:
+        table_name = "llm_response_cache"
+
+
+class LlmCacheStats(BaseModel):
+    """Acertos e falhas do cache de LLM por tipo, somados entre processos."""
+    kind = TextField(unique=True)
+    hits = IntegerField(default=0)
+    misses = IntegerField(default=0)
+    updated_at = DateTimeField(default=datetime.now)
+
+    class Meta:
+        table_name = "llm_cache_stats"
+
+
+class ChatSummaryChunk(BaseModel):
+    """Resumo de uma janela fixa de mensagens de um chat (ids start_id..end_id)."""
+    chat_id = IntegerField()
+    platform = TextField(default="telegram")
+    start_id = IntegerField()
+    end_id = IntegerField()
+    message_count = IntegerField()
+    summary = TextField()
+    created_at = DateTimeField(default=datetime.now)
+
+    class Meta:
+        table_name = "chat_summary_chunk"
+        indexes = ((("chat_id", "platform", "start_id"), True),)
+
+
+class QuotaBucket(BaseModel):
+    """Token bucket de uma cota de provider, compartilhado entre os processos."""
+    key = TextField(unique=True)
+    capacity = FloatField()
+    # fichas repostas por segundo
+    refill_rate = FloatField()
+    tokens = FloatField()
+    # time.time() da última reposição
+    refilled_at = FloatField()
+    granted = IntegerField(default=0)
+    denied = IntegerField(default=0)
+
+    class Meta:
+        table_name = "quota_bucket"
 
 
 def init_database():
@@ -126,3 +256,26 @@ def init_database():
 
         if not MediaShare.table_exists():
             MediaShare.create_table()
+        else:
+            _migrate_media_share()
+
+        if not TranscriptCache.table_exists():
+            TranscriptCache.create_table()
+
+        if not SpeakerProfile.table_exists():
+            SpeakerProfile.create_table()
+
+        if not SpeakerModelQuality.table_exists():
+            SpeakerModelQuality.create_table()
+
+        if not LlmResponseCache.table_exists():
+            LlmResponseCache.create_table()
+
+        if not LlmCacheStats.table_exists():
+            LlmCacheStats.create_table()
+
+        if not ChatSummaryChunk.table_exists():
+            ChatSummaryChunk.create_table()
+
+        if not QuotaBucket.table_exists():
+            QuotaBucket.create_table()
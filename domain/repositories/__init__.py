@@ -1,9 +1,22 @@
-from .base import BaseRepository
+from .base import BaseRepository, LruRepository
+from .chat_summary_repository import ChatSummaryRepository
 from .feature_repository import FeatureRepository
+from .llm_cache_repository import LlmCacheRepository
+from .media_share_repository import MediaShareRepository
 from .message_repository import MessageRepository
+from .quota_repository import QuotaRepository
+from .speaker_profile_repository import SpeakerProfileRepository
+from .transcript_repository import TranscriptRepository
 
 __all__ = [
     "BaseRepository",
+    "LruRepository",
+    "ChatSummaryRepository",
     "FeatureRepository",
+    "LlmCacheRepository",
+    "MediaShareRepository",
     "MessageRepository",
+    "QuotaRepository",
+    "SpeakerProfileRepository",
+    "TranscriptRepository",
 ]
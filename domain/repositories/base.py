@@ -1,5 +1,7 @@
 from typing import Generic, Optional, TypeVar
 
+from peewee import fn
+
 from ..models import BaseModel
 
 T = TypeVar("T", bound=BaseModel)
@@ -39,3 +41,33 @@ class BaseRepository(Generic[T]):
         if limit:
             query = query.limit(limit)
         return list(query)
+
+
+class LruRepository(BaseRepository[T]):
+    """Repositório de cache: o modelo tem colunas ``size`` e ``last_used_at``."""
+
+    def usage(self) -> tuple[int, int]:
+        count, size = self.model.select(
+            fn.COUNT(self.model.id), fn.COALESCE(fn.SUM(self.model.size), 0)
+        ).scalar(as_tuple=True)
+        return count, size
+
+    def evict_lru(self, max_entries: int, max_bytes: int, batch_size: int = 100) -> int:
+        """Apaga as entradas usadas há mais tempo até caber nos limites."""
+        evicted = 0
+        while True:
+            count, size = self.usage()
+            if count <= max_entries and size <= max_bytes:
+                return evicted
+            excess_bytes = max(size - max_bytes, 0)
+            average_size = max(size // max(count, 1), 1)
+            to_evict = max(count - max_entries, -(-excess_bytes // average_size), 1)
+            oldest = [
+                row.id
+                for row in self.model.select(self.model.id)
+                .order_by(self.model.last_used_at.asc())
+                .limit(min(to_evict, batch_size))
+            ]
+            if not oldest:
+                return evicted
+            evicted += self.model.delete().where(self.model.id.in_(oldest)).execute()
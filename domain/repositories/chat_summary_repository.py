@@ -0,0 +1,64 @@
+from typing import Optional
+
+from ..models import ChatSummaryChunk, Message
+from .base import BaseRepository
+
+
+class ChatSummaryRepository(BaseRepository[ChatSummaryChunk]):
+    def __init__(self):
+        super().__init__(ChatSummaryChunk)
+
+    def get_window(
+        self,
+        chat_id: int,
+        limit: int,
+        platform: str = "telegram",
+        exclude_platform_message_id: Optional[int] = None,
+    ) -> list[Message]:
+        """As ``limit`` mensagens mais recentes do chat, da mais antiga à mais nova."""
+        query = Message.select(
+            Message.id, Message.from_user, Message.text, Message.message_type
+        ).where(
+            (Message.chat_id == chat_id) & (Message.platform == platform)
+        )
+        if exclude_platform_message_id is not None:
+            query = query.where(
+                Message.platform_message_id != exclude_platform_message_id
+            )
+        rows = list(query.order_by(Message.id.desc()).limit(limit))
+        rows.reverse()
+        return rows
+
+    def get_chunks(
+        self, chat_id: int, start_id: int, end_id: int, platform: str = "telegram"
+    ) -> list[ChatSummaryChunk]:
+        """Chunks que se sobrepõem ao intervalo de ids, em ordem."""
+        return list(
+            self.model.select()
+            .where(
+                (self.model.chat_id == chat_id)
+                & (self.model.platform == platform)
+                & (self.model.end_id >= start_id)
+                & (self.model.start_id <= end_id)
+            )
+            .order_by(self.model.start_id)
+        )
+
+    def save_chunk(
+        self,
+        chat_id: int,
+        start_id: int,
+        end_id: int,
+        message_count: int,
+        summary: str,
+        platform: str = "telegram",
+    ) -> None:
+        # Dois /tldr simultâneos podem selar a mesma janela: fica o primeiro
+        self.model.insert(
+            chat_id=chat_id,
+            platform=platform,
+            start_id=start_id,
+            end_id=end_id,
+            message_count=message_count,
+            summary=summary,
+        ).on_conflict_ignore().execute()
@@ -0,0 +1,53 @@
+from datetime import datetime
+from typing import Optional
+
+from ..entities.llm_response import LlmResponseEntity
+from ..models import LlmCacheStats, LlmResponseCache
+from .base import LruRepository
+
+
+class LlmCacheRepository(LruRepository[LlmResponseCache]):
+    def __init__(self):
+        super().__init__(LlmResponseCache)
+
+    def get_fresh(self, key: str) -> Optional[LlmResponseCache]:
+        return self.model.get_or_none(
+            (self.model.key == key) & (self.model.expires_at > datetime.now())
+        )
+
+    def touch(self, key: str) -> None:
+        self.model.update(
+            last_used_at=datetime.now(), hits=self.model.hits + 1
+        ).where(self.model.key == key).execute()
+
+    def upsert(self, entity: LlmResponseEntity) -> None:
+        now = datetime.now()
+        self.model.insert(
+            key=entity.key,
+            kind=entity.kind,
+            model=entity.model,
+            text=entity.text,
+            size=len(entity.text.encode("utf-8")),
+            created_at=entity.created_at or now,
+            expires_at=entity.expires_at,
+            last_used_at=now,
+        ).on_conflict_replace().execute()
+
+    def delete_expired(self) -> int:
+        return self.model.delete().where(self.model.expires_at <= datetime.now()).execute()
+
+    def record_lookup(self, kind: str, hit: bool) -> None:
+        """Soma um acerto ou falha ao contador do tipo, sem ler antes."""
+        LlmCacheStats.insert(
+            kind=kind, hits=int(hit), misses=int(not hit), updated_at=datetime.now()
+        ).on_conflict(
+            conflict_target=[LlmCacheStats.kind],
+            update={
+                LlmCacheStats.hits: LlmCacheStats.hits + int(hit),
+                LlmCacheStats.misses: LlmCacheStats.misses + int(not hit),
+                LlmCacheStats.updated_at: datetime.now(),
+            },
+        ).execute()
+
+    def lookup_stats(self) -> dict[str, tuple[int, int]]:
+        return {row.kind: (row.hits, row.misses) for row in LlmCacheStats.select()}
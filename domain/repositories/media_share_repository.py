@@ -0,0 +1,42 @@
+from datetime import datetime
+from typing import Iterator, Optional
+
+from ..models import MediaShare
+from ..entities.media_share import MediaShareEntity
+from .base import BaseRepository
+
+
+class MediaShareRepository(BaseRepository[MediaShare]):
+    def __init__(self):
+        super().__init__(MediaShare)
+
+    def create_share(self, entity: MediaShareEntity) -> MediaShare:
+        return self.create(
+            link=entity.link,
+            canonical_link=entity.canonical_link,
+            sender=entity.sender,
+            chat_id=entity.chat_id,
+            created_at=entity.created_at,
+        )
+
+    def get_shares(
+        self, canonical_link: str, chat_id: int, limit: int = 5
+    ) -> list[MediaShare]:
+        return list(
+            self.model.select()
+            .where(
+                (self.model.chat_id == chat_id)
+                & (self.model.canonical_link == canonical_link)
+            )
+            .order_by(self.model.created_at.asc())
+            .limit(limit)
+        )
+
+    def iter_recent(
+        self, chat_id: int, since: Optional[datetime] = None
+    ) -> Iterator[MediaShare]:
+        query = self.model.select().where(self.model.chat_id == chat_id)
+        if since:
+            query = query.where(self.model.created_at >= since)
+        # iterator() não guarda as linhas no cache da query
+        return query.order_by(self.model.created_at.desc()).iterator()
@@ -20,6 +20,21 @@ class MessageRepository(BaseRepository[Message]):
         except Message.DoesNotExist:
             return None
 
+    def get_chat_message(
+        self, chat_id: int, platform_message_id: int, platform: str = "telegram"
+    ) -> Optional[Message]:
+        # ids do Telegram só são únicos dentro do chat; o último salvo vence
+        return (
+            self.model.select()
+            .where(
+                (self.model.chat_id == chat_id)
+                & (self.model.platform_message_id == platform_message_id)
+                & (self.model.platform == platform)
+            )
+            .order_by(self.model.id.desc())
+            .first()
+        )
+
     def create_message(self, entity: MessageEntity) -> Message:
         return self.create(
             platform=entity.platform,
@@ -92,6 +107,15 @@ class MessageRepository(BaseRepository[Message]):
             return True
         return False
 
+    def update_chat_message_text(
+        self, chat_id: int, platform_message_id: int, text: str, platform: str = "telegram"
+    ) -> bool:
+        message = self.get_chat_message(chat_id, platform_message_id, platform)
+        if message:
+            self.update(message, text=text)
+            return True
+        return False
+
     def delete_by_platform_message_id(
         self, platform_message_id: int, platform: str = "telegram"
     ) -> bool:
@@ -0,0 +1,70 @@
+import math
+
+from ..models import QuotaBucket, db
+from .base import BaseRepository
+
+# (chave, capacidade, fichas por segundo)
+BucketSpec = tuple[str, float, float]
+
+
+class QuotaRepository(BaseRepository[QuotaBucket]):
+    def __init__(self):
+        super().__init__(QuotaBucket)
+
+    def _refilled(self, spec: BucketSpec, now: float) -> QuotaBucket:
+        """Bucket com as fichas repostas até ``now`` (criado cheio se novo)."""
+        key, capacity, rate = spec
+        bucket = self.model.get_or_none(self.model.key == key)
+        if bucket is None:
+            return self.model(
+                key=key, capacity=capacity, refill_rate=rate, tokens=capacity, refilled_at=now
+            )
+        # limites mudados na configuração valem a partir de agora
+        bucket.capacity, bucket.refill_rate = capacity, rate
+        elapsed = max(0.0, now - bucket.refilled_at)
+        bucket.tokens = min(capacity, bucket.tokens + elapsed * rate)
+        bucket.refilled_at = now
+        return bucket
+
+    @staticmethod
+    def _wait(bucket: QuotaBucket, amount: float) -> float:
+        if amount <= bucket.tokens:
+            return 0.0
+        if amount > bucket.capacity or bucket.refill_rate <= 0:
+            return math.inf
+        return (amount - bucket.tokens) / bucket.refill_rate
+
+    def take(self, specs: list[BucketSpec], amount: float, now: float) -> float:
+        """Tira ``amount`` fichas de todos os buckets, ou de nenhum.
+
+        Returns 0 when granted, otherwise the seconds until all buckets have
+        enough. ``BEGIN IMMEDIATE`` takes the write lock before reading, so
+        concurrent processes see each other's reservations.
+        """
+        with db.atomic("IMMEDIATE"):
+            buckets = [self._refilled(spec, now) for spec in specs]
+            wait = max((self._wait(bucket, amount) for bucket in buckets), default=0.0)
+            for bucket in buckets:
+                if wait == 0:
+                    bucket.tokens -= amount
+                    bucket.granted += 1
+                else:
+                    bucket.denied += 1
+                if bucket.id is None:
+                    bucket.save(force_insert=True)
+                else:
+                    bucket.save()
+        return wait
+
+    def peek(self, specs: list[BucketSpec], amount: float, now: float) -> tuple[float, float]:
+        """Fichas disponíveis (no bucket mais vazio) e a espera por ``amount``."""
+        buckets = [self._refilled(spec, now) for spec in specs]
+        if not buckets:
+            return math.inf, 0.0
+        return (
+            min(bucket.tokens for bucket in buckets),
+            max(self._wait(bucket, amount) for bucket in buckets),
+        )
+
+    def all(self) -> list[QuotaBucket]:
+        return list(self.model.select().order_by(self.model.key))
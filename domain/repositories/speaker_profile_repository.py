@@ -0,0 +1,56 @@
+from datetime import datetime
+from typing import Optional
+
+from ..models import SpeakerModelQuality, SpeakerProfile, db
+from .base import BaseRepository
+
+
+class SpeakerProfileRepository(BaseRepository[SpeakerProfile]):
+    def __init__(self):
+        super().__init__(SpeakerProfile)
+
+    def get_profile(self, chat_id: int, user_id: int) -> Optional[SpeakerProfile]:
+        return self.model.get_or_none(
+            (self.model.chat_id == chat_id) & (self.model.user_id == user_id)
+        )
+
+    def get_model_quality(
+        self, chat_id: int, user_id: int
+    ) -> dict[str, SpeakerModelQuality]:
+        rows = SpeakerModelQuality.select().where(
+            (SpeakerModelQuality.chat_id == chat_id)
+            & (SpeakerModelQuality.user_id == user_id)
+        )
+        return {row.model_size: row for row in rows}
+
+    def save_sample(
+        self,
+        chat_id: int,
+        user_id: int,
+        language: Optional[str],
+        language_streak: int,
+        model_size: str,
+        avg_logprob: float,
+        weight: float,
+    ) -> None:
+        """Atualiza idioma e a média móvel de qualidade do modelo numa transação."""
+        now = datetime.now()
+        with db.atomic():
+            profile, _ = self.model.get_or_create(chat_id=chat_id, user_id=user_id)
+            profile.language = language
+            profile.language_streak = language_streak
+            profile.samples += 1
+            profile.updated_at = now
+            profile.save()
+
+            quality, created = SpeakerModelQuality.get_or_create(
+                chat_id=chat_id,
+                user_id=user_id,
+                model_size=model_size,
+                defaults={"avg_logprob": avg_logprob},
+            )
+            if not created:
+                quality.avg_logprob += weight * (avg_logprob - quality.avg_logprob)
+            quality.samples += 1
+            quality.updated_at = now
+            quality.save()
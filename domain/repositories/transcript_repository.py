@@ -0,0 +1,32 @@
+from datetime import datetime
+from typing import Optional
+
+from ..models import TranscriptCache
+from ..entities.transcript import TranscriptEntity
+from .base import LruRepository
+
+
+class TranscriptRepository(LruRepository[TranscriptCache]):
+    def __init__(self):
+        super().__init__(TranscriptCache)
+
+    def get_by_key(self, key: str) -> Optional[TranscriptCache]:
+        return self.model.get_or_none(self.model.key == key)
+
+    def touch(self, key: str) -> None:
+        self.model.update(
+            last_used_at=datetime.now(), hits=self.model.hits + 1
+        ).where(self.model.key == key).execute()
+
+    def upsert(self, entity: TranscriptEntity) -> None:
+        now = datetime.now()
+        self.model.insert(
+            key=entity.key,
+            text=entity.text,
+            language=entity.language,
+            title=entity.title,
+            origin=entity.origin,
+            size=len(entity.text.encode("utf-8")),
+            created_at=entity.created_at or now,
+            last_used_at=now,
+        ).on_conflict_replace().execute()
@@ -1,7 +1,20 @@
+from .chat_summary_service import ChatSummaryService, compact_messages
 from .feature_service import FeatureService
+from .llm_cache_service import LlmCacheService
+from .media_share_service import MediaShareService
 from .message_service import MessageService
+from .quota_service import QuotaService
+from .speaker_profile_service import SpeakerProfileService
+from .transcript_service import TranscriptService
 
 __all__ = [
+    "ChatSummaryService",
     "FeatureService",
+    "LlmCacheService",
+    "MediaShareService",
     "MessageService",
+    "QuotaService",
+    "SpeakerProfileService",
+    "TranscriptService",
+    "compact_messages",
 ]
@@ -0,0 +1,184 @@
+import logging
+import re
+from typing import Iterable, Optional
+
+from ..entities.chat_summary import TldrSegment
+from ..repositories.chat_summary_repository import ChatSummaryRepository
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 50
+
+# Mídia sem legenda (ver catch_all._get_message_text): só diz que algo foi
+# enviado. Áudios e documentos têm título/nome e ficam.
+_PLACEHOLDER = re.compile(r"^\[(Sticker|Photo|GIF|Video|Video Note|Voice)(: [^\]]*)?\]$")
+# Mensagens de status/erro do próprio bot não dizem nada sobre a conversa
+_BOT_TYPES = {"status", "error"}
+
+
+def _line(row) -> Optional[str]:
+    text = (row.text or "").strip()
+    if not text:
+        return None
+    return f"{row.from_user or 'Unknown'}: {text}"
+
+
+def compact_messages(rows: Iterable) -> list[str]:
+    """Linhas "remetente: texto" enxutas para prompts de histórico de chat.
+
+    Bot status/error rows and commands are dropped, consecutive messages
+    from one sender are merged into a single line, and caption-less media
+    placeholders only survive as a count when the sender sent nothing else.
+    """
+    lines: list[str] = []
+    sender, texts, media = None, [], 0
+
+    def flush() -> None:
+        if sender is None:
+            return
+        if texts:
+            lines.append(f"{sender}: {' / '.join(texts)}")
+        elif media:
+            lines.append(f"{sender}: [{media} mídia{'s' if media > 1 else ''}]")
+
+    for row in rows:
+        text = " ".join((row.text or "").split())
+        if not text or text.startswith("/"):
+            continue
+        if getattr(row, "message_type", None) in _BOT_TYPES:
+            continue
+        name = row.from_user or "Unknown"
+        if name != sender:
+            flush()
+            sender, texts, media = name, [], 0
+        if _PLACEHOLDER.match(text):
+            media += 1
+        else:
+            texts.append(text)
+    flush()
+    return lines
+
+
+class ChatSummaryService:
+    """Resumos incrementais por chat para o /tldr.
+
+    Messages are grouped in fixed windows of ``chunk_size`` ids whose
+    summaries are stored once and reused. ``plan`` splits the last N
+    messages into stored chunks, full windows still to be summarized
+    (``seal``) and the raw remainder. New windows grow forward from the
+    newest stored chunk, and backward from the oldest one when a larger N
+    reaches further back, so chunks never overlap.
+    """
+
+    def __init__(
+        self,
+        repository: Optional[ChatSummaryRepository] = None,
+        chunk_size: int = CHUNK_SIZE,
+    ):
+        self.repository = repository or ChatSummaryRepository()
+        self.chunk_size = chunk_size
+
+    def plan(
+        self,
+        chat_id: int,
+        limit: int,
+        platform: str = "telegram",
+        exclude_platform_message_id: Optional[int] = None,
+    ) -> list[TldrSegment]:
+        rows = self.repository.get_window(
+            chat_id, limit, platform, exclude_platform_message_id
+        )
+        if not rows:
+            return []
+        first_id, last_id = rows[0].id, rows[-1].id
+        chunks = self.repository.get_chunks(chat_id, first_id, last_id, platform)
+
+        segments: list[TldrSegment] = []
+        gap: list = []
+        # linhas de um chunk que sai da janela: ficam cruas e não podem ser seladas
+        straddled: list = []
+        after_chunk = False
+        appended = None
+        index = 0
+        for row in rows:
+            while index < len(chunks) and chunks[index].end_id < row.id:
+                index += 1
+            chunk = chunks[index] if index < len(chunks) else None
+            if chunk is None or row.id < chunk.start_id:
+                self._flush_raw(segments, straddled)
+                straddled = []
+                gap.append(row)
+                continue
+            self._flush(segments, gap, backward=not after_chunk)
+            gap = []
+            after_chunk = True
+            if chunk.start_id < first_id or chunk.end_id > last_id:
+                straddled.append(row)
+            elif chunk is not appended:
+                self._flush_raw(segments, straddled)
+                straddled = []
+                segments.append(
+                    TldrSegment(
+                        start_id=chunk.start_id,
+                        end_id=chunk.end_id,
+                        message_count=chunk.message_count,
+                        summary=chunk.summary,
+                    )
+                )
+                appended = chunk
+        self._flush_raw(segments, straddled)
+        self._flush(segments, gap, backward=False)
+        return segments
+
+    def _flush_raw(self, segments: list[TldrSegment], rows: list) -> None:
+        if rows:
+            segments.append(self._segment(rows))
+
+    def _flush(self, segments: list[TldrSegment], rows: list, backward: bool) -> None:
+        """Divide uma lacuna em janelas completas (a selar) e um resto cru.
+
+        Before the oldest chunk the windows end at it, so the raw rest is
+        at the old end; everywhere else they start right after the
+        previous chunk and the rest is the newest messages.
+        """
+        if not rows:
+            return
+        size = self.chunk_size
+        rest = len(rows) % size
+        if backward and rest:
+            segments.append(self._segment(rows[:rest]))
+            rows = rows[rest:]
+        full = len(rows) - len(rows) % size
+        for start in range(0, full, size):
+            segments.append(self._segment(rows[start:start + size], seal=True))
+        if full < len(rows):
+            segments.append(self._segment(rows[full:]))
+
+    @staticmethod
+    def _segment(rows: list, seal: bool = False) -> TldrSegment:
+        return TldrSegment(
+            start_id=rows[0].id,
+            end_id=rows[-1].id,
+            message_count=len(rows),
+            lines=compact_messages(rows),
+            raw_lines=[line for line in map(_line, rows) if line],
+            seal=seal,
+        )
+
+    def save_chunk(
+        self, chat_id: int, segment: TldrSegment, platform: str = "telegram"
+    ) -> bool:
+        """Guarda o resumo de uma janela selada."""
+        try:
+            self.repository.save_chunk(
+                chat_id,
+                segment.start_id,
+                segment.end_id,
+                segment.message_count,
+                segment.summary or "",
+                platform,
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Failed to save chat summary chunk: {e}", exc_info=True)
+            return False
@@ -0,0 +1,86 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from ..entities.llm_response import LlmResponseEntity
+from ..repositories.llm_cache_repository import LlmCacheRepository
+
+logger = logging.getLogger(__name__)
+
+MAX_ENTRIES = 2000
+MAX_BYTES = 10 * 1024 * 1024
+
+
+class LlmCacheService:
+    """Cache persistente de respostas de LLM, com TTL e despejo LRU.
+
+    Lookups are counted per kind in SQLite, so the hit rate covers every
+    process sharing the database.
+    """
+
+    def __init__(
+        self,
+        repository: Optional[LlmCacheRepository] = None,
+        max_entries: int = MAX_ENTRIES,
+        max_bytes: int = MAX_BYTES,
+    ):
+        self.repository = repository or LlmCacheRepository()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+    def get(self, key: str, kind: str) -> Optional[LlmResponseEntity]:
+        try:
+            cached = self.repository.get_fresh(key)
+            self.repository.record_lookup(kind, cached is not None)
+            if not cached:
+                return None
+            self.repository.touch(key)
+            return LlmResponseEntity(
+                key=cached.key,
+                kind=cached.kind,
+                text=cached.text,
+                model=cached.model,
+                created_at=cached.created_at,
+                expires_at=cached.expires_at,
+            )
+        except Exception as e:
+            logger.error(f"Failed to read LLM cache: {e}", exc_info=True)
+            return None
+
+    def put(
+        self, key: str, kind: str, text: str, ttl: float, model: Optional[str] = None
+    ) -> bool:
+        """Guarda a resposta por ``ttl`` segundos."""
+        try:
+            self.repository.upsert(
+                LlmResponseEntity(
+                    key=key,
+                    kind=kind,
+                    text=text,
+                    model=model,
+                    expires_at=datetime.now() + timedelta(seconds=ttl),
+                )
+            )
+            self.repository.delete_expired()
+            self.repository.evict_lru(self.max_entries, self.max_bytes)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to save LLM cache: {e}", exc_info=True)
+            return False
+
+    def metrics(self) -> dict:
+        """Entradas, bytes e taxa de acerto por tipo."""
+        try:
+            entries, size = self.repository.usage()
+            kinds = {}
+            for kind, (hits, misses) in self.repository.lookup_stats().items():
+                total = hits + misses
+                kinds[kind] = {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_rate": round(hits / total, 3) if total else 0.0,
+                }
+            return {"entries": entries, "bytes": size, "kinds": kinds}
+        except Exception as e:
+            logger.error(f"Failed to read LLM cache metrics: {e}", exc_info=True)
+            return {}
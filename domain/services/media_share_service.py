@@ -0,0 +1,55 @@
+import logging
+from datetime import datetime
+from typing import Iterator, Optional
+
+from ..entities.media_share import MediaShareEntity
+from ..links import canonicalize_link
+from ..repositories.media_share_repository import MediaShareRepository
+
+logger = logging.getLogger(__name__)
+
+
+class MediaShareService:
+    def __init__(self, repository: Optional[MediaShareRepository] = None):
+        self.repository = repository or MediaShareRepository()
+
+    @staticmethod
+    def _to_entity(share) -> MediaShareEntity:
+        return MediaShareEntity(
+            link=share.link,
+            canonical_link=share.canonical_link,
+            sender=share.sender,
+            chat_id=share.chat_id,
+            created_at=share.created_at,
+        )
+
+    def record_share(self, link: str, sender: str, chat_id: int) -> bool:
+        entity = MediaShareEntity(
+            link=link,
+            canonical_link=canonicalize_link(link),
+            sender=sender,
+            chat_id=chat_id,
+            created_at=datetime.now(),
+        )
+        try:
+            self.repository.create_share(entity)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to save media share: {e}", exc_info=True)
+            return False
+
+    def get_previous_shares(
+        self, link: str, chat_id: int, limit: int = 5
+    ) -> list[MediaShareEntity]:
+        """Quem já enviou este link no chat e quando, do mais antigo ao mais novo."""
+        shares = self.repository.get_shares(
+            canonicalize_link(link), chat_id=chat_id, limit=limit
+        )
+        return [self._to_entity(share) for share in shares]
+
+    def iter_recent_shares(
+        self, chat_id: int, since: Optional[datetime] = None
+    ) -> Iterator[MediaShareEntity]:
+        """Percorre os envios recentes sem carregar todos em memória."""
+        for share in self.repository.iter_recent(chat_id=chat_id, since=since):
+            yield self._to_entity(share)
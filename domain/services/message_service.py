@@ -62,6 +62,27 @@ class MessageService:
             )
         return None
 
+    def get_chat_message(
+        self, chat_id: int, platform_message_id: int, platform: str = "telegram"
+    ) -> Optional[MessageEntity]:
+        message = self.repository.get_chat_message(
+            chat_id=chat_id, platform_message_id=platform_message_id, platform=platform
+        )
+        if message:
+            return MessageEntity(
+                platform=message.platform,
+                platform_message_id=message.platform_message_id,
+                text=message.text,
+                chat_id=message.chat_id,
+                from_user=message.from_user,
+                to_user=message.to_user,
+                reply_to_message_id=message.reply_to_message_id,
+                reply_text=message.reply_text,
+                message_type=message.message_type,
+                created_at=message.created_at,
+            )
+        return None
+
     def get_last_messages(
         self,
         chat_id: int,
@@ -126,6 +147,16 @@ class MessageService:
             platform_message_id=platform_message_id, text=text, platform=platform
         )
 
+    def update_chat_message_text(
+        self, chat_id: int, platform_message_id: int, text: str, platform: str = "telegram"
+    ) -> bool:
+        return self.repository.update_chat_message_text(
+            chat_id=chat_id,
+            platform_message_id=platform_message_id,
+            text=text,
+            platform=platform,
+        )
+
     def add_telegram_message(
         self,
         telegram_message_id: int,
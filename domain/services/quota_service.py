@@ -0,0 +1,58 @@
+import logging
+import time
+from typing import Optional
+
+from ..repositories.quota_repository import BucketSpec, QuotaRepository
+
+logger = logging.getLogger(__name__)
+
+
+class QuotaService:
+    """Cotas de providers em token buckets no SQLite.
+
+    Every process sharing the database draws from the same buckets, so a
+    quota holds across the Telegram, Discord and Steam bots. Database
+    errors fail open: a broken quota table should not stop the bots.
+    """
+
+    def __init__(self, repository: Optional[QuotaRepository] = None):
+        self.repository = repository or QuotaRepository()
+
+    def take(self, specs: list[BucketSpec], amount: float = 1) -> float:
+        """0 se reservou ``amount`` em todos os buckets, senão a espera em segundos."""
+        try:
+            return self.repository.take(specs, amount, time.time())
+        except Exception as e:
+            logger.error(f"Failed to take quota: {e}", exc_info=True)
+            return 0.0
+
+    def peek(self, specs: list[BucketSpec], amount: float = 1) -> tuple[float, float]:
+        """Fichas disponíveis e a espera por ``amount``, sem reservar nada."""
+        try:
+            return self.repository.peek(specs, amount, time.time())
+        except Exception as e:
+            logger.error(f"Failed to read quota: {e}", exc_info=True)
+            return float("inf"), 0.0
+
+    def usage(self) -> dict:
+        """Fichas, capacidade, concessões e recusas de cada bucket."""
+        try:
+            now = time.time()
+            return {
+                bucket.key: {
+                    "available": round(
+                        min(
+                            bucket.capacity,
+                            bucket.tokens + (now - bucket.refilled_at) * bucket.refill_rate,
+                        ),
+                        2,
+                    ),
+                    "capacity": bucket.capacity,
+                    "granted": bucket.granted,
+                    "denied": bucket.denied,
+                }
+                for bucket in self.repository.all()
+            }
+        except Exception as e:
+            logger.error(f"Failed to read quota usage: {e}", exc_info=True)
+            return {}
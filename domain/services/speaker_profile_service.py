@@ -0,0 +1,101 @@
+import logging
+from typing import Optional, Sequence
+
+from ..entities.speaker_profile import SpeakerProfileEntity
+from ..repositories.speaker_profile_repository import SpeakerProfileRepository
+
+logger = logging.getLogger(__name__)
+
+# Detecções seguidas e confiantes do mesmo idioma antes de fixá-lo
+LANGUAGE_PIN_STREAK = 3
+LANGUAGE_CONFIDENCE = 0.8
+# avg_logprob médio mínimo para um modelo ser "bom o bastante" para o falante
+QUALITY_LOGPROB = -0.8
+MIN_MODEL_SAMPLES = 3
+EWMA_WEIGHT = 0.3
+
+
+class SpeakerProfileService:
+    """Learns each speaker's language and the smallest adequate whisper model.
+
+    The language is pinned after a streak of confident detections and
+    unpinned when a pinned transcription scores below the quality bar.
+    Models are checked smallest first and the first one whose running
+    quality is above the bar wins; an untested model is only tried once a
+    larger one has ``MIN_MODEL_SAMPLES`` samples above the bar.
+    """
+
+    def __init__(self, repository: Optional[SpeakerProfileRepository] = None):
+        self.repository = repository or SpeakerProfileRepository()
+
+    def get_profile(
+        self, chat_id: int, user_id: int, model_sizes: Sequence[str]
+    ) -> SpeakerProfileEntity:
+        """``model_sizes`` are the candidate models, from smallest to largest."""
+        entity = SpeakerProfileEntity(chat_id=chat_id, user_id=user_id)
+        try:
+            profile = self.repository.get_profile(chat_id, user_id)
+            if profile and profile.language_streak >= LANGUAGE_PIN_STREAK:
+                entity.language = profile.language
+            entity.model_size = self._pick_model(
+                self.repository.get_model_quality(chat_id, user_id), model_sizes
+            )
+        except Exception as e:
+            logger.error(f"Failed to read speaker profile: {e}", exc_info=True)
+        return entity
+
+    @staticmethod
+    def _proven(stats) -> bool:
+        return (
+            stats is not None
+            and stats.samples >= MIN_MODEL_SAMPLES
+            and stats.avg_logprob >= QUALITY_LOGPROB
+        )
+
+    def _pick_model(self, quality: dict, model_sizes: Sequence[str]) -> Optional[str]:
+        for index, model_size in enumerate(model_sizes):
+            stats = quality.get(model_size)
+            if stats is None:
+                if any(self._proven(quality.get(size)) for size in model_sizes[index + 1:]):
+                    return model_size
+            elif stats.avg_logprob >= QUALITY_LOGPROB:
+                return model_size
+        return None
+
+    def record(
+        self,
+        chat_id: int,
+        user_id: int,
+        model_size: str,
+        language: Optional[str],
+        language_probability: float,
+        avg_logprob: float,
+        pinned: bool = False,
+    ) -> bool:
+        """Registra uma transcrição local do falante."""
+        try:
+            profile = self.repository.get_profile(chat_id, user_id)
+            streak = profile.language_streak if profile else 0
+            current = profile.language if profile else None
+
+            if pinned and avg_logprob < QUALITY_LOGPROB:
+                # Idioma fixado e transcrição ruim: talvez ele tenha mudado
+                language, streak = current, 0
+            elif language_probability >= LANGUAGE_CONFIDENCE:
+                streak = streak + 1 if language == current else 1
+            else:
+                language = current
+
+            self.repository.save_sample(
+                chat_id,
+                user_id,
+                language,
+                streak,
+                model_size,
+                avg_logprob,
+                EWMA_WEIGHT,
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Failed to save speaker profile: {e}", exc_info=True)
+            return False
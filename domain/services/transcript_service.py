@@ -0,0 +1,68 @@
+import logging
+from typing import Iterable, Optional
+
+from ..entities.transcript import TranscriptEntity
+from ..repositories.transcript_repository import TranscriptRepository
+
+logger = logging.getLogger(__name__)
+
+MAX_ENTRIES = 5000
+MAX_BYTES = 20 * 1024 * 1024
+
+
+class TranscriptService:
+    """Cache persistente de transcrições, com despejo LRU por quantidade e tamanho."""
+
+    def __init__(
+        self,
+        repository: Optional[TranscriptRepository] = None,
+        max_entries: int = MAX_ENTRIES,
+        max_bytes: int = MAX_BYTES,
+    ):
+        self.repository = repository or TranscriptRepository()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+    def get(self, key: str) -> Optional[TranscriptEntity]:
+        try:
+            cached = self.repository.get_by_key(key)
+            if not cached:
+                return None
+            self.repository.touch(key)
+            return TranscriptEntity(
+                key=cached.key,
+                text=cached.text,
+                language=cached.language,
+                title=cached.title,
+                origin=cached.origin,
+                created_at=cached.created_at,
+            )
+        except Exception as e:
+            logger.error(f"Failed to read transcript cache: {e}", exc_info=True)
+            return None
+
+    def put(
+        self,
+        keys: Iterable[str],
+        text: str,
+        language: Optional[str] = None,
+        title: Optional[str] = None,
+        origin: Optional[str] = None,
+    ) -> bool:
+        """Guarda a mesma transcrição sob todas as chaves que identificam a mídia."""
+        try:
+            for key in keys:
+                self.repository.upsert(
+                    TranscriptEntity(
+                        key=key,
+                        text=text,
+                        language=language,
+                        title=title,
+                        origin=origin,
+                    )
+                )
+            self.repository.evict_lru(self.max_entries, self.max_bytes)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to save transcript cache: {e}", exc_info=True)
+            return False
@@ -0,0 +1,110 @@
+import asyncio
+import hashlib
+import logging
+import unicodedata
+from contextlib import aclosing
+from typing import AsyncIterator, Callable, Optional
+
+from domain import LlmCacheService, canonicalize_link
+
+from .config import (
+    LLM_CACHE_MAX_BYTES,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_TTL,
+    LLM_RESUME_CACHE_TTL,
+)
+
+logger = logging.getLogger(__name__)
+
+CHAT = "chat"
+RESUME = "resume"
+
+
+def normalize_prompt(text: str) -> str:
+    """NFKC, caixa e espaços normalizados: variações triviais caem na mesma chave."""
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def prompt_key(prompt: str, model: str, system_prompt: str = "") -> str:
+    """Chave de uma pergunta: prompt e system prompt normalizados, mais o modelo."""
+    return f"{CHAT}:" + _digest(
+        model, normalize_prompt(system_prompt), normalize_prompt(prompt)
+    )
+
+
+def content_key(url: str, content: str, model: str, instructions: str = "") -> str:
+    """Chave de um resumo: link canônico e hash do conteúdo extraído dele.
+
+    The same video shared with different tracking parameters or short links
+    hits the same entry, while a page whose content changed misses.
+    """
+    content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    return f"{RESUME}:" + _digest(
+        canonicalize_link(url), content_hash, model, normalize_prompt(instructions)
+    )
+
+
+class ResponseCache:
+    """Cache de respostas de LLM no SQLite, compartilhado entre os serviços.
+
+    Lookups and writes run in a worker thread so the event loop is not
+    blocked on the database. Only complete answers are stored: a stream
+    that fails or is closed early leaves nothing behind.
+    """
+
+    TTLS = {CHAT: LLM_CACHE_TTL, RESUME: LLM_RESUME_CACHE_TTL}
+
+    def __init__(self, service: Optional[LlmCacheService] = None):
+        self.service = service or LlmCacheService(
+            max_entries=LLM_CACHE_MAX_ENTRIES, max_bytes=LLM_CACHE_MAX_BYTES
+        )
+
+    async def aget(self, key: str, kind: str) -> Optional[str]:
+        cached = await asyncio.to_thread(self.service.get, key, kind)
+        if cached is None:
+            return None
+        logger.info(f"LLM cache hit ({kind}, {cached.model})")
+        return cached.text
+
+    async def aput(
+        self,
+        key: str,
+        kind: str,
+        text: str,
+        model: Optional[str] = None,
+        ttl: Optional[float] = None,
+    ) -> bool:
+        ttl = ttl if ttl is not None else self.TTLS.get(kind, LLM_CACHE_TTL)
+        return await asyncio.to_thread(self.service.put, key, kind, text, ttl, model)
+
+    async def astream(
+        self,
+        key: str,
+        kind: str,
+        stream: Callable[[], AsyncIterator[str]],
+        model: Optional[str] = None,
+        ttl: Optional[float] = None,
+    ) -> AsyncIterator[str]:
+        """Entrega a resposta guardada de uma vez, ou ``stream()`` guardando-a."""
+        cached = await self.aget(key, kind)
+        if cached is not None:
+            yield cached
+            return
+        parts = []
+        async with aclosing(stream()) as chunks:
+            async for piece in chunks:
+                parts.append(piece)
+                yield piece
+        text = "".join(parts)
+        if text.strip():
+            await self.aput(key, kind, text, model, ttl)
+
+    def metrics(self) -> dict:
+        return self.service.metrics()
+
+
+llm_cache = ResponseCache()
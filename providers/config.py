@@ -7,3 +7,68 @@ load_dotenv()
 ZAI_API_KEY = os.getenv("ZAI_API_KEY")
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 SERPAPI_API_KEY = os.getenv("SERPAPI_API_KEY")
+
+# Timeout (s) e retentativas das chamadas ao Groq
+GROQ_TIMEOUT = float(os.getenv("GROQ_TIMEOUT", "60"))
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "2"))
+
+ZAI_BASE_URL = os.getenv("ZAI_BASE_URL", "https://api.z.ai/api/coding/paas/v4")
+
+# Pool HTTP compartilhado por cliente de provider (ver providers/registry.py)
+PROVIDER_MAX_CONNECTIONS = int(os.getenv("PROVIDER_MAX_CONNECTIONS", "20"))
+PROVIDER_MAX_KEEPALIVE = int(os.getenv("PROVIDER_MAX_KEEPALIVE", "10"))
+
+# ZAI: timeout por tentativa e orçamento total com retentativas (s)
+ZAI_TIMEOUT = float(os.getenv("ZAI_TIMEOUT", "60"))
+ZAI_DEADLINE = float(os.getenv("ZAI_DEADLINE", "90"))
+ZAI_MAX_ATTEMPTS = int(os.getenv("ZAI_MAX_ATTEMPTS", "4"))
+
+# Roteamento ZAI/Groq (providers/router.py): o Groq é disparado em paralelo
+# quando a ZAI não responde em LLM_HEDGE_AFTER (ou no p90 recente, se menor)
+LLM_HEDGE_AFTER = float(os.getenv("LLM_HEDGE_AFTER", "8"))
+LLM_HEDGE_MIN = float(os.getenv("LLM_HEDGE_MIN", "1.5"))
+# Circuit breaker: abre com BREAKER_FAILURES falhas seguidas ou taxa de erro
+# acima de BREAKER_ERROR_RATE nas últimas BREAKER_WINDOW chamadas
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "3"))
+BREAKER_ERROR_RATE = float(os.getenv("BREAKER_ERROR_RATE", "0.5"))
+BREAKER_WINDOW = int(os.getenv("BREAKER_WINDOW", "20"))
+BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN", "30"))
+
+# Cache de respostas de LLM (providers/cache.py): validade em segundos
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(24 * 3600)))
+LLM_RESUME_CACHE_TTL = float(os.getenv("LLM_RESUME_CACHE_TTL", str(30 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2000"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(10 * 1024 * 1024)))
+
+# Contagem de tokens (providers/tokens.py): tokenizer.json ou nome no hub do
+# HuggingFace; sem ele os tokens são estimados pelo tamanho do texto
+TOKENIZER = os.getenv("TOKENIZER", "")
+# Tokenizer por modelo, opcional: de preferência um tokenizer.json local.
+# Um nome do hub (ex.: "unsloth/Llama-3.1-8B-Instruct", espelho do Llama 3.1)
+# é baixado na primeira contagem, durante uma requisição
+MODEL_TOKENIZERS = {
+    "llama-3.1-8b-instant": os.getenv("GROQ_TOKENIZER", ""),
+    "glm-4.7": os.getenv("ZAI_TOKENIZER", ""),
+}
+# Tokens por requisição (entrada + saída) de cada modelo; no plano gratuito
+# o Groq recusa requisições maiores que o limite de tokens por minuto
+MODEL_TOKEN_BUDGETS = {
+    "llama-3.1-8b-instant": int(os.getenv("GROQ_TOKEN_BUDGET", "6000")),
+    "glm-4.7": int(os.getenv("ZAI_TOKEN_BUDGET", "32000")),
+}
+# Map-reduce do /resume (providers/summarize.py): conteúdo acima de
+# RESUME_CHUNK_TOKENS é resumido em pedaços, no máximo RESUME_MAP_CONCURRENCY
+# chamadas ao mesmo tempo no processo todo
+RESUME_CHUNK_TOKENS = int(os.getenv("RESUME_CHUNK_TOKENS", "3000"))
+RESUME_MAP_CONCURRENCY = int(os.getenv("RESUME_MAP_CONCURRENCY", "4"))
+
+# Cotas por provider e modelo (providers/quota.py), em token buckets no
+# SQLite compartilhado: valem somando telegrambot, discordbot e steam
+ZAI_RPM = int(os.getenv("ZAI_RPM", "30"))
+GROQ_CHAT_RPM = int(os.getenv("GROQ_CHAT_RPM", "30"))
+GROQ_CHAT_RPD = int(os.getenv("GROQ_CHAT_RPD", "14400"))
+GROQ_TRANSCRIBE_RPM = int(os.getenv("GROQ_TRANSCRIBE_RPM", "20"))
+GROQ_TRANSCRIBE_RPD = int(os.getenv("GROQ_TRANSCRIBE_RPD", "2000"))
+SERPAPI_MONTHLY = int(os.getenv("SERPAPI_MONTHLY", "100"))
+# Espera máxima (s) por uma vaga na cota antes de desistir da chamada
+QUOTA_MAX_WAIT = float(os.getenv("QUOTA_MAX_WAIT", "5"))
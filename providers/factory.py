@@ -8,6 +8,45 @@ class RateLimitExceededError(Exception):
     pass
 
 
+class ProviderError(Exception):
+    """Falha de um provider de IA (resposta inválida ou erro da API)."""
+
+    # se vale a pena tentar de novo a mesma chamada
+    retryable = False
+
+
+class ProviderTimeoutError(ProviderError):
+    retryable = True
+
+
+class ProviderUnavailableError(ProviderError):
+    """Provider sem credenciais ou com credenciais recusadas."""
+
+
+class ProviderServerError(ProviderError):
+    """Erro 5xx ou de conexão, normalmente passageiro."""
+
+    retryable = True
+
+
+class ProviderRateLimitError(ProviderError, RateLimitExceededError):
+    retryable = True
+
+    def __init__(self, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QuotaExceededError(ProviderRateLimitError):
+    """Cota local esgotada: a chamada nem chegou ao provider.
+
+    Not retried, since the quota wait already happened, and not a backend
+    failure for the circuit breakers.
+    """
+
+    retryable = False
+
+
 class RateLimiter:
     def __init__(self, max_calls: int, time_window: int):
         self.max_calls = max_calls
@@ -16,17 +55,41 @@ class RateLimiter:
         self.lock = threading.Lock()
 
     def check(self):
+        if not self.try_acquire():
+            raise RateLimitExceededError(
+                f"Rate limit exceeded: {self.max_calls} calls per {self.time_window} seconds"
+            )
+
+    def try_acquire(self, calls: int = 1) -> bool:
+        """Reserva ``calls`` chamadas se couberem na janela, sem lançar exceção."""
         with self.lock:
             now = time.time()
-            while self.timestamps and (now - self.timestamps[0]) > self.time_window:
-                self.timestamps.popleft()
+            self._expire(now)
+            if len(self.timestamps) + calls > self.max_calls:
+                return False
+            self.timestamps.extend([now] * calls)
+            return True
+
+    def remaining(self) -> int:
+        with self.lock:
+            self._expire(time.time())
+            return self.max_calls - len(self.timestamps)
 
-            if len(self.timestamps) >= self.max_calls:
-                raise RateLimitExceededError(
-                    f"Rate limit exceeded: {self.max_calls} calls per {self.time_window} seconds"
-                )
+    def reset_in(self, calls: int = 1) -> float:
+        """Segundos até ``calls`` chamadas caberem na janela (0 se já cabem)."""
+        with self.lock:
+            now = time.time()
+            self._expire(now)
+            excess = len(self.timestamps) + calls - self.max_calls
+            if excess <= 0:
+                return 0.0
+            if calls > self.max_calls:
+                return float("inf")
+            return max(0.0, self.timestamps[excess - 1] + self.time_window - now)
 
-            self.timestamps.append(now)
+    def _expire(self, now: float) -> None:
+        while self.timestamps and (now - self.timestamps[0]) > self.time_window:
+            self.timestamps.popleft()
 
 
 class AiFactory(ABC):
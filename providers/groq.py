@@ -1,25 +1,92 @@
 import logging
+import os
+from typing import AsyncIterator, BinaryIO, Optional, Union
 
-from .factory import AiFactory
-from .config import GROQ_API_KEY
-from groq import Groq
+import groq
+import httpx
+from groq import AsyncGroq, Groq
+
+from .config import GROQ_API_KEY, GROQ_MAX_RETRIES, GROQ_TIMEOUT
+from .factory import (
+    AiFactory,
+    ProviderError,
+    ProviderRateLimitError,
+    ProviderServerError,
+    ProviderTimeoutError,
+    ProviderUnavailableError,
+)
+from .quota import GROQ, quotas
 
 logger = logging.getLogger(__name__)
 
+CHAT_MODEL = "llama-3.1-8b-instant"
+WHISPER_MODEL = "whisper-large-v3"
+CHAT_SYSTEM_PROMPT = "Você é uma IA em um grupo de amigos que responde perguntas de forma clara e concisa. Responda na linguagem que for perguntado e em html"
+
+
+def _retry_after(error: groq.APIStatusError) -> Optional[float]:
+    try:
+        return float(error.response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _provider_error(error: Exception) -> ProviderError:
+    """Traduz exceções do SDK do Groq para os erros dos providers."""
+    if isinstance(error, groq.APITimeoutError):
+        return ProviderTimeoutError(f"Groq timed out: {error}")
+    if isinstance(error, (groq.APIConnectionError, groq.InternalServerError)):
+        return ProviderServerError(f"Groq unreachable: {error}")
+    if isinstance(error, groq.RateLimitError):
+        return ProviderRateLimitError(
+            f"Groq rate limit: {error}", retry_after=_retry_after(error)
+        )
+    if not isinstance(error, groq.APIError) or isinstance(
+        error, (groq.AuthenticationError, groq.PermissionDeniedError)
+    ):
+        return ProviderUnavailableError(f"Groq rejected credentials: {error}")
+    return ProviderError(f"Groq error: {error}")
+
 
 class GroqProvider(AiFactory):
-    def __init__(self):
-        self.client = Groq(api_key=GROQ_API_KEY)
-        self.whisper_model = "whisper-large-v3"
+    def __init__(
+        self,
+        http_client: Optional[httpx.Client] = None,
+        async_http_client: Optional[httpx.AsyncClient] = None,
+    ):
+        self.client = Groq(api_key=GROQ_API_KEY, http_client=http_client)
+        self.whisper_model = WHISPER_MODEL
+        self.async_http_client = async_http_client
+        self._async_client: Optional[AsyncGroq] = None
+
+    @property
+    def async_client(self) -> AsyncGroq:
+        if self._async_client is None:
+            self._async_client = AsyncGroq(
+                api_key=GROQ_API_KEY,
+                timeout=GROQ_TIMEOUT,
+                max_retries=GROQ_MAX_RETRIES,
+                http_client=self.async_http_client,
+            )
+        return self._async_client
+
+    def close(self) -> None:
+        self.client.close()
+
+    async def aclose(self) -> None:
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+        self.close()
 
     def chat(self, prompt):
-        system = "Você é uma IA em um grupo de amigos que responde perguntas de forma clara e concisa. Responda na linguagem que for perguntado e em html"
-        return self.chat_with_system(system, prompt)
+        return self.chat_with_system(CHAT_SYSTEM_PROMPT, prompt)
 
     def chat_with_system(self, system_prompt, prompt):
         try:
+            quotas.check(GROQ, CHAT_MODEL)
             completion = self.client.chat.completions.create(
-                model="llama-3.1-8b-instant",
+                model=CHAT_MODEL,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": prompt}
@@ -33,6 +100,102 @@ class GroqProvider(AiFactory):
             logger.error(f"Groq API error: {e}")
             return None
 
+    async def achat(self, prompt: str) -> Optional[str]:
+        return await self.achat_with_system(CHAT_SYSTEM_PROMPT, prompt)
+
+    async def acomplete(self, system_prompt: str, prompt: str) -> str:
+        """Uma chamada de chat assíncrona; erros como ``ProviderError``."""
+        await quotas.acquire(GROQ, CHAT_MODEL)
+        try:
+            completion = await self.async_client.chat.completions.create(
+                model=CHAT_MODEL,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=1,
+                top_p=1,
+                stream=False,
+            )
+        except groq.GroqError as e:
+            raise _provider_error(e) from e
+        return completion.choices[0].message.content
+
+    async def astream(self, system_prompt: str, prompt: str) -> AsyncIterator[str]:
+        """Como ``acomplete``, mas entrega o texto em pedaços conforme chega."""
+        await quotas.acquire(GROQ, CHAT_MODEL)
+        try:
+            stream = await self.async_client.chat.completions.create(
+                model=CHAT_MODEL,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=1,
+                top_p=1,
+                stream=True,
+            )
+            try:
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                await stream.close()
+        except groq.GroqError as e:
+            raise _provider_error(e) from e
+
+    async def achat_with_system(self, system_prompt: str, prompt: str) -> Optional[str]:
+        """Versão assíncrona de ``chat_with_system``; None se falhar."""
+        try:
+            return await self.acomplete(system_prompt, prompt)
+        except ProviderError as e:
+            logger.error(f"Groq API error: {e}")
+            return None
+
+    def transcribe_audio_bytes(self, data: bytes, filename: str = "audio.wav"):
+        """Returns the verbose transcription (``.text``, ``.language``) or None."""
+        try:
+            return self.client.audio.transcriptions.create(
+                file=(filename, data),
+                model=self.whisper_model,
+                response_format="verbose_json",
+            )
+        except Exception as e:
+            logger.error(f"Groq transcription error: {e}")
+            return None
+
+    async def atranscribe_audio(
+        self,
+        audio: Union[str, BinaryIO],
+        filename: Optional[str] = None,
+        timeout: Optional[float] = None,
+        language: Optional[str] = None,
+    ):
+        """Transcreve sem bloquear o event loop; retorna o resultado verbose.
+
+        ``audio`` is a path or an open binary file; the file object is handed
+        to httpx as-is, so it is streamed in chunks instead of being read into
+        memory first. ``language`` (ISO-639-1) skips language detection.
+        Errors are raised as ``ProviderError`` subclasses and cancelling the
+        awaiting task aborts the request.
+        """
+        if isinstance(audio, str):
+            with open(audio, "rb") as f:
+                return await self.atranscribe_audio(
+                    f, filename or os.path.basename(audio), timeout, language
+                )
+
+        try:
+            return await self.async_client.audio.transcriptions.create(
+                file=(filename or getattr(audio, "name", "audio.ogg"), audio),
+                model=self.whisper_model,
+                response_format="verbose_json",
+                language=language or groq.NOT_GIVEN,
+                timeout=timeout if timeout is not None else GROQ_TIMEOUT,
+            )
+        except groq.GroqError as e:
+            raise _provider_error(e) from e
+
     def transcribe_audio(self, filename):
         try:
             with open(filename, "rb") as file:
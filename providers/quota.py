@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from domain import QuotaService
+
+from .config import (
+    GROQ_CHAT_RPD,
+    GROQ_CHAT_RPM,
+    GROQ_TRANSCRIBE_RPD,
+    GROQ_TRANSCRIBE_RPM,
+    QUOTA_MAX_WAIT,
+    SERPAPI_MONTHLY,
+    ZAI_RPM,
+)
+from .factory import QuotaExceededError, RateLimiter
+
+logger = logging.getLogger(__name__)
+
+ZAI = "zai"
+GROQ = "groq"
+SERPAPI = "serpapi"
+
+
+@dataclass(frozen=True)
+class QuotaLimit:
+    calls: int
+    # segundos para a cota inteira se repor
+    window: float
+
+
+# Por (provider, modelo); os nomes dos modelos são os usados nas chamadas
+QUOTAS: dict[tuple[str, str], list[QuotaLimit]] = {
+    (ZAI, "glm-4.7"): [QuotaLimit(ZAI_RPM, 60)],
+    (GROQ, "llama-3.1-8b-instant"): [
+        QuotaLimit(GROQ_CHAT_RPM, 60),
+        QuotaLimit(GROQ_CHAT_RPD, 86400),
+    ],
+    (GROQ, "whisper-large-v3"): [
+        QuotaLimit(GROQ_TRANSCRIBE_RPM, 60),
+        QuotaLimit(GROQ_TRANSCRIBE_RPD, 86400),
+    ],
+    (SERPAPI, "google_images"): [QuotaLimit(SERPAPI_MONTHLY, 30 * 86400)],
+}
+
+
+class SharedRateLimiter(RateLimiter):
+    """RateLimiter com a cota no SQLite, valendo para todos os processos.
+
+    Each limit is a token bucket of ``calls`` that refills over ``window``
+    seconds, stored under ``name:window``. A reservation takes from every
+    bucket or from none. ``check`` and ``try_acquire`` keep the
+    ``RateLimiter`` contract for sync callers; async callers use
+    ``atry_acquire`` or ``acquire``, which run the database work in a
+    thread and wait with ``asyncio.sleep``.
+    """
+
+    def __init__(
+        self, name: str, limits: list[QuotaLimit], service: Optional[QuotaService] = None
+    ):
+        super().__init__(limits[0].calls, int(limits[0].window))
+        self.name = name
+        self.limits = limits
+        self.service = service or QuotaService()
+        self.specs = [
+            (f"{name}:{int(limit.window)}", float(limit.calls), limit.calls / limit.window)
+            for limit in limits
+        ]
+
+    def _exceeded(self, wait: float) -> QuotaExceededError:
+        return QuotaExceededError(
+            f"Quota exceeded for {self.name}",
+            retry_after=None if math.isinf(wait) else wait,
+        )
+
+    def check(self) -> None:
+        wait = self.service.take(self.specs)
+        if wait:
+            raise self._exceeded(wait)
+
+    def try_acquire(self, calls: int = 1) -> bool:
+        return self.service.take(self.specs, calls) == 0
+
+    def remaining(self) -> int:
+        return int(self.service.peek(self.specs)[0])
+
+    def reset_in(self, calls: int = 1) -> float:
+        return self.service.peek(self.specs, calls)[1]
+
+    async def atry_acquire(self, calls: int = 1) -> bool:
+        return await asyncio.to_thread(self.try_acquire, calls)
+
+    async def acquire(self, calls: int = 1, timeout: Optional[float] = None) -> None:
+        """Espera a cota sem bloquear o event loop.
+
+        Raises ``QuotaExceededError`` when the wait would go past
+        ``timeout`` seconds (``timeout=0`` never waits). After sleeping it
+        tries again, since another process may have taken the slot.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = await asyncio.to_thread(self.service.take, self.specs, calls)
+            if not wait:
+                return
+            if math.isinf(wait) or (
+                deadline is not None and time.monotonic() + wait > deadline
+            ):
+                raise self._exceeded(wait)
+            await asyncio.sleep(wait)
+
+
+class QuotaManager:
+    """Limiters compartilhados por provider e modelo, com o uso de cada cota.
+
+    Pairs without a configured quota are not limited.
+    """
+
+    def __init__(
+        self,
+        quotas: Optional[dict[tuple[str, str], list[QuotaLimit]]] = None,
+        service: Optional[QuotaService] = None,
+    ):
+        self.service = service or QuotaService()
+        self.limiters = {
+            (provider, model): SharedRateLimiter(f"{provider}:{model}", limits, self.service)
+            for (provider, model), limits in (quotas if quotas is not None else QUOTAS).items()
+        }
+
+    def limiter(self, provider: str, model: str) -> Optional[SharedRateLimiter]:
+        return self.limiters.get((provider, model))
+
+    def check(self, provider: str, model: str) -> None:
+        """Reserva uma chamada ou lança ``QuotaExceededError`` na hora."""
+        limiter = self.limiter(provider, model)
+        if limiter is not None:
+            limiter.check()
+
+    def try_acquire(self, provider: str, model: str, calls: int = 1) -> bool:
+        limiter = self.limiter(provider, model)
+        return limiter is None or limiter.try_acquire(calls)
+
+    async def atry_acquire(self, provider: str, model: str, calls: int = 1) -> bool:
+        limiter = self.limiter(provider, model)
+        return limiter is None or await limiter.atry_acquire(calls)
+
+    async def acquire(
+        self,
+        provider: str,
+        model: str,
+        calls: int = 1,
+        timeout: Optional[float] = QUOTA_MAX_WAIT,
+    ) -> None:
+        limiter = self.limiter(provider, model)
+        if limiter is not None:
+            await limiter.acquire(calls, timeout)
+
+    def usage(self) -> dict:
+        return self.service.usage()
+
+
+quotas = QuotaManager()
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import threading
+
+import httpx
+
+from .config import PROVIDER_MAX_CONNECTIONS, PROVIDER_MAX_KEEPALIVE
+from .factory import ProviderUnavailableError
+from .groq import GroqProvider
+from .zai import ZAIProvider
+
+logger = logging.getLogger(__name__)
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=PROVIDER_MAX_CONNECTIONS,
+        max_keepalive_connections=PROVIDER_MAX_KEEPALIVE,
+        keepalive_expiry=60,
+    )
+
+
+def _close_pool(pool) -> None:
+    """Fecha um pool httpx, de dentro ou de fora do event loop."""
+    try:
+        if not isinstance(pool, httpx.AsyncClient):
+            pool.close()
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # thread sem loop (ex.: warm via to_thread): o pool nunca foi usado
+            asyncio.run(pool.aclose())
+            return
+        task = loop.create_task(pool.aclose())
+        _closing.add(task)
+        task.add_done_callback(_closing.discard)
+    except Exception as e:
+        logger.warning(f"Error closing HTTP pool: {e}")
+
+
+_closing: set[asyncio.Task] = set()
+
+
+class ProviderRegistry:
+    """Builds each provider client once per process and shares it.
+
+    Every SDK client gets its own pooled httpx client, so TLS connections
+    are reused across messages instead of being set up per call. Building
+    is lazy and thread-safe; ``warm`` does it (and opens the connections)
+    ahead of the first message, and ``aclose`` releases everything.
+    """
+
+    NAMES = ("groq", "zai")
+
+    def __init__(self):
+        self._providers: dict = {}
+        self._pools: dict[str, list] = {}
+        self._errors: dict[str, str] = {}
+        self._lock = threading.RLock()
+
+    def _build(self, name: str):
+        if name == "groq":
+            pools = [httpx.Client(limits=_limits()), httpx.AsyncClient(limits=_limits())]
+            build = lambda: GroqProvider(http_client=pools[0], async_http_client=pools[1])
+        elif name == "zai":
+            groq = self.groq()
+            pools = [httpx.Client(limits=_limits())]
+            build = lambda: ZAIProvider(groq=groq, http_client=pools[0])
+        else:
+            raise KeyError(name)
+        try:
+            provider = build()
+        except Exception:
+            for pool in pools:
+                _close_pool(pool)
+            raise
+        self._pools[name] = pools
+        return provider
+
+    def get(self, name: str):
+        provider = self._providers.get(name)
+        if provider is not None:
+            return provider
+        with self._lock:
+            provider = self._providers.get(name)
+            if provider is None:
+                try:
+                    provider = self._build(name)
+                except ProviderUnavailableError:
+                    raise
+                except Exception as e:
+                    self._errors[name] = str(e)
+                    raise ProviderUnavailableError(
+                        f"Could not build {name} client: {e}"
+                    ) from e
+                self._providers[name] = provider
+                self._errors.pop(name, None)
+            return provider
+
+    def groq(self) -> GroqProvider:
+        return self.get("groq")
+
+    def zai(self) -> ZAIProvider:
+        return self.get("zai")
+
+    async def warm(self) -> dict[str, bool]:
+        """Cria os clientes e abre uma conexão de cada pool antes do 1º uso."""
+        ready = {}
+        for name in self.NAMES:
+            try:
+                provider = await asyncio.to_thread(self.get, name)
+            except ProviderUnavailableError as e:
+                logger.warning(f"Provider {name} not available: {e}")
+                ready[name] = False
+                continue
+            ready[name] = True
+            await self._connect(name, str(provider.client.base_url))
+        return ready
+
+    async def _connect(self, name: str, base_url: str) -> None:
+        # Qualquer resposta serve: o objetivo é deixar TCP/TLS prontos no pool
+        try:
+            for pool in self._pools.get(name, []):
+                if isinstance(pool, httpx.AsyncClient):
+                    await pool.head(base_url)
+                else:
+                    await asyncio.to_thread(pool.head, base_url)
+        except httpx.HTTPError as e:
+            logger.warning(f"Could not pre-connect {name}: {e}")
+
+    def health(self) -> dict[str, dict]:
+        """Estado de cada provider: se o cliente existe e o último erro de criação."""
+        return {
+            name: {
+                "ready": name in self._providers,
+                "error": self._errors.get(name),
+            }
+            for name in self.NAMES
+        }
+
+    async def aclose(self) -> None:
+        with self._lock:
+            providers, self._providers = self._providers, {}
+            self._pools = {}
+        for name, provider in providers.items():
+            try:
+                if isinstance(provider, GroqProvider):
+                    await provider.aclose()
+                else:
+                    provider.close()
+            except Exception as e:
+                logger.warning(f"Error closing provider {name}: {e}")
+
+
+providers = ProviderRegistry()
@@ -0,0 +1,70 @@
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from .factory import ProviderError, ProviderRateLimitError, ProviderTimeoutError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    attempts: int = 4
+    base_delay: float = 1.0
+    max_delay: float = 20.0
+    # orçamento total (s) para todas as tentativas, esperas incluídas
+    deadline: float = 90.0
+
+
+def backoff_delay(
+    attempt: int, policy: RetryPolicy, retry_after: Optional[float] = None
+) -> float:
+    """Espera antes da tentativa ``attempt + 1``: full jitter exponencial.
+
+    A server-provided Retry-After is honoured as a lower bound, with a
+    little jitter so concurrent callers do not retry in lockstep.
+    """
+    delay = random.uniform(0, min(policy.max_delay, policy.base_delay * 2**attempt))
+    if retry_after is not None:
+        delay = max(delay, retry_after + random.uniform(0, policy.base_delay))
+    return delay
+
+
+async def retry_async(
+    call: Callable[[], Awaitable[T]],
+    policy: RetryPolicy = RetryPolicy(),
+    name: str = "provider",
+) -> T:
+    """Runs ``call`` until it succeeds, within the policy's attempts and deadline.
+
+    Only ``ProviderError``s marked retryable are retried; each attempt is
+    bounded by the remaining deadline, and a wait that would overrun the
+    deadline is not started. Sleeping uses ``asyncio.sleep``, so the event
+    loop keeps running and cancelling the caller stops the retries.
+    """
+    deadline = time.monotonic() + policy.deadline
+    for attempt in range(policy.attempts):
+        remaining = deadline - time.monotonic()
+        try:
+            return await asyncio.wait_for(call(), timeout=remaining)
+        except asyncio.TimeoutError as e:
+            raise ProviderTimeoutError(
+                f"{name} deadline of {policy.deadline:g}s exceeded"
+            ) from e
+        except ProviderError as e:
+            if not e.retryable or attempt == policy.attempts - 1:
+                raise
+            retry_after = e.retry_after if isinstance(e, ProviderRateLimitError) else None
+            delay = backoff_delay(attempt, policy, retry_after)
+            if time.monotonic() + delay >= deadline:
+                raise
+            logger.warning(
+                f"{name} failed (attempt {attempt + 1}/{policy.attempts}), "
+                f"retrying in {delay:.1f}s: {e}"
+            )
+            await asyncio.sleep(delay)
@@ -0,0 +1,441 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import aclosing
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from .config import (
+    BREAKER_COOLDOWN,
+    BREAKER_ERROR_RATE,
+    BREAKER_FAILURES,
+    BREAKER_WINDOW,
+    LLM_HEDGE_AFTER,
+    LLM_HEDGE_MIN,
+)
+from .factory import ProviderError, ProviderUnavailableError, QuotaExceededError
+from .groq import CHAT_MODEL as GROQ_CHAT_MODEL, CHAT_SYSTEM_PROMPT
+from .registry import providers
+from .retry import RetryPolicy, retry_async
+from .zai import CHAT_MODEL as ZAI_CHAT_MODEL, ZAI_RETRY
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Circuit breaker de um backend, com as estatísticas recentes dele.
+
+    Opens after ``failures`` consecutive failures, or when the error rate
+    over the last ``window`` calls (once half of it is filled) goes above
+    ``error_rate``. After ``cooldown`` seconds one probe call is let
+    through: success closes the breaker, failure opens it again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failures: int = BREAKER_FAILURES,
+        error_rate: float = BREAKER_ERROR_RATE,
+        window: int = BREAKER_WINDOW,
+        cooldown: float = BREAKER_COOLDOWN,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failures = failures
+        self.max_error_rate = error_rate
+        self.cooldown = cooldown
+        self.clock = clock
+        self.state = CLOSED
+        self.outcomes: deque[bool] = deque(maxlen=window)
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Se uma chamada pode ir para o backend agora (reserva o probe)."""
+        with self._lock:
+            if self.state == OPEN and self.clock() - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+                self.probing = False
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self.probing:
+                self.probing = True
+                return True
+            return False
+
+    def record_success(self, latency: float) -> None:
+        with self._lock:
+            self.outcomes.append(True)
+            self.latencies.append(latency)
+            self.consecutive_failures = 0
+            self.probing = False
+            # Só o probe fecha; respostas atrasadas de antes da abertura não
+            if self.state == HALF_OPEN:
+                logger.info(f"Circuit for {self.name} closed")
+                self.state = CLOSED
+                self.outcomes.clear()
+                self.outcomes.append(True)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.outcomes.append(False)
+            self.consecutive_failures += 1
+            self.probing = False
+            if (
+                self.state == HALF_OPEN
+                or self.consecutive_failures >= self.failures
+                or (
+                    len(self.outcomes) >= self.outcomes.maxlen // 2
+                    and self._error_rate() > self.max_error_rate
+                )
+            ):
+                if self.state != OPEN:
+                    logger.warning(
+                        f"Circuit for {self.name} opened "
+                        f"(error rate {self._error_rate():.0%})"
+                    )
+                self.state = OPEN
+                self.opened_at = self.clock()
+
+    def release(self) -> None:
+        """Chamada cancelada sem resultado: libera o probe sem contar nada."""
+        with self._lock:
+            self.probing = False
+
+    def _error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def latency_quantile(self, q: float) -> Optional[float]:
+        """Quantil das latências recentes de sucesso; None sem amostras."""
+        with self._lock:
+            if not self.latencies:
+                return None
+            latencies = sorted(self.latencies)
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+    def snapshot(self) -> dict:
+        p50 = self.latency_quantile(0.5)
+        p90 = self.latency_quantile(0.9)
+        with self._lock:
+            return {
+                "state": self.state,
+                "error_rate": round(self._error_rate(), 3),
+                "calls": len(self.outcomes),
+                "p50": round(p50, 3) if p50 is not None else None,
+                "p90": round(p90, 3) if p90 is not None else None,
+            }
+
+
+@dataclass
+class Backend:
+    name: str
+    # Recebe a mensagem e devolve o texto; erros como ProviderError
+    call: Callable[[str], Awaitable[str]]
+    # Retentativas quando ele é o único backend disponível
+    retry: Optional[RetryPolicy] = None
+    breaker: Optional[CircuitBreaker] = None
+    # Versão em streaming; sem ela a resposta inteira vira um único pedaço
+    stream: Optional[Callable[[str], AsyncIterator[str]]] = None
+    model: Optional[str] = None
+
+    def __post_init__(self):
+        if self.breaker is None:
+            self.breaker = CircuitBreaker(self.name)
+        if self.model is None:
+            self.model = self.name
+
+
+def default_backends() -> list[Backend]:
+    """ZAI como primário, Groq como hedge, ambos vindos do registry."""
+    return [
+        Backend(
+            "zai",
+            lambda message: providers.zai().acomplete(message),
+            retry=ZAI_RETRY,
+            stream=lambda message: providers.zai().astream(message),
+            model=ZAI_CHAT_MODEL,
+        ),
+        Backend(
+            "groq",
+            lambda message: providers.groq().acomplete(CHAT_SYSTEM_PROMPT, message),
+            stream=lambda message: providers.groq().astream(CHAT_SYSTEM_PROMPT, message),
+            model=GROQ_CHAT_MODEL,
+        ),
+    ]
+
+
+class ProviderRouter:
+    """Roteia chats entre backends com circuit breaker e requisições hedged.
+
+    The first two backends whose breaker allows a call are used. The
+    primary is called alone; if it has not answered within the hedge delay
+    (its recent p90 latency, clamped to ``[hedge_min, hedge_after]``) the
+    secondary is fired in parallel and the first answer wins. A primary
+    that fails early hands over to the secondary right away, and a primary
+    that loses the race counts as a failure, so a backend that is slow or
+    erroring trips its breaker and stops costing every request. With a
+    single backend available it is called with its retry policy.
+
+    Cancelling a ZAI call does not stop its worker thread; the SDK timeout
+    bounds it and the late answer is discarded.
+    """
+
+    def __init__(
+        self,
+        backends: Optional[list[Backend]] = None,
+        hedge_after: float = LLM_HEDGE_AFTER,
+        hedge_min: float = LLM_HEDGE_MIN,
+    ):
+        self.backends = backends if backends is not None else default_backends()
+        self.hedge_after = hedge_after
+        self.hedge_min = hedge_min
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    @property
+    def model(self) -> str:
+        """Identidade da rota (modelos em ordem), usada nas chaves de cache."""
+        return "+".join(backend.model for backend in self.backends)
+
+    def hedge_delay(self, backend: Backend) -> float:
+        p90 = backend.breaker.latency_quantile(0.9)
+        if p90 is None:
+            return self.hedge_after
+        return min(self.hedge_after, max(self.hedge_min, p90))
+
+    def _available(self, offset: int = 0) -> list[Backend]:
+        available = []
+        count = len(self.backends)
+        for i in range(count):
+            backend = self.backends[(i + offset) % count]
+            if len(available) == 2:
+                break
+            if backend.breaker.allow():
+                available.append(backend)
+        return available
+
+    async def _call(self, backend: Backend, message: str, retry: bool = False) -> str:
+        start = time.monotonic()
+        try:
+            if retry and backend.retry is not None:
+                result = await retry_async(
+                    lambda: backend.call(message), backend.retry, name=backend.name
+                )
+            else:
+                result = await backend.call(message)
+        except (asyncio.CancelledError, QuotaExceededError):
+            # cota local esgotada não diz nada sobre a saúde do backend
+            backend.breaker.release()
+            raise
+        except ProviderError:
+            backend.breaker.record_failure()
+            raise
+        except Exception as e:
+            backend.breaker.record_failure()
+            raise ProviderError(f"{backend.name} failed: {e}") from e
+        backend.breaker.record_success(time.monotonic() - start)
+        return result
+
+    async def complete(self, message: str, offset: int = 0, hedge: bool = True) -> str:
+        """Resposta do primeiro backend que responder; ``ProviderError`` se nenhum.
+
+        ``offset`` rotates the backend order, so parallel calls can spread
+        over the providers (call ``i`` prefers backend ``i % n``) while each
+        one still hedges with the next. With ``hedge=False`` the backends
+        are tried one at a time (with retries), so a caller limiting its
+        concurrency never has more than one request in flight per call.
+        """
+        if not hedge:
+            return await self._sequential(message, offset)
+        available = self._available(offset)
+        if not available:
+            raise ProviderUnavailableError("All chat providers are circuit-open")
+        if len(available) == 1:
+            return await self._call(available[0], message, retry=True)
+        return await self._hedged(*available, message)
+
+    async def _sequential(self, message: str, offset: int) -> str:
+        error: Optional[ProviderError] = None
+        count = len(self.backends)
+        for i in range(count):
+            backend = self.backends[(i + offset) % count]
+            # reserva o probe só do backend que vai ser chamado agora
+            if not backend.breaker.allow():
+                continue
+            try:
+                return await self._call(backend, message, retry=True)
+            except ProviderError as e:
+                logger.info(f"{backend.name} failed ({e}), trying the next backend")
+                error = e
+        raise error or ProviderUnavailableError("All chat providers are circuit-open")
+
+    async def _hedged(self, primary: Backend, secondary: Backend, message: str) -> str:
+        tasks = [asyncio.create_task(self._call(primary, message))]
+        secondary_called = False
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay(primary))
+            if done:
+                try:
+                    return tasks[0].result()
+                except ProviderError as e:
+                    logger.info(f"{primary.name} failed ({e}), using {secondary.name}")
+                    secondary_called = True
+                    return await self._call(secondary, message, retry=True)
+
+            self.hedges += 1
+            secondary_called = True
+            logger.info(f"{primary.name} is slow, hedging with {secondary.name}")
+            tasks.append(asyncio.create_task(self._call(secondary, message)))
+            pending, error = set(tasks), None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is tasks[1]:
+                            self.hedge_wins += 1
+                            if not tasks[0].done():
+                                await self._cancel(tasks[0])
+                                # perdeu a corrida: conta como chamada lenta
+                                primary.breaker.record_failure()
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                await self._cancel(task)
+            if not secondary_called:
+                # _available reservou o probe dele, mas a chamada nunca saiu
+                secondary.breaker.release()
+
+    @staticmethod
+    async def _cancel(task: asyncio.Task) -> None:
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _tracked_stream(self, backend: Backend, message: str) -> AsyncIterator[str]:
+        """Stream do backend registrando o resultado no breaker ao terminar."""
+        start = time.monotonic()
+        try:
+            if backend.stream is not None:
+                async with aclosing(backend.stream(message)) as stream:
+                    async for piece in stream:
+                        yield piece
+            else:
+                yield await backend.call(message)
+        except (asyncio.CancelledError, GeneratorExit, QuotaExceededError):
+            backend.breaker.release()
+            raise
+        except ProviderError:
+            backend.breaker.record_failure()
+            raise
+        except Exception as e:
+            backend.breaker.record_failure()
+            raise ProviderError(f"{backend.name} failed: {e}") from e
+        backend.breaker.record_success(time.monotonic() - start)
+
+    async def astream(self, message: str) -> AsyncIterator[str]:
+        """Resposta em pedaços, com o hedge decidido pelo primeiro token.
+
+        Same routing as ``complete``, except that the race is for the first
+        chunk: whichever backend produces it keeps streaming and the other
+        is closed. Errors after the first chunk are raised to the caller.
+        """
+        available = self._available()
+        if not available:
+            raise ProviderUnavailableError("All chat providers are circuit-open")
+        stream, first = await self._first_chunk(available, message)
+        try:
+            if first is not None:
+                yield first
+            async for piece in stream:
+                yield piece
+        finally:
+            await stream.aclose()
+
+    async def _first_chunk(
+        self, available: list[Backend], message: str
+    ) -> tuple[AsyncIterator[str], Optional[str]]:
+        primary, hedge = available[0], (available[1] if len(available) > 1 else None)
+        pending: dict[asyncio.Task, tuple[Backend, AsyncIterator[str]]] = {}
+
+        def start(backend: Backend) -> None:
+            stream = self._tracked_stream(backend, message)
+            pending[asyncio.create_task(anext(stream, None))] = (backend, stream)
+
+        async def close_pending() -> None:
+            for task, (_, stream) in list(pending.items()):
+                await self._cancel(task)
+                await stream.aclose()
+            pending.clear()
+
+        start(primary)
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                timeout = self.hedge_delay(primary) if hedge is not None else None
+                done, _ = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    self.hedges += 1
+                    logger.info(f"{primary.name} is slow, hedging with {hedge.name}")
+                    start(hedge)
+                    hedge = None
+                    continue
+                for task in done:
+                    backend, stream = pending.pop(task)
+                    if task.exception() is not None:
+                        error = task.exception()
+                        if hedge is not None:
+                            logger.info(f"{backend.name} failed ({error}), using {hedge.name}")
+                            start(hedge)
+                            hedge = None
+                        continue
+                    lost = backend is not primary and any(
+                        b is primary for b, _ in pending.values()
+                    )
+                    if backend is not primary:
+                        self.hedge_wins += 1
+                    await close_pending()
+                    if lost:
+                        # perdeu a corrida: conta como chamada lenta
+                        primary.breaker.record_failure()
+                    return stream, task.result()
+            raise error
+        finally:
+            await close_pending()
+            if hedge is not None:
+                # reservado por _available, mas o hedge nunca começou
+                hedge.breaker.release()
+
+    async def chat(self, message: str) -> Optional[str]:
+        """Como ``complete``, mas retorna None se nenhum backend responder."""
+        try:
+            return await self.complete(message)
+        except ProviderError as e:
+            logger.error(f"No chat provider answered: {e}")
+            return None
+
+    def metrics(self) -> dict:
+        return {
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "backends": {b.name: b.breaker.snapshot() for b in self.backends},
+        }
+
+
+llm_router = ProviderRouter()
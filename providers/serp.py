@@ -7,6 +7,7 @@ import requests
 from serpapi import GoogleSearch
 
 from .config import SERPAPI_API_KEY
+from .quota import SERPAPI, quotas
 
 CACHE_FILE = "/app/database.sqlite/image_cache.json"
 CACHE_TTL = 86400 * 7  # 7 days
@@ -47,6 +48,8 @@ class SerpProvider:
     @staticmethod
     def _serpapi_search(query, limit=15):
         """SerpAPI Google Images — primary, paid quota."""
+        # sem cota cai para o Openverse
+        quotas.check(SERPAPI, "google_images")
         params = {
             "engine": "google_images",
             "q": query,
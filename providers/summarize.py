@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import time
+from contextlib import aclosing
+from typing import AsyncIterator, Optional
+
+from .config import RESUME_CHUNK_TOKENS, RESUME_MAP_CONCURRENCY
+from .factory import ProviderError
+from .router import ProviderRouter, llm_router
+from .tokens import chunk_text, count_tokens
+
+logger = logging.getLogger(__name__)
+
+MAP_INSTRUCTIONS = (
+    "Resuma a parte {index} de {total} do conteúdo abaixo em no máximo 120 "
+    "palavras. Mantenha fatos, nomes, números e conclusões, não use emojis, "
+    "responda só com o resumo em português pt-br"
+)
+REDUCE_NOTE = (
+    " O conteúdo são resumos parciais, em ordem, de partes do original;"
+    " junte-os em um único resumo."
+)
+
+
+def summary_prompt(instructions: str, title: str, content: str) -> str:
+    return f"<system_prompt>{instructions}</system_prompt><input>title: {title}\ncontent: {content}</input>"
+
+
+class MapReduceSummarizer:
+    """Resumo de conteúdos longos em map-reduce sobre o ``ProviderRouter``.
+
+    Content that fits in ``chunk_tokens`` goes to the LLM in one prompt, as
+    before. Longer content is split on paragraph and sentence boundaries,
+    each part is summarized in parallel (spread over the backends, without
+    hedging, so at most ``concurrency`` provider calls at once across all
+    documents) and the partial summaries are streamed through a final
+    reduce prompt. If the partial summaries still do not fit they are
+    mapped again; when a round stops shrinking them, each one is cut to
+    its share of ``chunk_tokens``.
+    """
+
+    def __init__(
+        self,
+        router: Optional[ProviderRouter] = None,
+        chunk_tokens: int = RESUME_CHUNK_TOKENS,
+        concurrency: int = RESUME_MAP_CONCURRENCY,
+    ):
+        self.router = router or llm_router
+        self.chunk_tokens = chunk_tokens
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+    async def _map(self, chunks: list[str], title: str) -> list[str]:
+        async def summarize(index: int, chunk: str) -> str:
+            instructions = MAP_INSTRUCTIONS.format(index=index + 1, total=len(chunks))
+            async with self.semaphore:
+                summary = await self.router.complete(
+                    summary_prompt(instructions, title, chunk), offset=index, hedge=False
+                )
+            return summary.strip()
+
+        # TaskGroup cancela as outras partes assim que uma falha
+        try:
+            async with asyncio.TaskGroup() as group:
+                tasks = [
+                    group.create_task(summarize(index, chunk))
+                    for index, chunk in enumerate(chunks)
+                ]
+        except* ProviderError as errors:
+            raise errors.exceptions[0]
+        return [task.result() for task in tasks]
+
+    @staticmethod
+    def _join(summaries: list[str]) -> str:
+        return "\n\n".join(
+            f"[Parte {index}] {summary}"
+            for index, summary in enumerate(summaries, 1)
+            if summary
+        )
+
+    def _truncate(self, summaries: list[str]) -> str:
+        """Cada resumo cortado na sua fatia de ``chunk_tokens``, em ordem."""
+        summaries = [summary for summary in summaries if summary]
+        # folga para o "[Parte N] " e a separação entre as partes
+        share = max(1, self.chunk_tokens // max(1, len(summaries)) - 8)
+        content = self._join([chunk_text(summary, share)[0] for summary in summaries])
+        chunks = chunk_text(content, self.chunk_tokens)
+        return chunks[0] if chunks else ""
+
+    async def astream(
+        self, title: str, content: str, instructions: str
+    ) -> AsyncIterator[str]:
+        """Resumo em pedaços; só a etapa final (reduce) é transmitida."""
+        tokens = count_tokens(content)
+        if tokens <= self.chunk_tokens:
+            async with aclosing(
+                self.router.astream(summary_prompt(instructions, title, content))
+            ) as stream:
+                async for piece in stream:
+                    yield piece
+            return
+
+        start = time.monotonic()
+        while tokens > self.chunk_tokens:
+            chunks = chunk_text(content, self.chunk_tokens)
+            summaries = await self._map(chunks, title)
+            content = self._join(summaries)
+            shrunk = count_tokens(content)
+            logger.info(
+                f"Summarized {tokens} tokens in {len(chunks)} parts "
+                f"-> {shrunk} tokens ({time.monotonic() - start:.1f}s)"
+            )
+            if shrunk >= tokens:
+                # o LLM não está encurtando: corta em vez de mandar um prompt grande
+                logger.warning(f"Partial summaries stopped shrinking, truncating {shrunk} tokens")
+                content = self._truncate(summaries)
+                break
+            tokens = shrunk
+
+        async with aclosing(
+            self.router.astream(
+                summary_prompt(instructions + REDUCE_NOTE, title, content)
+            )
+        ) as stream:
+            async for piece in stream:
+                yield piece
+
+
+resume_summarizer = MapReduceSummarizer()
@@ -0,0 +1,131 @@
+import logging
+import math
+import os
+import re
+import threading
+
+from typing import Optional
+
+from .config import MODEL_TOKEN_BUDGETS, MODEL_TOKENIZERS, TOKENIZER
+
+logger = logging.getLogger(__name__)
+
+# Estimativa sem tokenizer: texto em português fica perto de 3.5-4
+# caracteres por token nos tokenizers BPE dos modelos usados; 3.5 erra para
+# mais, o que mantém os pedaços abaixo do limite
+CHARS_PER_TOKEN = 3.5
+# Orçamento de quem não está em MODEL_TOKEN_BUDGETS
+DEFAULT_TOKEN_BUDGET = 6000
+
+_PARAGRAPHS = re.compile(r"\n\s*\n")
+_SENTENCES = re.compile(r"(?<=[.!?…])\s+")
+
+# nome do tokenizer -> Tokenizer, ou None se não carregou
+_tokenizers: dict = {}
+_tokenizer_lock = threading.Lock()
+
+
+def _load_tokenizer(model: Optional[str] = None):
+    """Tokenizer do HuggingFace do modelo (arquivo ou nome no hub).
+
+    The name comes from MODEL_TOKENIZERS, falling back to TOKENIZER.
+    ``tokenizers`` already comes with faster-whisper; without a name, or if
+    it cannot be loaded (e.g. no network to reach the hub), token counts
+    fall back to the estimate. Each name is tried only once.
+    """
+    name = MODEL_TOKENIZERS.get(model) or TOKENIZER
+    if not name:
+        return None
+    with _tokenizer_lock:
+        if name in _tokenizers:
+            return _tokenizers[name]
+        _tokenizers[name] = None
+        try:
+            from tokenizers import Tokenizer
+
+            if os.path.isfile(name):
+                _tokenizers[name] = Tokenizer.from_file(name)
+            else:
+                _tokenizers[name] = Tokenizer.from_pretrained(name)
+            logger.info(f"Token counts using tokenizer {name}")
+        except Exception as e:
+            logger.warning(f"Failed to load tokenizer {name}, estimating: {e}")
+        return _tokenizers[name]
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Número de tokens do texto (exato com tokenizer, senão estimado)."""
+    if not text:
+        return 0
+    tokenizer = _load_tokenizer(model)
+    if tokenizer is not None:
+        return len(tokenizer.encode(text, add_special_tokens=False).ids)
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def token_budget(model: str, reserve: int = 0) -> int:
+    """Tokens de entrada que cabem numa requisição ao modelo, deixando
+    ``reserve`` para a resposta."""
+    return max(0, MODEL_TOKEN_BUDGETS.get(model, DEFAULT_TOKEN_BUDGET) - reserve)
+
+
+def _split(text: str, max_tokens: int) -> list[str]:
+    """Quebra o texto em partes de até ``max_tokens``, nas fronteiras mais
+    largas possíveis: parágrafos, depois frases, depois palavras."""
+    if count_tokens(text) <= max_tokens:
+        return [text]
+    for pattern in (_PARAGRAPHS, _SENTENCES):
+        parts = [part for part in pattern.split(text) if part.strip()]
+        if len(parts) > 1:
+            return [piece for part in parts for piece in _split(part, max_tokens)]
+    words = text.split()
+    if len(words) > 1:
+        middle = len(words) // 2
+        return _split(" ".join(words[:middle]), max_tokens) + _split(
+            " ".join(words[middle:]), max_tokens
+        )
+    # uma "palavra" sozinha maior que o limite (URL, base64...): corta no meio
+    size = max(1, int(max_tokens * CHARS_PER_TOKEN))
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def chunk_text(text: str, max_tokens: int, separator: str = "\n\n") -> list[str]:
+    """Divide o texto em pedaços de até ``max_tokens`` tokens.
+
+    Pieces are packed greedily in order, so chunks end on a paragraph or
+    sentence boundary whenever one fits and only oversized sentences are
+    cut between words.
+    """
+    text = text.strip()
+    if not text:
+        return []
+    chunks: list[str] = []
+    current: list[str] = []
+    used = 0
+    glue = count_tokens(separator)
+    for piece in _split(text, max_tokens):
+        piece = piece.strip()
+        tokens = count_tokens(piece)
+        if current and used + glue + tokens > max_tokens:
+            chunks.append(separator.join(current))
+            current, used = [], 0
+        used += tokens + (glue if current else 0)
+        current.append(piece)
+    if current:
+        chunks.append(separator.join(current))
+    return chunks
+
+
+def fit_lines(lines: list[str], max_tokens: int, model: Optional[str] = None) -> list[str]:
+    """As linhas mais recentes (do fim da lista) que cabem em ``max_tokens``."""
+    kept: list[str] = []
+    used = 0
+    for line in reversed(lines):
+        # +1 pela quebra de linha
+        tokens = count_tokens(line, model) + 1
+        if used + tokens > max_tokens:
+            break
+        kept.append(line)
+        used += tokens
+    kept.reverse()
+    return kept
@@ -1,21 +1,89 @@
+import asyncio
 import logging
-import time
+import threading
+from typing import AsyncIterator, Optional
+
+import httpx
 from zai import ZaiClient
-from zai.core._errors import APIReachLimitError
+from zai.core import _errors as zai_errors
 
-from .config import ZAI_API_KEY
-from .factory import AiFactory
+from .config import (
+    ZAI_API_KEY,
+    ZAI_BASE_URL,
+    ZAI_DEADLINE,
+    ZAI_MAX_ATTEMPTS,
+    ZAI_TIMEOUT,
+)
+from .factory import (
+    AiFactory,
+    ProviderError,
+    ProviderRateLimitError,
+    ProviderServerError,
+    ProviderTimeoutError,
+    ProviderUnavailableError,
+)
 from .groq import GroqProvider
+from .quota import ZAI, quotas
+from .retry import RetryPolicy, retry_async
 
 logger = logging.getLogger(__name__)
 
+CHAT_MODEL = "glm-4.7"
+
+ZAI_RETRY = RetryPolicy(
+    attempts=ZAI_MAX_ATTEMPTS, base_delay=2.0, max_delay=20.0, deadline=ZAI_DEADLINE
+)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def _provider_error(error: Exception) -> ProviderError:
+    """Traduz exceções do SDK da ZAI para os erros dos providers."""
+    if isinstance(error, zai_errors.APITimeoutError):
+        return ProviderTimeoutError(f"ZAI timed out: {error}")
+    if isinstance(error, zai_errors.APIReachLimitError):
+        return ProviderRateLimitError(
+            f"ZAI rate limit: {error}", retry_after=_retry_after(error)
+        )
+    if isinstance(
+        error,
+        (
+            zai_errors.APIConnectionError,
+            zai_errors.APIInternalError,
+            zai_errors.APIServerFlowExceedError,
+        ),
+    ):
+        return ProviderServerError(f"ZAI unavailable: {error}")
+    if isinstance(error, zai_errors.APIAuthenticationError):
+        return ProviderUnavailableError(f"ZAI rejected credentials: {error}")
+    return ProviderError(f"ZAI error: {error}")
+
 
 class ZAIProvider(AiFactory):
-    def __init__(self):
+    def __init__(
+        self,
+        groq: Optional[GroqProvider] = None,
+        http_client: Optional[httpx.Client] = None,
+    ):
+        # Retentativas ficam com o achat (backoff assíncrono), não com o SDK
         self.client = ZaiClient(
-            base_url="https://api.z.ai/api/coding/paas/v4", api_key=ZAI_API_KEY
+            base_url=ZAI_BASE_URL,
+            api_key=ZAI_API_KEY,
+            timeout=ZAI_TIMEOUT,
+            max_retries=0,
+            http_client=http_client,
         )
-        self._groq = GroqProvider()
+        self._groq = groq or GroqProvider()
+
+    def close(self) -> None:
+        """Fecha só o cliente da ZAI; o fallback Groq pode ser compartilhado."""
+        self.client.close()
 
     def vision(self, image) -> str:
         raise NotImplementedError("vision not implemented yet")
@@ -26,36 +94,88 @@ class ZAIProvider(AiFactory):
     def summarize(self, text) -> str:
         raise NotImplementedError("summarize not implemented yet")
 
-    def chat(self, message) -> str:
-        retry_delays = [10, 15, 20]
+    def complete(self, message: str) -> str:
+        """Uma única chamada síncrona ao SDK, com os erros já traduzidos."""
+        quotas.check(ZAI, CHAT_MODEL)
+        return self._create(message)
+
+    async def acomplete(self, message: str) -> str:
+        """Como ``complete``, esperando a cota no event loop e com o SDK numa thread."""
+        await quotas.acquire(ZAI, CHAT_MODEL)
+        return await asyncio.to_thread(self._create, message)
 
-        for attempt, delay in enumerate(retry_delays, 1):
+    def _create(self, message: str) -> str:
+        try:
+            response = self.client.chat.completions.create(
+                model=CHAT_MODEL,
+                messages=[{"role": "user", "content": message}],
+                stream=False,
+            )
+        except zai_errors.ZaiError as e:
+            raise _provider_error(e) from e
+        return response.choices[0].message.content
+
+    async def astream(self, message: str) -> AsyncIterator[str]:
+        """Chat em streaming: o SDK síncrono roda numa thread e os pedaços
+        chegam ao event loop por uma fila. Fechar o gerador interrompe a
+        leitura da resposta; erros saem como ``ProviderError``."""
+        await quotas.acquire(ZAI, CHAT_MODEL)
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        done = object()
+
+        def put(item) -> None:
             try:
-                response = self.client.chat.completions.create(
-                    model="glm-4.7",
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                stop.set()  # loop fechado, ninguém mais vai ler
+
+        def produce() -> None:
+            try:
+                stream = self.client.chat.completions.create(
+                    model=CHAT_MODEL,
                     messages=[{"role": "user", "content": message}],
-                    stream=False,
-                )
-                return response.choices[0].message.content
-            except APIReachLimitError as e:
-                logger.warning(
-                    f"ZAI rate limit (attempt {attempt}/{len(retry_delays)}): {e}"
+                    stream=True,
                 )
-                if attempt < len(retry_delays):
-                    time.sleep(delay)
-                else:
-                    logger.info("ZAI exhausted, falling back to Groq")
-                    return self._groq.chat(message)
+                try:
+                    for chunk in stream:
+                        if stop.is_set():
+                            break
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            put(chunk.choices[0].delta.content)
+                finally:
+                    stream.response.close()
+            except zai_errors.ZaiError as e:
+                put(_provider_error(e))
+            except httpx.TimeoutException as e:
+                put(ProviderTimeoutError(f"ZAI stream timed out: {e}"))
+            except httpx.HTTPError as e:
+                put(ProviderServerError(f"ZAI stream interrupted: {e}"))
             except Exception as e:
-                logger.error(
-                    f"ZAI error (attempt {attempt}/{len(retry_delays)}): {e}",
-                    exc_info=True,
-                )
-                if attempt < len(retry_delays):
-                    time.sleep(delay)
-                else:
-                    logger.info("ZAI exhausted, falling back to Groq")
-                    return self._groq.chat(message)
-
-        logger.info("ZAI exhausted, falling back to Groq")
-        return self._groq.chat(message)
+                put(ProviderError(f"ZAI stream failed: {e}"))
+            finally:
+                put(done)
+
+        loop.run_in_executor(None, produce)
+        try:
+            while (item := await queue.get()) is not done:
+                if isinstance(item, ProviderError):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+
+    async def achat(self, message: str, policy: RetryPolicy = ZAI_RETRY) -> Optional[str]:
+        """Chat sem bloquear o event loop; cai para o Groq se a ZAI esgotar.
+
+        The blocking SDK call runs in a worker thread; retries use jittered
+        exponential backoff (honouring Retry-After) within ``policy.deadline``.
+        """
+        try:
+            return await retry_async(
+                lambda: self.acomplete(message), policy, name="ZAI"
+            )
+        except ProviderError as e:
+            logger.info(f"ZAI exhausted ({e}), falling back to Groq")
+            return await self._groq.achat(message)
@@ -7,3 +7,39 @@ load_dotenv()
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
 
 
+
+# Instâncias de YoutubeDL mantidas por perfil (probe, audio, video)
+YDL_POOL_SIZE = int(os.getenv("YDL_POOL_SIZE", "2"))
+
+# faster-whisper local (fallback do Groq)
+WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "int8")
+WHISPER_CPU_THREADS = int(os.getenv("WHISPER_CPU_THREADS", "0"))  # 0 = padrão do ctranslate2
+WHISPER_NUM_WORKERS = int(os.getenv("WHISPER_NUM_WORKERS", "1"))
+# Modelos carregados no startup, ex.: "base,small"
+WHISPER_PRELOAD = [m for m in os.getenv("WHISPER_PRELOAD", "").split(",") if m]
+
+# Transcrição em pedaços (cortados em silêncio pelo VAD)
+TRANSCRIBE_CHUNK_SECONDS = int(os.getenv("TRANSCRIBE_CHUNK_SECONDS", "120"))
+GROQ_TRANSCRIBE_CONCURRENCY = int(os.getenv("GROQ_TRANSCRIBE_CONCURRENCY", "4"))
+
+# Roteamento das transcrições (Groq x whisper local); a cota do Groq fica
+# em providers/config.py (GROQ_TRANSCRIBE_RPM/RPD)
+# Modelos locais candidatos, do mais preciso para o mais rápido
+WHISPER_LOCAL_MODELS = [
+    m for m in os.getenv("WHISPER_LOCAL_MODELS", "small,base").split(",") if m
+]
+# Latência (s) aceitável antes de trocar para um modelo menor
+TRANSCRIBE_LATENCY_BUDGET = float(os.getenv("TRANSCRIBE_LATENCY_BUDGET", "60"))
+
+# /tldr: resumos incrementais por janelas de mensagens
+TLDR_MAX_MESSAGES = int(os.getenv("TLDR_MAX_MESSAGES", "2000"))
+TLDR_CHUNK_SIZE = int(os.getenv("TLDR_CHUNK_SIZE", "50"))
+TLDR_CONCURRENCY = int(os.getenv("TLDR_CONCURRENCY", "4"))
+
+# Contexto das menções ao bot: janela em memória por chat e cadeia de respostas
+CONVERSATION_WINDOW = int(os.getenv("CONVERSATION_WINDOW", "50"))
+CONVERSATION_RECENT_TURNS = int(os.getenv("CONVERSATION_RECENT_TURNS", "10"))
+CONVERSATION_MAX_DEPTH = int(os.getenv("CONVERSATION_MAX_DEPTH", "20"))
+CONVERSATION_MAX_TOKENS = int(os.getenv("CONVERSATION_MAX_TOKENS", "1500"))
+CONVERSATION_CACHE_TTL = float(os.getenv("CONVERSATION_CACHE_TTL", "3600"))
+CONVERSATION_MAX_CHATS = int(os.getenv("CONVERSATION_MAX_CHATS", "200"))
@@ -0,0 +1,104 @@
+import io
+import logging
+import os
+from typing import BinaryIO, Optional, Union
+
+import av
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLING_RATE = 16000
+OPUS_BITRATE = 24000
+# Limite de arquivo da API de transcrição do Groq (plano gratuito)
+GROQ_MAX_UPLOAD_BYTES = 25 * 1024 * 1024
+
+# Containers aceitos pela API de transcrição do Groq
+GROQ_ACCEPTED_EXTS = {"flac", "m4a", "mp3", "mp4", "mpeg", "mpga", "ogg", "opus", "wav", "webm"}
+# Codecs que só precisam trocar de container (cópia do stream, sem reencode)
+REMUX_TARGETS = {"aac": "m4a", "alac": "m4a", "flac": "flac", "mp3": "mp3", "opus": "ogg", "vorbis": "ogg"}
+
+
+def encode_opus(samples: np.ndarray) -> bytes:
+    """Codifica PCM float 16 kHz mono em Ogg/Opus, a entrada que o whisper usa."""
+    buffer = io.BytesIO()
+    with av.open(buffer, "w", format="ogg") as container:
+        stream = container.add_stream("libopus", rate=SAMPLING_RATE, layout="mono")
+        stream.bit_rate = OPUS_BITRATE
+        frame = av.AudioFrame.from_ndarray(
+            samples.reshape(1, -1).astype(np.float32), format="flt", layout="mono"
+        )
+        frame.sample_rate = SAMPLING_RATE
+        for packet in stream.encode(frame):
+            container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+    return buffer.getvalue()
+
+
+def remux(src: Union[str, BinaryIO], ext: str) -> bytes:
+    """Copia o stream de áudio de ``src`` (caminho ou arquivo) para ``ext`` em memória."""
+    buffer = io.BytesIO()
+    with av.open(src) as source, av.open(buffer, "w", format=_muxer(ext)) as target:
+        in_stream = source.streams.audio[0]
+        out_stream = target.add_stream_from_template(in_stream)
+        for packet in source.demux(in_stream):
+            if packet.dts is None:
+                continue
+            packet.stream = out_stream
+            target.mux(packet)
+    return buffer.getvalue()
+
+
+def _muxer(ext: str) -> str:
+    return {"m4a": "ipod", "mp3": "mp3", "flac": "flac", "ogg": "ogg"}[ext]
+
+
+def source_upload(path: str) -> Optional[tuple[bytes, str, str]]:
+    """Bytes do arquivo original prontos para upload, sem reencode.
+
+    Returns (data, filename, mode) where mode is "copy" when the container is
+    already accepted or "remux" when only the container changes; None when
+    the audio has to be transcoded.
+    """
+    base, ext = os.path.splitext(os.path.basename(path))
+    ext = ext.lstrip(".").lower()
+    if os.path.getsize(path) > GROQ_MAX_UPLOAD_BYTES:
+        return None
+
+    if ext in GROQ_ACCEPTED_EXTS:
+        with open(path, "rb") as f:
+            return f.read(), os.path.basename(path), "copy"
+
+    try:
+        with av.open(path) as container:
+            codec = container.streams.audio[0].codec_context.name
+    except Exception as e:
+        logger.debug(f"Could not read audio codec of {path}: {e}")
+        return None
+
+    target = REMUX_TARGETS.get(codec)
+    if not target:
+        return None
+    try:
+        return remux(path, target), f"{base}.{target}", "remux"
+    except Exception as e:
+        logger.warning(f"Remux of {path} to {target} failed: {e}")
+        return None
+
+
+def voice_upload(buffer: BinaryIO, ext: str) -> tuple[BinaryIO, str]:
+    """Upload de uma nota de voz ou de vídeo que já está em memória.
+
+    Voice notes (Ogg/Opus) are sent as-is. For video notes only the audio
+    track is copied into an m4a, so the video stream is never uploaded.
+    """
+    buffer.seek(0)
+    if ext != "mp4":
+        return buffer, f"voice.{ext}"
+    try:
+        return io.BytesIO(remux(buffer, "m4a")), "video_note.m4a"
+    except Exception as e:
+        logger.warning(f"Could not extract video note audio, sending mp4: {e}")
+        buffer.seek(0)
+        return buffer, "video_note.mp4"
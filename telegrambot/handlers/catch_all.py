@@ -8,6 +8,7 @@ from telegram import Update
 from telegram.ext import CallbackContext
 
 from domain import MessageService
+from telegrambot.handlers.conversation import conversations
 
 message_service = MessageService()
 
@@ -130,6 +131,9 @@ async def catch_all_handler(update: Update, context: CallbackContext):
             reply_text=reply_text,
             message_type=message_type,
         )
+        conversations.record(
+            message.chat_id, message.message_id, from_user, text, reply_to_message_id, message_type
+        )
     except Exception as e:
         logger.error(f"Error saving message (catch-all): {e}", exc_info=True)
 
@@ -156,5 +160,8 @@ async def catch_all_edited_handler(update: Update, context: CallbackContext):
             reply_text=reply_text,
             message_type=message_type,
         )
+        conversations.record(
+            message.chat_id, message.message_id, from_user, text, reply_to_message_id, message_type
+        )
     except Exception as e:
         logger.error(f"Error saving edited message: {e}", exc_info=True)
@@ -0,0 +1,221 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+import numpy as np
+from faster_whisper.audio import decode_audio
+from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+from providers.factory import ProviderUnavailableError
+from providers.registry import providers
+from telegrambot.config import GROQ_TRANSCRIBE_CONCURRENCY, TRANSCRIBE_CHUNK_SECONDS
+from telegrambot.handlers.kinds import Origin
+
+from .audio_encoding import SAMPLING_RATE, encode_opus, source_upload
+from .transcription_scheduler import GROQ, TranscriptionJob, transcription_scheduler
+from .whisper_models import whisper_models
+
+logger = logging.getLogger(__name__)
+
+VAD_OPTIONS = VadOptions(min_silence_duration_ms=500, speech_pad_ms=200)
+
+
+def plan_chunks(
+    speech: list[dict], max_samples: int
+) -> list[tuple[int, int]]:
+    """Agrupa trechos de fala em pedaços de até ``max_samples`` amostras.
+
+    Cuts only happen in the silence between speech segments; a single
+    segment longer than the limit is split at fixed intervals.
+    """
+    chunks = []
+    start = end = None
+    for segment in speech:
+        seg_start, seg_end = segment["start"], segment["end"]
+        while seg_end - seg_start > max_samples:
+            if start is not None:
+                chunks.append((start, end))
+                start = end = None
+            chunks.append((seg_start, seg_start + max_samples))
+            seg_start += max_samples
+
+        if start is None:
+            start, end = seg_start, seg_end
+        elif seg_end - start <= max_samples:
+            end = seg_end
+        else:
+            chunks.append((start, end))
+            start, end = seg_start, seg_end
+
+    if start is not None:
+        chunks.append((start, end))
+    return chunks
+
+
+def split_on_silence(
+    audio: np.ndarray, max_seconds: int = TRANSCRIBE_CHUNK_SECONDS
+) -> list[np.ndarray]:
+    speech = get_speech_timestamps(audio, VAD_OPTIONS, sampling_rate=SAMPLING_RATE)
+    return [
+        audio[start:end]
+        for start, end in plan_chunks(speech, max_seconds * SAMPLING_RATE)
+    ]
+
+
+def _transcribe_groq(
+    uploads: list[tuple[bytes, str]],
+) -> Optional[list[tuple[str, Optional[str]]]]:
+    try:
+        groq = providers.groq()
+    except ProviderUnavailableError as e:
+        logger.error(f"Groq client unavailable: {e}")
+        return None
+
+    def transcribe(upload):
+        data, filename = upload
+        result = groq.transcribe_audio_bytes(data, filename)
+        if result is None:
+            return None
+        return result.text, getattr(result, "language", None)
+
+    with ThreadPoolExecutor(max_workers=GROQ_TRANSCRIBE_CONCURRENCY) as executor:
+        results = list(executor.map(transcribe, uploads))
+
+    if any(result is None for result in results):
+        return None
+    return results
+
+
+def _groq_uploads(audio_path: str, chunks: list[np.ndarray]) -> tuple[list, str]:
+    """Monta os uploads: o arquivo original quando cabe num pedaço só, senão Opus."""
+    if len(chunks) == 1:
+        source = source_upload(audio_path)
+        if source:
+            data, filename, mode = source
+            return [(data, filename)], mode
+    return [
+        (encode_opus(chunk), f"chunk_{index}.ogg")
+        for index, chunk in enumerate(chunks)
+    ], "opus"
+
+
+class _OrderedProgress:
+    """Junta os segmentos de pedaços concorrentes e publica só o prefixo em ordem.
+
+    A chunk's segments are only shown once every earlier chunk is complete,
+    so the partial text never has holes or reorders.
+    """
+
+    def __init__(self, total: int, on_progress: Callable[[str], None]):
+        self.on_progress = on_progress
+        self.segments: list[list[str]] = [[] for _ in range(total)]
+        self.done = [False] * total
+        self.published = ""
+        self.lock = threading.Lock()
+
+    def segment(self, index: int, text: str) -> None:
+        with self.lock:
+            self.segments[index].append(text)
+            self._publish()
+
+    def finish(self, index: int) -> None:
+        with self.lock:
+            self.done[index] = True
+            self._publish()
+
+    def _publish(self) -> None:
+        parts = []
+        for segments, done in zip(self.segments, self.done):
+            parts.extend(segments)
+            if not done:
+                break
+        text = " ".join(parts)
+        if text != self.published:
+            self.published = text
+            self.on_progress(text)
+
+
+def _transcribe_chunks_local(
+    chunks: list[np.ndarray],
+    model_size: str,
+    on_progress: Optional[Callable[[str], None]] = None,
+    job: Optional[TranscriptionJob] = None,
+) -> list[tuple[str, Optional[str]]]:
+    progress = _OrderedProgress(len(chunks), on_progress) if on_progress else None
+
+    # ctranslate2 libera o GIL: threads bastam, e o modelo residente é compartilhado
+    def transcribe(indexed_chunk):
+        index, chunk = indexed_chunk
+        on_segment = (lambda text: progress.segment(index, text)) if progress else None
+        result = whisper_models.transcribe(
+            model_size,
+            chunk,
+            on_segment=on_segment,
+            on_start=job.started if job else None,
+            beam_size=5,
+        )
+        if progress:
+            progress.finish(index)
+        return result.text, result.language
+
+    with ThreadPoolExecutor(max_workers=whisper_models.num_workers) as executor:
+        return list(executor.map(transcribe, enumerate(chunks)))
+
+
+def transcribe_chunked(
+    audio_path: str,
+    model_size: Optional[str] = None,
+    on_progress: Optional[Callable[[str], None]] = None,
+) -> tuple[str, Origin, Optional[str]]:
+    """Transcribes long audio in VAD-bounded chunks, concurrently, in order.
+
+    The scheduler picks the backend: Groq for every chunk while there is
+    quota, otherwise a local faster-whisper model (``model_size`` pins it),
+    whose partial text is streamed to ``on_progress``. If any Groq chunk
+    fails the whole file is rerouted locally. Returns (text, origin,
+    language of the first chunk).
+    """
+    audio = decode_audio(audio_path, sampling_rate=SAMPLING_RATE)
+    chunks = split_on_silence(audio)
+    if not chunks:
+        return "", Origin.CPU, None
+
+    duration = len(audio) / SAMPLING_RATE
+    route = transcription_scheduler.wait_route(
+        duration, chunks=len(chunks), model_size=model_size
+    )
+    routed = time.perf_counter()
+    results = None
+    mode, upload_bytes, encode_time = "local", 0, 0.0
+    if route.backend == GROQ:
+        with transcription_scheduler.job(route, duration) as job:
+            start = time.perf_counter()
+            uploads, mode = _groq_uploads(audio_path, chunks)
+            encode_time = time.perf_counter() - start
+            upload_bytes = sum(len(data) for data, _ in uploads)
+            job.started()
+            results = _transcribe_groq(uploads)
+            if results is None:
+                job.failed()
+        if results is None:
+            route = transcription_scheduler.route(
+                duration, allow_groq=False, model_size=model_size
+            )
+
+    origin = Origin.GROQ
+    if results is None:
+        origin = Origin.CPU
+        with transcription_scheduler.job(route, duration) as job:
+            results = _transcribe_chunks_local(
+                chunks, route.model_size, on_progress, job
+            )
+
+    logger.info(
+        f"Transcribed {duration:.0f}s in {len(chunks)} chunks via {route.backend}: "
+        f"upload path={mode} {upload_bytes / 1e6:.2f}MB, encode {encode_time:.2f}s, "
+        f"total {time.perf_counter() - routed:.1f}s"
+    )
+    text = " ".join(text.strip() for text, _ in results if text)
+    return text, origin, results[0][1]
@@ -1,19 +1,31 @@
+import asyncio
 import logging
+import time
 
 from telegram import ForceReply, InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import ContextTypes
 import requests
 from bs4 import BeautifulSoup
 
-from domain.services import MessageService
-from providers.groq import GroqProvider
+from domain import ChatSummaryService, TldrSegment
+from providers.factory import ProviderError
+from providers.groq import CHAT_MODEL as GROQ_CHAT_MODEL, CHAT_SYSTEM_PROMPT
 from providers.serp import SerpProvider
-from providers.zai import ZAIProvider
+from providers.registry import providers
+from providers.cache import RESUME, content_key, llm_cache
+from providers.router import llm_router
+from providers.summarize import resume_summarizer
+from providers.tokens import count_tokens, fit_lines, token_budget
 from shared import reply_photo_safe, reply_text_safe
+from telegrambot.config import TLDR_CHUNK_SIZE, TLDR_CONCURRENCY, TLDR_MAX_MESSAGES
+from telegrambot.handlers.status import StatusEditor, tail_preview
+from telegrambot.handlers.streaming import render_stream
 from telegrambot.handlers.utils import is_valid_link, transcribe_audio
 
 logger = logging.getLogger(__name__)
-message_service = MessageService()
+chat_summaries = ChatSummaryService(chunk_size=TLDR_CHUNK_SIZE)
+
+RESUME_INSTRUCTIONS = "Resuma esse conteúdo em no máximo 150 palavras, não use emojis, responda sempre em português pt-br"
 
 
 def get_text_content(url: str) -> tuple[str, str] | None:
@@ -143,20 +155,29 @@ async def resume(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         save_to_db=False,
     )
 
+    status = StatusEditor(message)
+
+    def on_progress(text: str):
+        status.update_threadsafe(tail_preview(f"Transcrevendo...\n\n{text} …"))
+
     # Tenta primeiro como vídeo/áudio
     is_media = False
     try:
-        if is_valid_link(link):
+        if await asyncio.to_thread(is_valid_link, link):
             is_media = True
-            content = transcribe_audio(link, "base", "")
+            content = await asyncio.to_thread(
+                transcribe_audio, link, None, "", on_progress
+            )
         else:
             content = None
     except Exception:
         content = None
+    finally:
+        await status.close()
 
     # Se não for mídia ou falhou, tenta baixar texto
     if not content or not content[0]:
-        text_content = get_text_content(link)
+        text_content = await asyncio.to_thread(get_text_content, link)
         if text_content:
             text, title = text_content
             content = (text, title, "Texto")
@@ -167,21 +188,36 @@ async def resume(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
             )
             return
 
-    resume = ZAIProvider().chat(
-        f"<system_prompt>Resuma esse conteúdo em no máximo 150 palavras, não use emojis, responda sempre em português pt-br</system_prompt><input>title: {content[1]}\ncontent: {content[0]}</input>"
-    )
-
     if is_media:
         source_text = f"Transcrição de {content[2]}"
     else:
         source_text = "Texto do site"
 
-    final_text = f"""{user.mention_markdown()} segue o seu resumo de *{content[1]}* :
+    def render(resume: str) -> str:
+        return f"""{user.mention_markdown()} segue o seu resumo de *{content[1]}* :
         -_{resume}_
 
         - Fonte: *{source_text}*
         """
-    await message.edit_text(final_text, parse_mode="markdown")
+
+    # O resumo aparece na mensagem de status conforme é gerado; o mesmo
+    # conteúdo do mesmo link (canônico) reaproveita o resumo já feito
+    # conteúdo longo é resumido em partes (map-reduce) antes do resumo final
+    result = await render_stream(
+        message,
+        llm_cache.astream(
+            content_key(link, content[0], llm_router.model, RESUME_INSTRUCTIONS),
+            RESUME,
+            lambda: resume_summarizer.astream(
+                content[1], content[0], RESUME_INSTRUCTIONS
+            ),
+            model=llm_router.model,
+        ),
+        render=render,
+    )
+    if not result.text:
+        return
+    final_text = render(result.text)
 
     await reply_text_safe(
         update.message,
@@ -266,7 +302,7 @@ async def tldr(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if not context.args:
         await reply_text_safe(
             message,
-            "Use /tldr <número> (máximo 300).",
+            f"Use /tldr <número> (máximo {TLDR_MAX_MESSAGES}).",
             message_type="error",
             save_to_db=False,
         )
@@ -292,7 +328,8 @@ async def tldr(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         )
         return
 
-    limit = min(limit, 300)
+    limit = min(limit, TLDR_MAX_MESSAGES)
+    started = time.monotonic()
     status_message = await reply_text_safe(
         message,
         f"Resumindo as últimas {limit} mensagens...",
@@ -300,38 +337,50 @@ async def tldr(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         save_to_db=False,
     )
 
-    messages = message_service.get_last_messages(message.chat_id, limit=limit + 1)
-    messages = [m for m in messages if m.platform_message_id != message.message_id][:limit]
+    segments = await asyncio.to_thread(
+        chat_summaries.plan,
+        message.chat_id,
+        limit,
+        exclude_platform_message_id=message.message_id,
+    )
 
-    if not messages:
+    if not segments:
         await status_message.edit_text("Não encontrei mensagens suficientes pra resumir.")
         return
 
-    transcript_lines = []
-    for item in reversed(messages):
-        sender = item.from_user or "Unknown"
-        text = (item.text or "").strip()
-        if not text:
-            continue
-        transcript_lines.append(f"{sender}: {text}")
-
-    if not transcript_lines:
+    if not any(segment.lines or segment.summary for segment in segments):
         await status_message.edit_text("Não encontrei texto útil pra resumir.")
         return
 
-    prompt = (
-        "Faça um resumo geral, em português brasileiro, do que foi falado "
-        "nestas mensagens de um grupo. Destaque os principais assuntos, decisões, "
-        "piadas/contextos recorrentes e qualquer pendência. Seja direto.\n\n"
-        + "\n".join(transcript_lines)
-    )
+    # antes de selar: depois disso as janelas novas só têm o resumo
+    raw_tokens, compact_tokens = await asyncio.to_thread(line_tokens, segments)
 
     try:
-        summary = GroqProvider().chat(prompt).strip()
+        sealed = await summarize_chunks(message.chat_id, segments)
+    except ProviderError as e:
+        logger.error(f"Error summarizing TLDR chunks: {e}")
+        await status_message.edit_text("Não consegui gerar o resumo agora.")
+        return
+
+    prompt = await asyncio.to_thread(tldr_prompt, segments)
+    prompt_tokens = await asyncio.to_thread(count_tokens, prompt, GROQ_CHAT_MODEL)
+
+    llm_started = time.monotonic()
+    try:
+        summary = (await providers.groq().achat(prompt)).strip()
     except Exception as e:
         logger.error(f"Error generating TLDR with Groq: {e}", exc_info=True)
         await status_message.edit_text("Não consegui gerar o resumo agora.")
         return
+    logger.info(
+        f"TLDR of {limit} messages in {time.monotonic() - started:.1f}s "
+        f"(final LLM call {time.monotonic() - llm_started:.1f}s): "
+        f"{sum(s.message_count for s in segments if s.summary is not None) - sealed} "
+        f"from stored chunks, {sealed} newly summarized; message lines "
+        f"{raw_tokens} -> {compact_tokens} tokens "
+        f"({raw_tokens - compact_tokens} saved by compaction), "
+        f"final prompt {prompt_tokens} tokens"
+    )
 
     if len(summary) > 4000:
         summary = summary[:3997] + "..."
@@ -342,6 +391,93 @@ async def tldr(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         await status_message.edit_text(summary)
 
 
+TLDR_INSTRUCTIONS = (
+    "Faça um resumo geral, em português brasileiro, do que foi falado "
+    "nestas mensagens de um grupo. Destaque os principais assuntos, decisões, "
+    "piadas/contextos recorrentes e qualquer pendência. Seja direto."
+)
+TLDR_CHUNK_INSTRUCTIONS = (
+    "Resuma este trecho da conversa de um grupo em português brasileiro, em "
+    "até 80 palavras. Mantenha nomes, assuntos, decisões e pendências; "
+    "responda só com o resumo, em texto simples."
+)
+# Tokens reservados para as respostas dentro do orçamento do modelo
+TLDR_RESPONSE_TOKENS = 1000
+TLDR_CHUNK_RESPONSE_TOKENS = 200
+
+
+async def summarize_chunks(chat_id: int, segments: list[TldrSegment]) -> int:
+    """Resume e guarda as janelas completas ainda sem resumo.
+
+    Returns how many messages were summarized. Windows that succeed are
+    stored even if another one fails, so the next /tldr reuses them.
+    """
+    semaphore = asyncio.Semaphore(TLDR_CONCURRENCY)
+    budget = token_budget(
+        GROQ_CHAT_MODEL,
+        TLDR_CHUNK_RESPONSE_TOKENS + count_tokens(TLDR_CHUNK_INSTRUCTIONS, GROQ_CHAT_MODEL),
+    )
+
+    async def summarize(segment: TldrSegment) -> None:
+        if segment.lines:
+            lines = fit_lines(segment.lines, budget, GROQ_CHAT_MODEL)
+            async with semaphore:
+                summary = await providers.groq().acomplete(
+                    TLDR_CHUNK_INSTRUCTIONS, "\n".join(lines)
+                )
+            segment.summary = summary.strip()
+        else:
+            segment.summary = ""
+        await asyncio.to_thread(chat_summaries.save_chunk, chat_id, segment)
+
+    pending = [segment for segment in segments if segment.seal]
+    results = await asyncio.gather(
+        *(summarize(segment) for segment in pending), return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return sum(segment.message_count for segment in pending)
+
+
+def line_tokens(segments: list[TldrSegment]) -> tuple[int, int]:
+    """Tokens das linhas cruas das mensagens, sem e com compactação."""
+    raw = sum(
+        count_tokens("\n".join(s.raw_lines), GROQ_CHAT_MODEL) for s in segments if s.lines
+    )
+    compact = sum(
+        count_tokens("\n".join(s.lines), GROQ_CHAT_MODEL) for s in segments if s.lines
+    )
+    return raw, compact
+
+
+def tldr_prompt(segments: list[TldrSegment]) -> str:
+    """Resumos dos trechos já fechados e as mensagens cruas, em ordem.
+
+    Lines are cut from the oldest end to fit the Groq model token budget,
+    leaving room for the system prompt and the answer.
+    """
+    lines = []
+    for segment in segments:
+        if segment.summary is not None:
+            if segment.summary:
+                lines.append(f"[Resumo de {segment.message_count} mensagens] {segment.summary}")
+        else:
+            lines.extend(segment.lines)
+    header = (
+        TLDR_INSTRUCTIONS
+        + " Linhas marcadas com [Resumo ...] já resumem trechos anteriores da conversa."
+    )
+    budget = token_budget(
+        GROQ_CHAT_MODEL,
+        TLDR_RESPONSE_TOKENS + count_tokens(CHAT_SYSTEM_PROMPT + header, GROQ_CHAT_MODEL),
+    )
+    kept = fit_lines(lines, budget, GROQ_CHAT_MODEL)
+    if len(kept) < len(lines):
+        logger.info(f"TLDR prompt over budget, dropped {len(lines) - len(kept)} oldest lines")
+    return header + "\n\n" + "\n".join(kept)
+
+
 async def online_agora(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Lista os usuários online no Discord com seus status."""
     import os
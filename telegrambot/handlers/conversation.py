@@ -0,0 +1,326 @@
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from domain import MessageService, compact_messages
+from providers.groq import CHAT_MODEL as GROQ_CHAT_MODEL
+from providers.tokens import count_tokens, fit_lines
+from telegrambot.config import (
+    CONVERSATION_CACHE_TTL,
+    CONVERSATION_MAX_CHATS,
+    CONVERSATION_MAX_DEPTH,
+    CONVERSATION_MAX_TOKENS,
+    CONVERSATION_RECENT_TURNS,
+    CONVERSATION_WINDOW,
+)
+
+logger = logging.getLogger(__name__)
+
+BOT_SENDER = "Bot"
+
+
+@dataclass(frozen=True)
+class Turn:
+    message_id: int
+    from_user: str
+    text: str
+    reply_to: Optional[int] = None
+    message_type: Optional[str] = None
+
+    @property
+    def line(self) -> str:
+        return f"{self.from_user}: {' '.join(self.text.split())}"
+
+
+@dataclass(frozen=True)
+class MentionPrompt:
+    # o que vai para o LLM
+    prompt: str
+    # menção + thread, sem a conversa recente (que muda a cada mensagem):
+    # é o que identifica a pergunta no cache de respostas
+    cache_text: str
+
+
+class ConversationContext:
+    """Contexto das menções ao bot: cadeia de respostas e conversa recente.
+
+    Every message seen by the catch-all handler goes into a bounded window
+    per chat, and the bot's answers are added once they finish streaming.
+    A mention's reply chain is walked through that window, falling back to
+    the database for older messages, and each assembled chain is cached by
+    message id: a follow-up replying to the bot extends the cached thread
+    without touching the database. The prompt keeps the mention, then the
+    nearest chain turns, then recent turns, while they fit in
+    ``max_tokens``.
+    """
+
+    def __init__(
+        self,
+        message_service: Optional[MessageService] = None,
+        window: int = CONVERSATION_WINDOW,
+        recent_turns: int = CONVERSATION_RECENT_TURNS,
+        max_depth: int = CONVERSATION_MAX_DEPTH,
+        max_tokens: int = CONVERSATION_MAX_TOKENS,
+        cache_ttl: float = CONVERSATION_CACHE_TTL,
+        max_chats: int = CONVERSATION_MAX_CHATS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.message_service = message_service or MessageService()
+        self.window = window
+        self.recent_turns = recent_turns
+        self.max_depth = max_depth
+        self.max_tokens = max_tokens
+        self.cache_ttl = cache_ttl
+        self.max_chats = max_chats
+        self.clock = clock
+        self.windows: OrderedDict[int, deque[Turn]] = OrderedDict()
+        # chats cuja janela já foi completada com o histórico do banco
+        self.seeded: set[int] = set()
+        # (chat_id, message_id) -> (expira em, cadeia terminando nessa mensagem)
+        self.chains: OrderedDict[tuple[int, int], tuple[float, tuple[Turn, ...]]] = (
+            OrderedDict()
+        )
+        self.max_chains = max_chats * window
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.db_lookups = 0
+
+    def _window(self, chat_id: int) -> deque[Turn]:
+        window = self.windows.get(chat_id)
+        if window is None:
+            window = self.windows[chat_id] = deque(maxlen=self.window)
+            while len(self.windows) > self.max_chats:
+                evicted, _ = self.windows.popitem(last=False)
+                self.seeded.discard(evicted)
+        else:
+            self.windows.move_to_end(chat_id)
+        return window
+
+    def record(
+        self,
+        chat_id: int,
+        message_id: int,
+        from_user: Optional[str],
+        text: Optional[str],
+        reply_to: Optional[int] = None,
+        message_type: Optional[str] = None,
+    ) -> Turn:
+        """Guarda uma mensagem na janela do chat (edições substituem a original)."""
+        turn = Turn(message_id, from_user or "Unknown", text or "", reply_to, message_type)
+        with self.lock:
+            window = self._window(chat_id)
+            for index, old in enumerate(window):
+                if old.message_id == message_id:
+                    window[index] = Turn(
+                        message_id, turn.from_user, turn.text, old.reply_to, old.message_type
+                    )
+                    # o texto antigo pode estar em threads montadas
+                    for key in [key for key in self.chains if key[0] == chat_id]:
+                        del self.chains[key]
+                    break
+            else:
+                window.append(turn)
+        return turn
+
+    def record_answer(self, chat_id: int, message_id: int, text: str, reply_to: int) -> None:
+        """Guarda a resposta do bot e estende a thread da menção respondida."""
+        turn = self.record(chat_id, message_id, BOT_SENDER, text, reply_to, "ai_response")
+        with self.lock:
+            chain = self._cached(chat_id, reply_to)
+        if chain is not None:
+            self._store(chat_id, message_id, chain + (turn,))
+
+    def _cached(self, chat_id: int, message_id: int) -> Optional[tuple[Turn, ...]]:
+        entry = self.chains.get((chat_id, message_id))
+        if entry is None:
+            return None
+        expires, chain = entry
+        if expires < self.clock():
+            del self.chains[(chat_id, message_id)]
+            return None
+        self.chains.move_to_end((chat_id, message_id))
+        return chain
+
+    def _store(self, chat_id: int, message_id: int, chain: tuple[Turn, ...]) -> None:
+        with self.lock:
+            self.chains[(chat_id, message_id)] = (self.clock() + self.cache_ttl, chain)
+            self.chains.move_to_end((chat_id, message_id))
+            while len(self.chains) > self.max_chains:
+                self.chains.popitem(last=False)
+
+    @staticmethod
+    def _from_entity(entity) -> Turn:
+        sender = BOT_SENDER if entity.message_type == "ai_response" else entity.from_user
+        return Turn(
+            entity.platform_message_id,
+            sender or "Unknown",
+            entity.text or "",
+            entity.reply_to_message_id,
+            entity.message_type,
+        )
+
+    def _find(self, chat_id: int, message_id: int) -> Optional[Turn]:
+        with self.lock:
+            for turn in self.windows.get(chat_id, ()):
+                if turn.message_id == message_id:
+                    return turn
+        self.db_lookups += 1
+        try:
+            entity = self.message_service.get_chat_message(chat_id, message_id)
+        except Exception as e:
+            logger.error(f"Failed to load message for conversation context: {e}")
+            return None
+        return self._from_entity(entity) if entity else None
+
+    def chain(self, chat_id: int, message_id: int) -> tuple[Turn, ...]:
+        """A thread de respostas terminando em ``message_id``, da mais antiga.
+
+        The walk stops at the first message whose thread is cached.
+        """
+        turns: list[Turn] = []
+        prefix: tuple[Turn, ...] = ()
+        seen: set[int] = set()
+        current: Optional[int] = message_id
+        while current is not None and current not in seen and len(turns) < self.max_depth:
+            with self.lock:
+                cached = self._cached(chat_id, current)
+            if cached is not None:
+                prefix = cached
+                break
+            turn = self._find(chat_id, current)
+            if turn is None:
+                break
+            seen.add(current)
+            turns.append(turn)
+            current = turn.reply_to
+        if prefix:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+        chain = (prefix + tuple(reversed(turns)))[-self.max_depth :]
+        if chain:
+            self._store(chat_id, message_id, chain)
+        return chain
+
+    def recent(self, chat_id: int, exclude: set[int]) -> list[Turn]:
+        """Últimas mensagens do chat, completando a janela pelo banco uma vez."""
+        with self.lock:
+            window = list(self.windows.get(chat_id, ()))
+            seed = chat_id not in self.seeded and len(window) < self.window
+            if seed:
+                self.seeded.add(chat_id)
+        if seed:
+            self.db_lookups += 1
+            try:
+                rows = self.message_service.get_last_messages(chat_id, limit=self.window)
+            except Exception as e:
+                logger.error(f"Failed to load recent messages for conversation context: {e}")
+                rows = []
+            with self.lock:
+                current = self._window(chat_id)
+                known = {turn.message_id for turn in current}
+                older = [
+                    self._from_entity(row)
+                    for row in reversed(rows)
+                    if row.platform_message_id not in known
+                ]
+                # o deque mantém só as ``window`` mais novas
+                merged = older + list(current)
+                current.clear()
+                current.extend(merged)
+                window = list(current)
+        turns = [turn for turn in window if turn.message_id not in exclude]
+        return turns[-self.recent_turns :] if self.recent_turns else []
+
+    def build(
+        self,
+        chat_id: int,
+        message_id: int,
+        from_user: Optional[str],
+        text: str,
+        reply_to: Optional[int] = None,
+        reply_seed: Optional[Turn] = None,
+    ) -> MentionPrompt:
+        """Prompt da menção com a thread e a conversa recente do chat.
+
+        ``reply_seed`` is the replied message as Telegram sent it, used
+        when it is neither in the window nor in the database. The cache
+        text leaves the recent turns out, so the same question in the same
+        thread still hits the response cache.
+        """
+        mention = Turn(message_id, from_user or "Unknown", text, reply_to)
+        chain = self.chain(chat_id, reply_to) if reply_to is not None else ()
+        if not chain and reply_seed is not None:
+            chain = (reply_seed,)
+        self._store(chat_id, message_id, (chain + (mention,))[-self.max_depth :])
+
+        exclude = {turn.message_id for turn in chain} | {message_id}
+        recent = self.recent(chat_id, exclude)
+        return self.render(chain, mention, recent)
+
+    def render(
+        self, chain: tuple[Turn, ...], mention: Turn, recent: list[Turn]
+    ) -> MentionPrompt:
+        mention_line = mention.line
+        budget = self.max_tokens - count_tokens(mention_line, GROQ_CHAT_MODEL)
+        chain_lines = fit_lines([turn.line for turn in chain], budget, GROQ_CHAT_MODEL)
+        budget -= sum(count_tokens(line, GROQ_CHAT_MODEL) + 1 for line in chain_lines)
+        recent_lines = fit_lines(compact_messages(recent), budget, GROQ_CHAT_MODEL)
+
+        thread = []
+        if chain_lines:
+            thread.append("Conversa respondida:\n" + "\n".join(chain_lines))
+        thread.append(mention_line)
+        cache_text = "\n\n".join(thread) if chain_lines else mention.text
+
+        if not chain_lines and not recent_lines:
+            return MentionPrompt(mention.text, cache_text)
+        parts = []
+        if recent_lines:
+            parts.append("Mensagens recentes do chat:\n" + "\n".join(recent_lines))
+        return MentionPrompt("\n\n".join(parts + thread), cache_text)
+
+    def metrics(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "chats": len(self.windows),
+            "threads": len(self.chains),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "db_lookups": self.db_lookups,
+        }
+
+
+def _sender(message) -> Optional[str]:
+    if message.from_user:
+        return message.from_user.username or message.from_user.first_name
+    return None
+
+
+def mention_prompt(message) -> MentionPrompt:
+    """Prompt de uma menção ao bot, com o contexto da conversa."""
+    reply = message.reply_to_message
+    seed = None
+    if reply is not None and (reply.text or reply.caption):
+        seed = Turn(reply.message_id, _sender(reply) or "Unknown", reply.text or reply.caption)
+    return conversations.build(
+        message.chat_id,
+        message.message_id,
+        _sender(message),
+        message.text,
+        reply_to=reply.message_id if reply is not None else None,
+        reply_seed=seed,
+    )
+
+
+conversations = ConversationContext()
@@ -2,6 +2,10 @@ class VideoNotFound(Exception):
     pass
 
 
+class MediaTooLarge(Exception):
+    pass
+
+
 import logging
 
 from telegram import Update
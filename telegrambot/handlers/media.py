@@ -1,68 +1,87 @@
+import asyncio
 import io
 import sys
 from html import escape
 from pathlib import Path
 
-import requests
-from PIL import Image
-
 sys.path.append(str(Path(__file__).parent.parent))
 
 from telegram import Update
 from telegram.ext import CallbackContext
 
+from domain import MediaShareService
 from shared import reply_text_safe, reply_video_safe
-from telegrambot.handlers.utils import get_media_from_link
+from telegrambot.handlers.status import StatusEditor
+from telegrambot.handlers.thumbnails import fetch_thumbnail
+from telegrambot.handlers.utils import download_media, get_thumbnail_url, probe_link
+
+media_share_service = MediaShareService()
 
 
 async def get_media(update: Update, context: CallbackContext):
     link = update.message.text
     user = update.effective_user
+    chat_id = update.message.chat_id
+    # Os metadados são extraídos enquanto a mensagem de status é enviada
+    probe_task = asyncio.create_task(asyncio.to_thread(probe_link, link))
+    try:
+        previous_shares = media_share_service.get_previous_shares(link, chat_id, limit=1)
 
-    status_message = await reply_text_safe(
-        update.message,
-        "Baixando mídia...",
-        message_type="status",
-        save_to_db=False,
-    )
+        status_message = await reply_text_safe(
+            update.message,
+            "Baixando mídia...",
+            message_type="status",
+            save_to_db=False,
+        )
+    except BaseException:
+        # ninguém vai aguardar o probe: cancela para não deixar a task solta
+        probe_task.cancel()
+        raise
+
+    status = StatusEditor(status_message)
 
+    def on_transcode_progress(progress: float):
+        status.update_threadsafe(f"🗜️ Comprimindo vídeo... {progress:.0%}")
+
+    thumb_task = None
     try:
-        media = get_media_from_link(link)
+        info = await probe_task
+        # A thumbnail é baixada e convertida em paralelo com o vídeo
+        thumb_task = asyncio.create_task(
+            asyncio.to_thread(fetch_thumbnail, get_thumbnail_url(info))
+        )
+        video_buffer = await asyncio.to_thread(
+            download_media, info, on_transcode_progress
+        )
     except Exception as e:
-        await status_message.edit_text(f"❌ Erro ao baixar mídia: {str(e)}")
+        if thumb_task:
+            thumb_task.cancel()
+        await status.finish(f"❌ Erro ao baixar mídia: {str(e)}")
         return
 
-    if not media:
-        await status_message.edit_text("❌ Erro: mídia não encontrada")
-        return
-
-    video_buffer = media[0]
     video_buffer.seek(0)  # Garante que o buffer está no início
 
-    caption = media[1] if media[1] else "Sem título"
-    thumbnail_url = media[2]
+    caption = info.get("title") or "Sem título"
     user_mention = user.mention_html() if user else "Unknown"
     final_caption = (
         f"<b>{escape(caption)}</b>\n\n"
         f'<a href="{escape(link)}">🔗 Link</a>\n'
         f" Enviado por {user_mention}"
     )
+    if previous_shares:
+        first = previous_shares[0]
+        final_caption += (
+            f"\n🔁 Repetido! Já enviado por {escape(first.sender)} "
+            f"em {first.created_at:%d/%m/%Y %H:%M}"
+        )
 
-    await status_message.edit_text("📤 Enviando vídeo...")
+    await status.finish("📤 Enviando vídeo...")
 
     thumb_buffer = None
-    if thumbnail_url:
-        try:
-            thumb_response = requests.get(thumbnail_url, timeout=10)
-            if thumb_response.status_code == 200 and thumb_response.content:
-                img = Image.open(io.BytesIO(thumb_response.content))
-                jpeg_buffer = io.BytesIO()
-                img.convert("RGB").save(jpeg_buffer, format="JPEG", quality=85)
-                thumb_buffer = jpeg_buffer
-                thumb_buffer.name = "thumb.jpg"
-                thumb_buffer.seek(0)
-        except Exception:
-            pass
+    thumb_jpeg = await thumb_task
+    if thumb_jpeg:
+        thumb_buffer = io.BytesIO(thumb_jpeg)
+        thumb_buffer.name = "thumb.jpg"
 
     try:
         if thumb_buffer and thumb_buffer.getbuffer().nbytes > 0:
@@ -85,6 +104,8 @@ async def get_media(update: Update, context: CallbackContext):
             )
         video_buffer.close()
         await status_message.delete()
+        sender = (user.username or user.first_name) if user else "Unknown"
+        media_share_service.record_share(link, sender, chat_id)
     except Exception as e:
         await status_message.edit_text(
             f"❌ Erro ao enviar o vídeo: {str(e)}"
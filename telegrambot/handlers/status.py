@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from telegram import Message
+from telegram.error import BadRequest, RetryAfter
+
+logger = logging.getLogger(__name__)
+
+# Telegram tolera ~1 edição por segundo por chat antes de devolver RetryAfter
+MIN_EDIT_INTERVAL = 1.5
+MAX_MESSAGE_LENGTH = 4096
+
+
+def tail_preview(text: str, limit: int = MAX_MESSAGE_LENGTH - 96) -> str:
+    """Final de um texto parcial que cabe numa mensagem, com reticências."""
+    if len(text) <= limit:
+        return text
+    return "…" + text[-(limit - 1):]
+
+
+class StatusEditor:
+    """Rate-limited editor for a bot status message.
+
+    Intermediate updates are coalesced: only the latest text is sent once the
+    edit interval has passed. ``update_threadsafe`` lets worker threads (yt-dlp,
+    ffmpeg, whisper) report progress without touching the event loop directly.
+    With ``parse_mode``, an update Telegram cannot parse (e.g. half-written
+    Markdown) is sent as plain text instead of being dropped.
+    """
+
+    def __init__(
+        self,
+        message: Message,
+        min_interval: float = MIN_EDIT_INTERVAL,
+        parse_mode: Optional[str] = None,
+    ):
+        self.message = message
+        self.min_interval = min_interval
+        self.parse_mode = parse_mode
+        self._loop = asyncio.get_running_loop()
+        self._last_edit = 0.0
+        self._last_text: Optional[str] = None
+        self._pending: Optional[str] = None
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def update(self, text: str) -> None:
+        """Schedules an edit; must be called from the event loop."""
+        self._pending = text
+        if self._flush_task is None:
+            delay = max(0.0, self._last_edit + self.min_interval - time.monotonic())
+            self._flush_task = self._loop.create_task(self._flush_after(delay))
+
+    def update_threadsafe(self, text: str) -> None:
+        self._loop.call_soon_threadsafe(self.update, text)
+
+    async def finish(self, text: str, **kwargs) -> None:
+        """Cancels pending updates and performs a final, immediate edit."""
+        self._cancel_pending()
+        await self._edit(text, raise_errors=True, **kwargs)
+
+    async def close(self) -> None:
+        self._cancel_pending()
+
+    def _cancel_pending(self) -> None:
+        self._pending = None
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+
+    async def _flush_after(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        self._flush_task = None
+        text, self._pending = self._pending, None
+        if text is None:
+            return
+        if self.parse_mode is None:
+            await self._edit(text)
+            return
+        try:
+            await self._edit(text, raise_errors=True, parse_mode=self.parse_mode)
+        except BadRequest:
+            await self._edit(text)
+        except RetryAfter:
+            pass
+
+    async def _edit(self, text: str, raise_errors: bool = False, **kwargs) -> None:
+        if text == self._last_text and not kwargs:
+            return
+        self._last_edit = time.monotonic()
+        try:
+            await self.message.edit_text(text, **kwargs)
+            self._last_text = text
+        except RetryAfter as e:
+            retry_after = e.retry_after
+            if hasattr(retry_after, "total_seconds"):
+                retry_after = retry_after.total_seconds()
+            logger.warning(f"Status edit rate limited, backing off {retry_after}s")
+            self._last_edit = time.monotonic() + float(retry_after)
+            if raise_errors:
+                raise
+        except BadRequest as e:
+            if "not modified" in str(e).lower():
+                self._last_text = text
+                return
+            if raise_errors:
+                raise
+            logger.warning(f"Could not edit status message: {e}")
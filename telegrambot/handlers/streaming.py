@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import time
+from contextlib import aclosing
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Optional
+
+from telegram import Message
+from telegram.error import BadRequest, RetryAfter
+
+from providers.factory import ProviderError
+from telegrambot.handlers.status import MAX_MESSAGE_LENGTH, StatusEditor, tail_preview
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER = "Pensando…"
+CURSOR = " ▌"
+FAILED_TEXT = "Não consegui responder agora."
+INTERRUPTED_NOTE = "\n\n(resposta interrompida)"
+
+
+@dataclass
+class StreamResult:
+    text: str
+    # segundos desde o início do pedido; None se nenhum token chegou
+    first_token: Optional[float]
+    total: float
+    chunks: int
+    error: Optional[ProviderError] = None
+
+
+def close_markdown(text: str) -> str:
+    """Fecha as entidades Markdown (legado do Telegram) abertas num texto parcial.
+
+    Unclosed code blocks, inline code, bold and italics get their closing
+    marker; a dangling marker at the very end or an unfinished link is cut,
+    since Telegram rejects empty entities and links without a URL.
+    """
+    if text.count("```") % 2:
+        return text + "\n```"
+    stack: list[str] = []
+    link_start: Optional[int] = None
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if text.startswith("```", i):
+            i = text.find("```", i + 3) + 3
+            continue
+        if stack and stack[-1] == "`":
+            if char == "`":
+                stack.pop()
+        elif char == "`" or char in "*_":
+            if stack and stack[-1] == char:
+                stack.pop()
+            else:
+                stack.append(char)
+        elif char == "[" and link_start is None:
+            link_start = i
+        elif char == ")" and link_start is not None:
+            link_start = None
+        i += 1
+    if link_start is not None:
+        return close_markdown(text[:link_start].rstrip())
+    while stack and text.endswith(stack[-1]):
+        text = text[:-1]
+        stack.pop()
+    return text + "".join(reversed(stack))
+
+
+async def render_stream(
+    message: Message,
+    chunks: AsyncIterator[str],
+    render: Callable[[str], str] = lambda text: text,
+    parse_mode: Optional[str] = "markdown",
+    started: Optional[float] = None,
+) -> StreamResult:
+    """Edita ``message`` conforme os pedaços chegam e deixa a resposta final.
+
+    Edits are coalesced by ``StatusEditor`` to respect Telegram's edit rate
+    limit; intermediate ones show the tail of the text with its Markdown
+    closed and a cursor. ``render`` wraps the accumulated text (e.g. in a
+    template) before it is shown. Text longer than a message continues in
+    replies. Time to first token and total latency are logged and returned.
+    """
+    started = started if started is not None else time.monotonic()
+    status = StatusEditor(message, parse_mode=parse_mode)
+    text, first_token, count, error = "", None, 0, None
+    try:
+        async with aclosing(chunks) as stream:
+            async for piece in stream:
+                if first_token is None:
+                    first_token = time.monotonic() - started
+                text += piece
+                count += 1
+                preview = render(tail_preview(text, MAX_MESSAGE_LENGTH // 2))
+                if parse_mode is not None:
+                    preview = close_markdown(preview)
+                status.update(preview + CURSOR)
+    except ProviderError as e:
+        error = e
+    finally:
+        await status.close()
+
+    total = time.monotonic() - started
+    logger.info(
+        f"LLM stream: first token "
+        f"{f'{first_token:.2f}s' if first_token is not None else 'never'}, "
+        f"total {total:.2f}s, {count} chunks, {len(text)} chars"
+        + (f", error: {error}" if error else "")
+    )
+
+    if not text.strip():
+        await status.finish(FAILED_TEXT)
+        return StreamResult("", first_token, total, count, error)
+
+    final = render(text.strip()) + (INTERRUPTED_NOTE if error else "")
+    await send_final(status, message, split_message(final), parse_mode)
+    return StreamResult(text.strip(), first_token, total, count, error)
+
+
+def split_message(text: str) -> list[str]:
+    """Partes de até ``MAX_MESSAGE_LENGTH`` caracteres, em ordem."""
+    return [text[i:i + MAX_MESSAGE_LENGTH] for i in range(0, len(text), MAX_MESSAGE_LENGTH)]
+
+
+async def send_final(
+    status: StatusEditor, message: Message, parts: list[str], parse_mode: Optional[str]
+) -> None:
+    """Primeira parte na mensagem de status, o resto como respostas."""
+    try:
+        await status.finish(parts[0], parse_mode=parse_mode)
+    except RetryAfter as e:
+        # A resposta final não pode se perder: espera o limite e tenta de novo
+        retry_after = e.retry_after
+        if hasattr(retry_after, "total_seconds"):
+            retry_after = retry_after.total_seconds()
+        await asyncio.sleep(float(retry_after))
+        await send_final(status, message, parts, parse_mode)
+        return
+    except BadRequest as e:
+        logger.warning(f"Markdown parse error, sending without formatting: {e}")
+        await status.finish(parts[0])
+    for part in parts[1:]:
+        try:
+            await message.reply_text(part, parse_mode=parse_mode)
+        except BadRequest:
+            await message.reply_text(part)
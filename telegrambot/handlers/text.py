@@ -1,15 +1,20 @@
+import asyncio
 import logging
 import sys
+import time
 from pathlib import Path
+from typing import Optional
 
 sys.path.append(str(Path(__file__).parent.parent.parent))
 from telegram import Update
 from telegram.ext import CallbackContext
-from telegram.error import BadRequest
 
-from providers.zai import ZAIProvider
+from providers.cache import CHAT, llm_cache, prompt_key
+from providers.router import llm_router
 from shared import reply_text_safe
+from telegrambot.handlers.conversation import conversations, mention_prompt
 from telegrambot.handlers.media import get_media
+from telegrambot.handlers.streaming import PLACEHOLDER, render_stream
 from telegrambot.handlers.utils import is_allowed_link
 from domain import MessageService
 
@@ -49,38 +54,37 @@ async def text_handler(update: Update, context: CallbackContext):
         await get_media(update, context)
 
     if is_bot_mentioned(update):
-        if message.reply_to_message:
-            reply_message = message.reply_to_message.text
-            reply_message_user = (
-                message.reply_to_message.from_user.full_name
-                if message.reply_to_message.from_user
-                else "Unknown"
-            )
-            context_message = message.text
-            context_message_user = (
-                message.from_user.full_name if message.from_user else "Unknown"
+        # thread de respostas + conversa recente; pode consultar o banco
+        mention = await asyncio.to_thread(mention_prompt, message)
+        await reply_streaming(message, mention.prompt, cache_text=mention.cache_text)
+
+
+async def reply_streaming(message, prompt: str, cache_text: Optional[str] = None) -> None:
+    """Responde com um placeholder e o edita conforme a IA gera a resposta.
+
+    ``cache_text`` replaces the prompt in the response cache key, so parts
+    of the prompt that change with every message do not defeat the cache.
+    """
+    started = time.monotonic()
+    reply = await reply_text_safe(message, PLACEHOLDER, message_type="ai_response")
+    chunks = llm_cache.astream(
+        prompt_key(cache_text or prompt, llm_router.model),
+        CHAT,
+        lambda: llm_router.astream(prompt),
+        model=llm_router.model,
+    )
+    result = await render_stream(reply, chunks, started=started)
+    if result.text:
+        try:
+            # ids do Telegram só são únicos dentro do chat
+            await asyncio.to_thread(
+                message_service.update_chat_message_text,
+                message.chat_id,
+                reply.message_id,
+                result.text,
             )
-            full_prompt = f"{reply_message_user}: {reply_message}\n{context_message_user}: {context_message}"
-            ia_response = ZAIProvider().chat(full_prompt)
-            try:
-                await reply_text_safe(
-                    message,
-                    ia_response,
-                    parse_mode="markdown",
-                    message_type="ai_response",
-                )
-            except BadRequest as e:
-                logger.warning(f"Markdown parse error, sending without formatting: {e}")
-                await reply_text_safe(message, ia_response, message_type="ai_response")
-        else:
-            ia_response = ZAIProvider().chat(message.text)
-            try:
-                await reply_text_safe(
-                    message,
-                    ia_response,
-                    parse_mode="markdown",
-                    message_type="ai_response",
-                )
-            except BadRequest as e:
-                logger.warning(f"Markdown parse error, sending without formatting: {e}")
-                await reply_text_safe(message, ia_response, message_type="ai_response")
+        except Exception as e:
+            logger.error(f"Error saving AI response to database: {e}")
+        conversations.record_answer(
+            message.chat_id, reply.message_id, result.text, reply_to=message.message_id
+        )
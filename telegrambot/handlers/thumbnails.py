@@ -0,0 +1,63 @@
+import io
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import requests
+from PIL import Image
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_CACHE_SIZE = 32
+THUMBNAIL_TIMEOUT = 10
+
+# Sessão compartilhada: reaproveita conexões (DNS/TLS) com os CDNs de thumbnail
+http_session = requests.Session()
+http_session.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=8))
+http_session.mount("http://", HTTPAdapter(pool_connections=8, pool_maxsize=8))
+
+_cache: "OrderedDict[str, bytes]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _encode_jpeg(content: bytes) -> bytes:
+    img = Image.open(io.BytesIO(content))
+    jpeg_buffer = io.BytesIO()
+    img.convert("RGB").save(jpeg_buffer, format="JPEG", quality=85)
+    return jpeg_buffer.getvalue()
+
+
+def fetch_thumbnail(url: Optional[str]) -> Optional[bytes]:
+    """Baixa a thumbnail e devolve os bytes JPEG prontos para upload.
+
+    Blocking; meant to run on a worker thread while the video downloads.
+    Results are kept in a small LRU keyed by URL.
+    """
+    if not url:
+        return None
+
+    with _cache_lock:
+        if url in _cache:
+            _cache.move_to_end(url)
+            return _cache[url]
+
+    try:
+        response = http_session.get(url, timeout=THUMBNAIL_TIMEOUT)
+        if response.status_code != 200 or not response.content:
+            return None
+        jpeg = _encode_jpeg(response.content)
+    except Exception as e:
+        logger.debug(f"Thumbnail fetch failed for {url}: {e}")
+        return None
+
+    if not jpeg:
+        return None
+
+    with _cache_lock:
+        _cache[url] = jpeg
+        _cache.move_to_end(url)
+        while len(_cache) > THUMBNAIL_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return jpeg
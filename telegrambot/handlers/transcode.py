@@ -0,0 +1,199 @@
+import json
+import logging
+import os
+import subprocess
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from .errors import MediaTooLarge
+
+logger = logging.getLogger(__name__)
+
+# Limite de upload da Bot API para arquivos enviados pelo bot
+UPLOAD_LIMIT_BYTES = 50 * 1024 * 1024
+# Folga para overhead do container MP4 e variação do encoder em 1 passada
+SIZE_SAFETY_MARGIN = 0.92
+AUDIO_KBPS = 96
+MIN_VIDEO_KBPS = 150
+X264_PRESET = "veryfast"
+
+# Chaves do "-progress"; o resto da saída do ffmpeg são erros
+PROGRESS_KEYS = frozenset(
+    {
+        "frame", "fps", "bitrate", "total_size", "out_time_us", "out_time_ms",
+        "out_time", "dup_frames", "drop_frames", "speed", "progress",
+    }
+)
+
+# (bitrate mínimo de vídeo em kbps, altura máxima)
+RESOLUTION_LADDER = (
+    (1500, 720),
+    (800, 480),
+    (400, 360),
+    (0, 240),
+)
+
+
+@dataclass
+class MediaInfo:
+    duration: float
+    bit_rate: Optional[int]
+    width: Optional[int]
+    height: Optional[int]
+    audio_kbps: Optional[int]
+
+
+@dataclass
+class TranscodePlan:
+    video_kbps: int
+    audio_kbps: int
+    height: Optional[int]
+
+
+def probe_media(path: str) -> MediaInfo:
+    """Lê duração, bitrate e resolução com ffprobe."""
+    result = subprocess.run(
+        [
+            "ffprobe",
+            "-v", "error",
+            "-show_entries",
+            "format=duration,bit_rate:stream=codec_type,width,height,bit_rate",
+            "-of", "json",
+            path,
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+        timeout=30,
+    )
+    data = json.loads(result.stdout)
+    fmt = data.get("format", {})
+
+    width = height = audio_kbps = None
+    for stream in data.get("streams", []):
+        if stream.get("codec_type") == "video" and height is None:
+            width = stream.get("width")
+            height = stream.get("height")
+        elif stream.get("codec_type") == "audio" and stream.get("bit_rate"):
+            audio_kbps = int(stream["bit_rate"]) // 1000
+
+    return MediaInfo(
+        duration=float(fmt.get("duration") or 0),
+        bit_rate=int(fmt["bit_rate"]) if fmt.get("bit_rate") else None,
+        width=width,
+        height=height,
+        audio_kbps=audio_kbps,
+    )
+
+
+def plan_transcode(
+    info: MediaInfo, limit_bytes: int = UPLOAD_LIMIT_BYTES
+) -> TranscodePlan:
+    """Escolhe bitrate e altura alvo para o arquivo caber em ``limit_bytes``."""
+    if info.duration <= 0:
+        raise MediaTooLarge("Não foi possível ler a duração do vídeo")
+
+    total_kbps = int(limit_bytes * 8 * SIZE_SAFETY_MARGIN / info.duration / 1000)
+    audio_kbps = min(info.audio_kbps or AUDIO_KBPS, AUDIO_KBPS)
+    if info.height is None:
+        # só áudio: sem piso de vídeo nem escala, basta o áudio caber
+        if total_kbps < audio_kbps:
+            raise MediaTooLarge(
+                f"Áudio longo demais para caber em {limit_bytes // (1024 * 1024)} MB"
+            )
+        return TranscodePlan(video_kbps=0, audio_kbps=audio_kbps, height=None)
+
+    video_kbps = total_kbps - audio_kbps
+    if video_kbps < MIN_VIDEO_KBPS:
+        raise MediaTooLarge(
+            f"Vídeo longo demais para caber em {limit_bytes // (1024 * 1024)} MB"
+        )
+
+    height = next(h for min_kbps, h in RESOLUTION_LADDER if video_kbps >= min_kbps)
+    if info.height <= height:
+        height = None  # nunca aumenta a resolução
+    return TranscodePlan(video_kbps=video_kbps, audio_kbps=audio_kbps, height=height)
+
+
+def transcode(
+    src: str,
+    dst: str,
+    plan: TranscodePlan,
+    duration: float,
+    on_progress: Optional[Callable[[float], None]] = None,
+) -> None:
+    """Transcodifica com x264 rápido, reportando o progresso (0..1)."""
+    cmd = ["ffmpeg", "-y", "-v", "error", "-i", src]
+    if plan.height:
+        cmd += ["-vf", f"scale=-2:{plan.height}"]
+    if plan.video_kbps:
+        cmd += [
+            "-c:v", "libx264",
+            "-preset", X264_PRESET,
+            "-b:v", f"{plan.video_kbps}k",
+            "-maxrate", f"{plan.video_kbps}k",
+            "-bufsize", f"{plan.video_kbps * 2}k",
+        ]
+    else:
+        cmd += ["-vn"]
+    cmd += [
+        "-c:a", "aac",
+        "-b:a", f"{plan.audio_kbps}k",
+        "-movflags", "+faststart",
+        "-progress", "pipe:1",
+        "-nostats",
+        dst,
+    ]
+
+    # stderr no mesmo pipe: com dois pipes, erros acima do buffer do pipe
+    # travariam o ffmpeg enquanto lemos só o stdout
+    process = subprocess.Popen(
+        cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+    )
+    errors: deque[str] = deque(maxlen=20)
+    for line in process.stdout:
+        line = line.strip()
+        key, _, value = line.partition("=")
+        if key == "out_time_us" and on_progress and duration > 0:
+            try:
+                on_progress(min(int(value) / 1_000_000 / duration, 1.0))
+            except ValueError:
+                pass
+        elif line and key not in PROGRESS_KEYS and not key.startswith("stream_"):
+            errors.append(line)
+    if process.wait() != 0:
+        detail = "\n".join(errors)
+        raise RuntimeError(f"ffmpeg falhou: {detail[-500:]}")
+
+
+def fit_to_upload_limit(
+    path: str,
+    limit_bytes: int = UPLOAD_LIMIT_BYTES,
+    on_progress: Optional[Callable[[float], None]] = None,
+) -> str:
+    """Returns a path that fits the upload limit, transcoding only if needed."""
+    size = os.path.getsize(path)
+    if size <= limit_bytes:
+        return path
+
+    info = probe_media(path)
+    plan = plan_transcode(info, limit_bytes)
+    dst = os.path.splitext(path)[0] + ".fit.mp4"
+
+    start = time.perf_counter()
+    transcode(path, dst, plan, info.duration, on_progress)
+    new_size = os.path.getsize(dst)
+    logger.info(
+        f"Transcoded {size / 1e6:.1f}MB -> {new_size / 1e6:.1f}MB "
+        f"({plan.video_kbps}k, {plan.height or info.height}p) "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+
+    if new_size > limit_bytes:
+        raise MediaTooLarge(
+            f"Vídeo continua acima de {limit_bytes // (1024 * 1024)} MB após compressão"
+        )
+    os.remove(path)
+    return dst
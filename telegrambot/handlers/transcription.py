@@ -1,13 +1,84 @@
-import os
+import asyncio
+import io
+import logging
 import sys
+import time
 from pathlib import Path
+from typing import BinaryIO, Optional
 
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from telegram import Update
 from telegram.ext import CallbackContext
 
+from domain import SpeakerProfileService, TranscriptService
+from providers.factory import (
+    ProviderError,
+    ProviderRateLimitError,
+    ProviderTimeoutError,
+)
 from providers.groq import GroqProvider
+from providers.registry import providers
+from telegrambot.handlers.audio_encoding import voice_upload
+from telegrambot.handlers.kinds import Origin
+from telegrambot.handlers.status import StatusEditor, tail_preview
+from telegrambot.handlers.streaming import send_final, split_message
+from telegrambot.handlers.transcription_scheduler import (
+    GROQ,
+    TranscriptionJob,
+    transcription_scheduler,
+)
+from telegrambot.handlers.whisper_models import WhisperResult, whisper_models
+
+logger = logging.getLogger(__name__)
+
+transcript_service = TranscriptService()
+speaker_profiles = SpeakerProfileService()
+
+
+def get_groq() -> GroqProvider:
+    """Provider compartilhado: o cliente async mantém as conexões abertas."""
+    return providers.groq()
+
+
+def _error_message(error: Exception) -> str:
+    if isinstance(error, ProviderTimeoutError):
+        return "A transcrição demorou demais. Tente novamente."
+    if isinstance(error, ProviderRateLimitError):
+        return "Limite de transcrições atingido. Tente novamente em instantes."
+    return "Não foi possível transcrever o áudio."
+
+
+async def transcribe_local_streaming(
+    audio: BinaryIO,
+    model_size: str,
+    status: StatusEditor,
+    header: str,
+    job: Optional[TranscriptionJob] = None,
+    language: Optional[str] = None,
+) -> WhisperResult:
+    """Transcreve com o whisper local, editando o status a cada segmento.
+
+    ``language`` pins the language and skips detection.
+    """
+    start = time.perf_counter()
+    parts: list[str] = []
+
+    def on_segment(text: str):
+        if not parts:
+            logger.info(f"First local segment after {time.perf_counter() - start:.1f}s")
+        parts.append(text)
+        status.update_threadsafe(tail_preview(f"{header} {' '.join(parts)} …"))
+
+    return await asyncio.to_thread(
+        whisper_models.transcribe,
+        model_size,
+        audio,
+        on_segment=on_segment,
+        on_start=job.started if job else None,
+        language=language,
+        beam_size=5,
+    )
 
 
 async def transcription_handler(update: Update, context: CallbackContext):
@@ -25,19 +96,100 @@ async def transcription_handler(update: Update, context: CallbackContext):
         await status_message.edit_text("Tipo de mensagem não suportado.")
         return
 
+    # O mesmo áudio encaminhado de novo tem o mesmo file_unique_id
+    cache_key = f"tg:{attachment.file_unique_id}"
+    cached = transcript_service.get(cache_key)
+    if cached:
+        final_message = f"*{user.first_name}* disse: {cached.text}"
+        await send_final(
+            StatusEditor(status_message), message, split_message(final_message), "markdown"
+        )
+        return
+
+    # Tudo em memória: sem arquivos temporários disputados entre áudios
     _audio_file = await attachment.get_file()
+    buffer = io.BytesIO()
+    await _audio_file.download_to_memory(buffer)
 
-    file_path = f"/tmp/{_audio_file.file_id}.{file_ext}"
-    await _audio_file.download_to_drive(file_path)
+    duration = attachment.duration or 0
+    # Idioma fixado e menor modelo que já funcionou bem para essa pessoa
+    profile = speaker_profiles.get_profile(
+        message.chat_id, user.id, transcription_scheduler.local_models[::-1]
+    )
+    status = StatusEditor(status_message)
+    origin = Origin.GROQ
+    groq_error: Optional[ProviderError] = None
+    try:
+        route = await transcription_scheduler.aroute(
+            duration, model_size=profile.model_size
+        )
+        if route.backend == GROQ:
+            with transcription_scheduler.job(route, duration) as job:
+                job.started()
+                try:
+                    upload, filename = await asyncio.to_thread(
+                        voice_upload, buffer, file_ext
+                    )
+                    result = await get_groq().atranscribe_audio(
+                        upload, filename, language=profile.language
+                    )
+                    transcribed, language = result.text.strip(), result.language
+                except ProviderError as e:
+                    job.failed()
+                    groq_error = e
+            if groq_error:
+                logger.warning(
+                    f"Groq transcription failed, using local whisper: {groq_error}"
+                )
+                route = transcription_scheduler.route(
+                    duration, allow_groq=False, model_size=profile.model_size
+                )
 
-    transcribed = GroqProvider().transcribe_audio(file_path)
+        if route.backend != GROQ:
+            # Local: o texto aparece no status conforme os segmentos saem
+            origin = Origin.CPU
+            try:
+                buffer.seek(0)
+                with transcription_scheduler.job(route, duration) as job:
+                    local = await transcribe_local_streaming(
+                        buffer,
+                        route.model_size,
+                        status,
+                        f"{user.first_name} disse:",
+                        job,
+                        language=profile.language,
+                    )
+                transcribed, language = local.text.strip(), local.language
+                speaker_profiles.record(
+                    message.chat_id,
+                    user.id,
+                    route.model_size,
+                    local.language,
+                    local.language_probability,
+                    local.avg_logprob,
+                    pinned=profile.language is not None,
+                )
+            except Exception as local_error:
+                logger.error(f"Local transcription failed: {local_error}")
+                await status.finish(_error_message(groq_error or local_error))
+                return
+    except asyncio.CancelledError:
+        await status.finish("Transcrição cancelada.")
+        raise
+    finally:
+        await status.close()
 
     if not transcribed:
-        await status_message.edit_text("Não foi possível transcrever o áudio.")
-        os.remove(file_path)
+        await status.finish("Não foi possível transcrever o áudio.")
         return
 
+    transcript_service.put(
+        [cache_key],
+        transcribed,
+        language=language,
+        origin=origin.name,
+    )
     final_message = f"*{user.first_name}* disse: {transcribed}"
 
-    os.remove(file_path)
-    await status_message.edit_text(final_message, parse_mode="markdown")
+    # Transcrições longas continuam em outras mensagens; o cabeçalho fica na primeira
+    await send_final(status, message, split_message(final_message), "markdown")
@@ -0,0 +1,258 @@
+import asyncio
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Optional
+
+from providers.config import GROQ_API_KEY
+from providers.factory import RateLimiter
+from providers.groq import WHISPER_MODEL
+from providers.quota import quotas
+from telegrambot.config import (
+    GROQ_TRANSCRIBE_CONCURRENCY,
+    TRANSCRIBE_LATENCY_BUDGET,
+    WHISPER_LOCAL_MODELS,
+)
+
+from .whisper_models import whisper_models
+
+logger = logging.getLogger(__name__)
+
+GROQ = "groq"
+EWMA_ALPHA = 0.3
+# Estimativas iniciais de segundos de processamento por segundo de áudio
+# (CPU int8, um worker); as medições substituem esses valores aos poucos
+RTF_PRIORS = {"tiny": 0.05, "base": 0.1, "small": 0.3, "medium": 0.8, GROQ: 0.03}
+GROQ_OVERHEAD = 1.0
+
+
+def local_backend(model_size: str) -> str:
+    return f"local:{model_size}"
+
+
+@dataclass
+class Route:
+    backend: str
+    model_size: Optional[str]
+    expected_latency: float
+    # > 0 quando o job deve esperar a cota do Groq antes de rotear de novo
+    delay: float = 0.0
+
+
+@dataclass
+class BackendStats:
+    rtf: float
+    workers: int
+    overhead: float = 0.0
+    in_flight: int = 0
+    pending_audio: float = 0.0
+    jobs: int = 0
+    failures: int = 0
+    audio_seconds: float = 0.0
+    busy_seconds: float = 0.0
+    wait_seconds: float = 0.0
+
+    def expected_latency(self, audio_seconds: float) -> float:
+        """Fila (áudio pendente dividido entre os workers) mais o próprio job."""
+        return self.overhead + self.rtf * (
+            audio_seconds + self.pending_audio / self.workers
+        )
+
+
+class TranscriptionJob:
+    def __init__(self, route: Route, audio_seconds: float):
+        self.route = route
+        self.audio_seconds = audio_seconds
+        self.submitted = time.perf_counter()
+        self.started_at: Optional[float] = None
+        self.ok = True
+
+    def started(self) -> None:
+        """Marca o fim da espera; chamadas seguintes são ignoradas."""
+        if self.started_at is None:
+            self.started_at = time.perf_counter()
+
+    def failed(self) -> None:
+        self.ok = False
+
+
+class TranscriptionScheduler:
+    """Routes transcription jobs to Groq or a local whisper model.
+
+    Groq is used while its request quota lasts (by default the quota shared
+    by all processes, see ``providers.quota``). Without quota, a job either
+    waits for the next Groq slot or runs locally, whichever is expected to
+    finish first. Locally, the most accurate model whose expected latency
+    (queued audio plus the job itself, at the measured real-time factor)
+    fits the latency budget wins; otherwise the fastest one.
+    """
+
+    def __init__(
+        self,
+        local_models: list[str] = WHISPER_LOCAL_MODELS,
+        latency_budget: float = TRANSCRIBE_LATENCY_BUDGET,
+        groq_limiter: Optional[RateLimiter] = None,
+        groq_enabled: bool = bool(GROQ_API_KEY),
+    ):
+        self.local_models = local_models
+        self.latency_budget = latency_budget
+        self.groq_enabled = groq_enabled
+        self.groq_limiter = (
+            groq_limiter if groq_limiter is not None else quotas.limiter(GROQ, WHISPER_MODEL)
+        )
+        self.backends: dict[str, BackendStats] = {
+            GROQ: BackendStats(
+                rtf=RTF_PRIORS[GROQ],
+                workers=GROQ_TRANSCRIBE_CONCURRENCY,
+                overhead=GROQ_OVERHEAD,
+            )
+        }
+        self.lock = threading.Lock()
+
+    def _stats(self, backend: str) -> BackendStats:
+        stats = self.backends.get(backend)
+        if stats is None:
+            model_size = backend.split(":", 1)[1]
+            stats = BackendStats(
+                rtf=RTF_PRIORS.get(model_size, 0.5),
+                workers=whisper_models.num_workers,
+            )
+            self.backends[backend] = stats
+        return stats
+
+    def route(
+        self,
+        audio_seconds: float,
+        chunks: int = 1,
+        allow_groq: bool = True,
+        model_size: Optional[str] = None,
+    ) -> Route:
+        """Escolhe o backend; com rota Groq imediata a cota já fica reservada.
+
+        ``model_size`` pins the local model. ``chunks`` is the number of
+        Groq requests the job needs.
+        """
+        with self.lock:
+            local = self._best_local(audio_seconds, model_size)
+            if not (allow_groq and self.groq_enabled):
+                return local
+
+            groq = self._stats(GROQ)
+            expected = groq.expected_latency(audio_seconds)
+            if self.groq_limiter.try_acquire(chunks):
+                return Route(GROQ, None, expected)
+
+            delay = self.groq_limiter.reset_in(chunks)
+            if delay + expected < local.expected_latency:
+                return Route(GROQ, None, delay + expected, delay=delay)
+            return local
+
+    def _best_local(self, audio_seconds: float, model_size: Optional[str]) -> Route:
+        candidates = [
+            Route(
+                local_backend(size),
+                size,
+                self._stats(local_backend(size)).expected_latency(audio_seconds),
+            )
+            for size in ([model_size] if model_size else self.local_models)
+        ]
+        for candidate in candidates:
+            if candidate.expected_latency <= self.latency_budget:
+                return candidate
+        return min(candidates, key=lambda candidate: candidate.expected_latency)
+
+    def wait_route(self, audio_seconds: float, **kwargs) -> Route:
+        """Como ``route``, mas espera na fila do Groq quando for o caso."""
+        while True:
+            route = self.route(audio_seconds, **kwargs)
+            if not route.delay:
+                return route
+            time.sleep(route.delay)
+
+    async def aroute(self, audio_seconds: float, **kwargs) -> Route:
+        while True:
+            # a cota fica no SQLite: consulta fora do event loop
+            route = await asyncio.to_thread(self.route, audio_seconds, **kwargs)
+            if not route.delay:
+                return route
+            await asyncio.sleep(route.delay)
+
+    @contextmanager
+    def job(self, route: Route, audio_seconds: float):
+        """Registers a job on its backend for queue depth and metrics.
+
+        Call ``job.started()`` when the work actually begins (e.g. when a
+        whisper slot frees up); the time before that counts as waiting.
+        """
+        job = TranscriptionJob(route, audio_seconds)
+        with self.lock:
+            stats = self._stats(route.backend)
+            stats.in_flight += 1
+            stats.pending_audio += audio_seconds
+        try:
+            yield job
+        except BaseException:
+            job.failed()
+            raise
+        finally:
+            self._finish(job)
+
+    def _finish(self, job: TranscriptionJob) -> None:
+        done = time.perf_counter()
+        started = job.started_at or done
+        waited, busy = started - job.submitted, done - started
+        with self.lock:
+            stats = self._stats(job.route.backend)
+            stats.in_flight -= 1
+            stats.pending_audio -= job.audio_seconds
+            stats.wait_seconds += waited
+            if not job.ok:
+                stats.failures += 1
+            else:
+                stats.jobs += 1
+                stats.audio_seconds += job.audio_seconds
+                stats.busy_seconds += busy
+                if job.audio_seconds > 0:
+                    observed = max(0.0, busy - stats.overhead) / job.audio_seconds
+                    stats.rtf += EWMA_ALPHA * (observed - stats.rtf)
+            in_flight = stats.in_flight
+        logger.info(
+            f"Transcription on {job.route.backend} "
+            f"{'done' if job.ok else 'failed'}: {job.audio_seconds:.0f}s audio, "
+            f"waited {waited:.1f}s, ran {busy:.1f}s "
+            f"(expected {job.route.expected_latency:.1f}s), {in_flight} in flight"
+        )
+
+    def metrics(self) -> dict:
+        """Throughput, espera média e fila de cada backend, mais a cota do Groq."""
+        with self.lock:
+            backends = {
+                name: {
+                    "jobs": stats.jobs,
+                    "failures": stats.failures,
+                    "in_flight": stats.in_flight,
+                    "audio_seconds": stats.audio_seconds,
+                    # segundos de áudio transcritos por segundo de trabalho
+                    "throughput": (
+                        stats.audio_seconds / stats.busy_seconds
+                        if stats.busy_seconds
+                        else 0.0
+                    ),
+                    "avg_wait": (
+                        stats.wait_seconds / (stats.jobs + stats.failures)
+                        if stats.jobs + stats.failures
+                        else 0.0
+                    ),
+                    "rtf": stats.rtf,
+                }
+                for name, stats in self.backends.items()
+            }
+        return {
+            "backends": backends,
+            "groq_quota": {"remaining": self.groq_limiter.remaining()},
+        }
+
+
+transcription_scheduler = TranscriptionScheduler()
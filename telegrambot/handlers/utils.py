@@ -1,13 +1,18 @@
-import re, os, glob, io
-from typing import Optional, Tuple
-import yt_dlp
-from faster_whisper import WhisperModel
+import re, os, glob, io, copy, hashlib, logging, tempfile, threading, time
+from typing import Callable, Optional, Tuple
 
-from providers.groq import GroqProvider
+from domain import TranscriptService, canonicalize_link
+from telegrambot.config import YDL_POOL_SIZE
 from telegrambot.handlers.kinds import Origin
 
+from .chunked_transcription import transcribe_chunked
 from .errors import VideoNotFound
+from .transcode import fit_to_upload_limit
+from .ydl_pool import YDLPool
 
+logger = logging.getLogger(__name__)
+
+transcript_service = TranscriptService()
 
 # Instagram cookies para autenticação
 INSTAGRAM_COOKIES_PATH = "/app/instagram-cookies.txt"
@@ -29,6 +34,56 @@ def get_ydl_opts(extra_opts=None):
     return opts
 
 
+# Option profiles served by the YoutubeDL pools. The output template is set
+# per call (see YDLPool.acquire), so concurrent downloads never share a path.
+YDL_PROFILES = {
+    "probe": {
+        "skip_download": True,
+    },
+    # Menor formato só de áudio, sem reencode para MP3: o pipeline de
+    # transcrição copia o stream ou gera Opus 16 kHz mono quando precisa
+    "audio": {
+        "format": "bestaudio/best",
+        "format_sort": ["+size", "+br"],
+    },
+    "video": {
+        "format": "best[height<=720][ext=mp4]/best[height<=720]/best[ext=mp4]/best",
+        "postprocessor_args": ["-movflags", "+faststart"],
+        "cachedir": False,
+        "socket_timeout": 30,
+    },
+}
+
+_ydl_pools: dict[str, YDLPool] = {}
+_ydl_pools_lock = threading.Lock()
+
+
+def get_ydl_pool(profile: str) -> YDLPool:
+    """Retorna o pool de YoutubeDL do perfil, criando-o na primeira chamada."""
+    with _ydl_pools_lock:
+        pool = _ydl_pools.get(profile)
+        if pool is None:
+            extra_opts = YDL_PROFILES[profile]
+            pool = YDLPool(
+                profile, lambda: get_ydl_opts(extra_opts), size=YDL_POOL_SIZE
+            )
+            _ydl_pools[profile] = pool
+        return pool
+
+
+def warm_ydl_pools() -> None:
+    """Pre-creates every YoutubeDL instance so the first link is not cold."""
+    for profile in YDL_PROFILES:
+        get_ydl_pool(profile).warm()
+
+
+def close_ydl_pools() -> None:
+    with _ydl_pools_lock:
+        for pool in _ydl_pools.values():
+            pool.close()
+        _ydl_pools.clear()
+
+
 def clean_subtitle_text(raw):
     lines = raw.splitlines()
     clean = []
@@ -55,21 +110,15 @@ def clean_subtitle_text(raw):
 
 def is_valid_link(link) -> bool:
     try:
-        ydl_opts = get_ydl_opts({
-            "skip_download": True,
-        })
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(link, download=False)
-            if info is None:
-                return False
-
-            duration = info.get("duration")
-            if duration is None:
-                return True
-            return duration < (60 * 15)
+        info = probe_link(link)
     except Exception:
         return False
 
+    duration = info.get("duration")
+    if duration is None:
+        return True
+    return duration < (60 * 15)
+
 
 def is_link(text: str) -> bool:
     url_pattern = r"^https?://[^\s]+$"
@@ -85,87 +134,155 @@ def is_allowed_link(text: str):
     return True
 
 
-def transcribe_audio(url: str, model_size: str, tmpdir: str) -> dict:
-    """Downloads audio and transcribes it with faster-whisper."""
-    audio_path = os.path.join(tmpdir, "audio.%(ext)s")
-    ydl_opts = get_ydl_opts({
-        "format": "bestaudio/best",
-        "outtmpl": audio_path,
-        "postprocessors": [
-            {
-                "key": "FFmpegExtractAudio",
-                "preferredcodec": "mp3",
-                "preferredquality": "192",
-            }
-        ],
-    })
-
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        _info = ydl.extract_info(url)
-        title = _info.get("title")
-
-    mp3_path = os.path.join(tmpdir, "audio.mp3")
-    if not os.path.exists(mp3_path):
-        files = os.listdir(tmpdir)
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def transcribe_audio(
+    url: str,
+    model_size: Optional[str],
+    tmpdir: str,
+    on_progress: Optional[Callable[[str], None]] = None,
+) -> dict:
+    """Downloads audio and transcribes it with faster-whisper.
+
+    Results are cached by canonical URL and by content hash, so a repeated
+    link skips the download and a re-uploaded file skips transcription.
+    ``on_progress`` receives the partial text while the local model runs;
+    ``model_size`` pins the local model instead of letting the scheduler pick.
+    """
+    url_key = f"url:{canonicalize_link(url)}"
+    cached = transcript_service.get(url_key)
+    if cached:
+        return (cached.text, cached.title, Origin[cached.origin])
+
+    # Diretório próprio por chamada: downloads concorrentes não colidem
+    with tempfile.TemporaryDirectory(dir=tmpdir or None) as workdir:
+        start = time.perf_counter()
+        with get_ydl_pool("audio").acquire(
+            outtmpl=os.path.join(workdir, "audio.%(ext)s")
+        ) as ydl:
+            _info = ydl.extract_info(url)
+            title = _info.get("title")
+
+        files = glob.glob(os.path.join(workdir, "audio.*"))
         if not files:
             raise FileNotFoundError("Audio download failed.")
-        mp3_path = os.path.join(tmpdir, files[0])
+        audio_file = files[0]
+        logger.info(
+            f"Downloaded audio ({_info.get('acodec')}/{_info.get('ext')}) "
+            f"{os.path.getsize(audio_file) / 1e6:.2f}MB "
+            f"in {time.perf_counter() - start:.1f}s"
+        )
 
-    # First, we try in a free provider..
-    try:
-        text = GroqProvider().transcribe_audio(mp3_path)
-        origin = Origin.GROQ
-    except Exception as e:
-        model = WhisperModel(model_size, device="cpu", compute_type="int8")
-        segments, info = model.transcribe(mp3_path, beam_size=5)
-        text = " ".join(seg.text.strip() for seg in segments)
-        origin = Origin.CPU
-    finally:
-        print(text)
-        os.remove(mp3_path)
-        return (text, title, origin)
+        content_key = f"sha256:{file_sha256(audio_file)}"
+        cached = transcript_service.get(content_key)
+        if cached:
+            transcript_service.put(
+                [url_key], cached.text, cached.language, title, cached.origin
+            )
+            return (cached.text, title, Origin[cached.origin])
 
+        # Groq first (free), chunked on silence; local whisper as fallback
+        text, origin, language = transcribe_chunked(
+            audio_file, model_size, on_progress
+        )
+
+    if text:
+        transcript_service.put(
+            [url_key, content_key], text, language, title, origin.name
+        )
+    return (text, title, origin)
+
+
+def probe_link(link) -> dict:
+    """Extrai os metadados do link sem baixar a mídia."""
+    with get_ydl_pool("probe").acquire() as ydl:
+        info = ydl.extract_info(link, download=False)
+    if info is None:
+        raise VideoNotFound("Media not found")
+    return info
+
+
+def get_thumbnail_url(info: dict) -> Optional[str]:
+    thumbnail = info.get("thumbnail")
+    if not thumbnail and info.get("thumbnails"):
+        thumbnail = info["thumbnails"][0].get("url") if info["thumbnails"] else None
+    if not thumbnail and info.get("formats"):
+        for fmt in info["formats"]:
+            if fmt.get("thumbnails"):
+                thumbnail = fmt["thumbnails"][0].get("url")
+                break
+    return thumbnail
 
-def get_media_from_link(link) -> Optional[Tuple[any, any]]:
-    """Baixa mídia do link e retorna (buffer_video, titulo, thumbnail_url)."""
-    try:
-        ydl_opts = get_ydl_opts({
-            "format": "best[height<=720][ext=mp4]/best[height<=720]/best[ext=mp4]/best",
-            "postprocessor_args": ["-movflags", "+faststart"],
-            "outtmpl": "/tmp/video.%(ext)s",
-            "cachedir": False,
-            "socket_timeout": 30,
-        })
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(link, download=True)
+
+# Chaves que a seleção de formato do probe já resolveu; se ficarem no info,
+# o process_info baixa o formato do probe em vez do escolhido pelo perfil
+RESOLVED_FORMAT_KEYS = (
+    "requested_formats",
+    "requested_downloads",
+    "format_id",
+    "format",
+    "url",
+    "ext",
+    "protocol",
+)
+
+
+def _unresolved(info: dict) -> dict:
+    """Cópia do info do probe pronta para outra seleção de formato."""
+    info = copy.deepcopy(info)
+    pending = [info]
+    while pending:
+        current = pending.pop()
+        if current.get("formats"):
+            for key in RESOLVED_FORMAT_KEYS:
+                current.pop(key, None)
+        pending.extend(e for e in current.get("entries") or () if isinstance(e, dict))
+    return info
+
+
+def download_media(
+    info: dict, on_transcode_progress: Optional[Callable[[float], None]] = None
+) -> io.BytesIO:
+    """Baixa a mídia de um resultado de ``probe_link`` para um buffer.
+
+    Arquivos acima do limite de upload da Bot API são recomprimidos antes de
+    ir para memória; ``on_transcode_progress`` recebe o progresso (0..1).
+    """
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with get_ydl_pool("video").acquire(
+            outtmpl=os.path.join(tmpdir, "video.%(ext)s")
+        ) as ydl:
+            ydl.process_ie_result(_unresolved(info), download=True)
 
         # Ler o arquivo baixado para memória
-        video_path = "/tmp/video.mp4"
+        video_path = os.path.join(tmpdir, "video.mp4")
         if not os.path.exists(video_path):
             # Tenta encontrar o arquivo com outro formato
-            import glob
-            video_files = glob.glob("/tmp/video.*")
+            video_files = glob.glob(os.path.join(tmpdir, "video.*"))
             if video_files:
                 video_path = video_files[0]
             else:
                 raise VideoNotFound("Video download failed")
 
+        video_path = fit_to_upload_limit(video_path, on_progress=on_transcode_progress)
         with open(video_path, "rb") as f:
-            video_buffer = io.BytesIO(f.read())
-
-        # Limpa o arquivo temporário
-        os.remove(video_path)
+            return io.BytesIO(f.read())
 
-        thumbnail = info.get("thumbnail")
-        if not thumbnail and info.get("thumbnails"):
-            thumbnail = info["thumbnails"][0].get("url") if info["thumbnails"] else None
-        if not thumbnail and info.get("formats"):
-            for fmt in info["formats"]:
-                if fmt.get("thumbnails"):
-                    thumbnail = fmt["thumbnails"][0].get("url")
-                    break
 
-        return (video_buffer, info.get("title"), thumbnail)
+def get_media_from_link(
+    link, on_transcode_progress: Optional[Callable[[float], None]] = None
+) -> Optional[Tuple[any, any]]:
+    """Baixa mídia do link e retorna (buffer_video, titulo, thumbnail_url)."""
+    try:
+        info = probe_link(link)
+        video_buffer = download_media(info, on_transcode_progress)
+        return (video_buffer, info.get("title"), get_thumbnail_url(info))
     except Exception as e:
         print(f"Error: {e}")
         raise e
@@ -0,0 +1,172 @@
+import logging
+import resource
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+from faster_whisper import WhisperModel
+
+from telegrambot.config import (
+    WHISPER_COMPUTE_TYPE,
+    WHISPER_CPU_THREADS,
+    WHISPER_NUM_WORKERS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def rss_mb() -> float:
+    """Memória residente atual do processo, em MB."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+@dataclass
+class WhisperResult:
+    text: str
+    language: str
+    language_probability: float
+    # média dos avg_logprob dos segmentos, ponderada pela duração
+    avg_logprob: float
+    duration: float
+
+
+class WhisperModelManager:
+    """Keeps faster-whisper models resident, one instance per model size.
+
+    Each model is loaded once (lazily or via ``preload``) and shared by the
+    worker threads; ``num_workers`` bounds how many transcriptions run on the
+    same model at a time, matching the ctranslate2 worker count.
+    """
+
+    def __init__(
+        self,
+        device: str = "cpu",
+        compute_type: str = WHISPER_COMPUTE_TYPE,
+        cpu_threads: int = WHISPER_CPU_THREADS,
+        num_workers: int = WHISPER_NUM_WORKERS,
+    ):
+        self.device = device
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+        self.num_workers = num_workers
+        self._models: dict[str, WhisperModel] = {}
+        self._slots: dict[str, threading.BoundedSemaphore] = {}
+        self._load_locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.stats: dict[str, dict] = {}
+
+    def get(self, model_size: str) -> WhisperModel:
+        model = self._models.get(model_size)
+        if model is not None:
+            return model
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(model_size, threading.Lock())
+
+        with load_lock:
+            model = self._models.get(model_size)
+            if model is not None:
+                return model
+
+            rss_before = rss_mb()
+            start = time.perf_counter()
+            model = WhisperModel(
+                model_size,
+                device=self.device,
+                compute_type=self.compute_type,
+                cpu_threads=self.cpu_threads,
+                num_workers=self.num_workers,
+            )
+            load_time = time.perf_counter() - start
+            rss_delta = rss_mb() - rss_before
+
+            with self._lock:
+                self._models[model_size] = model
+                self._slots[model_size] = threading.BoundedSemaphore(self.num_workers)
+                self.stats[model_size] = {
+                    "load_time": load_time,
+                    "rss_mb": rss_delta,
+                    "transcriptions": 0,
+                    "audio_seconds": 0.0,
+                    "busy_seconds": 0.0,
+                }
+            logger.info(
+                f"Loaded whisper '{model_size}' ({self.compute_type}) in "
+                f"{load_time:.1f}s, +{rss_delta:.0f}MB RSS"
+            )
+            return model
+
+    def preload(self, model_sizes: Iterable[str]) -> None:
+        for model_size in model_sizes:
+            try:
+                self.get(model_size)
+            except Exception as e:
+                logger.error(f"Could not preload whisper '{model_size}': {e}")
+
+    @contextmanager
+    def acquire(self, model_size: str):
+        """Empresta o modelo, esperando um slot livre se todos estiverem ocupados."""
+        model = self.get(model_size)
+        with self._slots[model_size]:
+            yield model
+
+    def record(self, model_size: str, audio_seconds: float, elapsed: float) -> None:
+        with self._lock:
+            stats = self.stats[model_size]
+            stats["transcriptions"] += 1
+            stats["audio_seconds"] += audio_seconds
+            stats["busy_seconds"] += elapsed
+        rtf = elapsed / audio_seconds if audio_seconds else 0.0
+        logger.info(
+            f"Whisper '{model_size}': {audio_seconds:.1f}s audio in {elapsed:.1f}s "
+            f"(RTF {rtf:.2f}), RSS {rss_mb():.0f}MB"
+        )
+
+    def transcribe(
+        self,
+        model_size: str,
+        audio,
+        on_segment: Optional[Callable[[str], None]] = None,
+        on_start: Optional[Callable[[], None]] = None,
+        **kwargs,
+    ):
+        """Transcreve ``audio`` (caminho, arquivo ou array) num ``WhisperResult``.
+
+        faster-whisper decodes segments lazily; ``on_segment`` receives each
+        segment's text as soon as it is decoded, from the calling thread.
+        ``on_start`` is called once a worker slot is free.
+        """
+        with self.acquire(model_size) as model:
+            if on_start:
+                on_start()
+            start = time.perf_counter()
+            segments, info = model.transcribe(audio, **kwargs)
+            texts, logprob, spoken = [], 0.0, 0.0
+            for segment in segments:
+                texts.append(segment.text.strip())
+                length = max(segment.end - segment.start, 0.01)
+                logprob += segment.avg_logprob * length
+                spoken += length
+                if on_segment:
+                    on_segment(texts[-1])
+            elapsed = time.perf_counter() - start
+        self.record(model_size, info.duration, elapsed)
+        return WhisperResult(
+            text=" ".join(texts),
+            language=info.language,
+            language_probability=info.language_probability,
+            avg_logprob=logprob / spoken if spoken else 0.0,
+            duration=info.duration,
+        )
+
+
+whisper_models = WhisperModelManager()
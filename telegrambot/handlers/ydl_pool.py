@@ -0,0 +1,111 @@
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+import yt_dlp
+
+logger = logging.getLogger(__name__)
+
+# Extractors behind the links accepted by is_allowed_link. Instantiating them
+# on warm-up keeps that cost off the first real request.
+WARM_EXTRACTORS = ("Youtube", "Instagram", "Facebook", "Twitter", "Bluesky", "Generic")
+
+
+class YDLPool:
+    """Pool of reusable YoutubeDL instances sharing one option profile.
+
+    A YoutubeDL instance is not thread-safe, so each one is handed to a single
+    worker at a time through ``acquire()`` and returned to the pool afterwards.
+    After ``close()`` instances still checked out are closed when returned.
+    """
+
+    def __init__(self, name: str, opts_factory: Callable[[], dict], size: int = 2):
+        self.name = name
+        self.opts_factory = opts_factory
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._instances = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _create(self) -> yt_dlp.YoutubeDL:
+        ydl = yt_dlp.YoutubeDL(self.opts_factory())
+        for ie_key in WARM_EXTRACTORS:
+            try:
+                ydl.get_info_extractor(ie_key)
+            except Exception as e:
+                logger.debug(f"Could not warm extractor {ie_key}: {e}")
+        return ydl
+
+    def _checkout(self, timeout: Optional[float]) -> yt_dlp.YoutubeDL:
+        try:
+            ydl = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                if not self._closed and len(self._instances) < self.size:
+                    ydl = self._create()
+                    self._instances.append(ydl)
+                    return ydl
+            ydl = self._idle.get(timeout=timeout)
+
+        if ydl is None:
+            # marcador do close(): devolve para acordar os outros que esperam
+            self._idle.put(None)
+            raise RuntimeError(f"YDL pool {self.name} is closed")
+        return ydl
+
+    def _release(self, ydl: yt_dlp.YoutubeDL) -> None:
+        with self._lock:
+            if not self._closed:
+                self._idle.put(ydl)
+                return
+            self._instances.remove(ydl)
+        self._close_instance(ydl)
+
+    @staticmethod
+    def _close_instance(ydl: yt_dlp.YoutubeDL) -> None:
+        try:
+            ydl.close()
+        except Exception:
+            pass
+
+    @contextmanager
+    def acquire(self, outtmpl: Optional[str] = None, timeout: Optional[float] = None):
+        """Borrow an instance, optionally overriding the output template."""
+        ydl = self._checkout(timeout)
+        default_outtmpl = ydl.params["outtmpl"].get("default")
+        if outtmpl:
+            ydl.params["outtmpl"]["default"] = outtmpl
+        try:
+            yield ydl
+        finally:
+            ydl.params["outtmpl"]["default"] = default_outtmpl
+            self._release(ydl)
+
+    def warm(self) -> None:
+        """Create every instance of the pool up front."""
+        with self._lock:
+            while not self._closed and len(self._instances) < self.size:
+                ydl = self._create()
+                self._instances.append(ydl)
+                self._idle.put(ydl)
+
+    def close(self) -> None:
+        """Close the idle instances; the checked-out ones close on return."""
+        idle = []
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            while True:
+                try:
+                    ydl = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                self._instances.remove(ydl)
+                idle.append(ydl)
+            self._idle.put(None)
+        for ydl in idle:
+            self._close_instance(ydl)
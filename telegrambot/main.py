@@ -2,8 +2,9 @@
 # pylint: disable=unused-argument
 
 import logging
+import threading
 
-from config import TELEGRAM_TOKEN
+from config import TELEGRAM_TOKEN, WHISPER_PRELOAD
 from handlers.text import text_handler
 from handlers.transcription import transcription_handler
 from handlers.catch_all import catch_all_handler, catch_all_edited_handler
@@ -18,6 +19,9 @@ from telegram.ext import (
 )
 
 from domain import init_database
+from providers.cache import llm_cache
+from providers.quota import quotas
+from providers.registry import providers
 from telegrambot.handlers.commands import (
     delete,
     faq,
@@ -28,8 +32,11 @@ from telegrambot.handlers.commands import (
     tldr,
     falar,
 )
+from telegrambot.handlers.conversation import conversations
 from telegrambot.handlers.sticker import sticker, sticker_photo_filter, sticker_cmd_filter, sticker_media_filter, delete_sticker
 from telegrambot.handlers.errors import error_handler
+from telegrambot.handlers.utils import close_ydl_pools, warm_ydl_pools
+from telegrambot.handlers.whisper_models import whisper_models
 
 logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO
@@ -39,6 +46,19 @@ logging.getLogger("httpx").setLevel(logging.WARNING)
 logger = logging.getLogger(__name__)
 
 
+async def post_init(application: Application) -> None:
+    # Cria os clientes e abre as conexões antes da primeira mensagem
+    ready = await providers.warm()
+    logger.info(f"Providers ready: {ready}")
+
+
+async def post_shutdown(application: Application) -> None:
+    logger.info(f"LLM cache: {llm_cache.metrics()}")
+    logger.info(f"Provider quotas: {quotas.usage()}")
+    logger.info(f"Conversation context: {conversations.metrics()}")
+    await providers.aclose()
+
+
 async def echo(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Echo the user message."""
     await update.message.reply_text(update.message.text)
@@ -51,6 +71,8 @@ def main() -> None:
         .token(TELEGRAM_TOKEN)
         .connect_timeout(30)
         .media_write_timeout(120)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
         .build()
     )
     application.add_error_handler(error_handler)
@@ -88,9 +110,12 @@ def main() -> None:
     application.add_handler(
         CallbackQueryHandler(search_image_callback, pattern="^search_image:")
     )
-    # Voice/Video Note transcription
+    # Voice/Video Note transcription (block=False: vários áudios em paralelo
+    # sem segurar as atualizações dos outros chats)
     application.add_handler(
-        MessageHandler(filters.VOICE | filters.VIDEO_NOTE, transcription_handler)
+        MessageHandler(
+            filters.VOICE | filters.VIDEO_NOTE, transcription_handler, block=False
+        )
     )
     # Text (AI responses only, no DB save - catch-all handles that)
     application.add_handler(
@@ -98,7 +123,16 @@ def main() -> None:
     )
 
     init_database()
-    application.run_polling()
+    warm_ydl_pools()
+    if WHISPER_PRELOAD:
+        # Carrega em background; quem pedir o modelo antes espera o load terminar
+        threading.Thread(
+            target=whisper_models.preload, args=(WHISPER_PRELOAD,), daemon=True
+        ).start()
+    try:
+        application.run_polling()
+    finally:
+        close_ydl_pools()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+"""
+Testa os resumos incrementais do /tldr (ChatSummaryService).
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from domain import (
+    ChatSummaryChunk,
+    ChatSummaryService,
+    Message,
+    compact_messages,
+    init_database,
+)
+
+CHAT_ID = -123123123
+
+
+def cleanup():
+    for model in (Message, ChatSummaryChunk):
+        model.delete().where(model.chat_id == CHAT_ID).execute()
+
+
+def add_messages(count: int, start: int = 0) -> None:
+    for i in range(start, start + count):
+        Message.create(
+            platform_message_id=100000 + i,
+            text=f"mensagem {i}",
+            chat_id=CHAT_ID,
+            from_user=f"user{i % 3}",
+        )
+
+
+def seal(service: ChatSummaryService, segments) -> int:
+    """Faz o papel do LLM: 'resume' cada janela nova e a guarda."""
+    sealed = 0
+    for segment in segments:
+        if segment.seal:
+            segment.summary = f"resumo de {segment.lines[0]}"
+            assert service.save_chunk(CHAT_ID, segment)
+            sealed += 1
+    return sealed
+
+
+def kinds(segments) -> list[str]:
+    return [
+        "chunk" if s.summary is not None else "seal" if s.seal else f"raw{s.message_count}"
+        for s in segments
+    ]
+
+
+def test_rolling_chunks():
+    """Janelas completas são resumidas uma vez; só o resto vai cru."""
+    print("\n" + "=" * 50)
+    print("Testing ChatSummaryService.plan")
+    print("=" * 50)
+
+    init_database()
+    cleanup()
+    service = ChatSummaryService(chunk_size=50)
+    try:
+        add_messages(250)
+
+        segments = service.plan(CHAT_ID, 120)
+        assert kinds(segments) == ["seal", "seal", "raw20"], kinds(segments)
+        assert segments[0].lines[0] == "user1: mensagem 130", segments[0].lines[0]
+        assert seal(service, segments) == 2
+        print("   ✓ First call seals full windows from the oldest message")
+
+        add_messages(30, start=250)
+        segments = service.plan(CHAT_ID, 150)
+        assert kinds(segments) == ["chunk", "chunk", "seal"], kinds(segments)
+        assert sum(s.message_count for s in segments) == 150
+        seal(service, segments)
+        print("   ✓ New messages close the next window after the last chunk")
+
+        segments = service.plan(CHAT_ID, 280)
+        assert kinds(segments) == ["raw30", "seal", "seal", "chunk", "chunk", "chunk"], kinds(
+            segments
+        )
+        seal(service, segments)
+        print("   ✓ Larger N seals windows backwards from the oldest chunk")
+
+        segments = service.plan(CHAT_ID, 120)
+        assert kinds(segments) == ["raw20", "chunk", "chunk"], kinds(segments)
+        assert sum(s.message_count for s in segments) == 120
+        print("   ✓ Chunk cut by the window start is sent raw, not re-sealed")
+
+        chunks = list(
+            ChatSummaryChunk.select()
+            .where(ChatSummaryChunk.chat_id == CHAT_ID)
+            .order_by(ChatSummaryChunk.start_id)
+        )
+        assert len(chunks) == 5
+        for previous, current in zip(chunks, chunks[1:]):
+            assert previous.end_id < current.start_id, "Overlapping chunks"
+        print("   ✓ Stored chunks never overlap")
+    finally:
+        cleanup()
+
+    print("\n✅ ChatSummaryService tests passed!")
+
+
+def test_compaction():
+    """Placeholders, status do bot e comandos saem; remetente repetido junta."""
+    print("\n" + "=" * 50)
+    print("Testing compact_messages")
+    print("=" * 50)
+
+    def row(sender, text, message_type="text"):
+        return SimpleNamespace(from_user=sender, text=text, message_type=message_type)
+
+    lines = compact_messages(
+        [
+            row("ana", "bora jogar hoje?"),
+            row("ana", "[Sticker: 😂]", "sticker"),
+            row("ana", "  às   20h "),
+            row("bruno", "/tldr 50"),
+            row("Bot", "Resumindo as últimas 50 mensagens...", "status"),
+            row("bruno", "[GIF]", "animation"),
+            row("bruno", "[Photo]", "photo"),
+            row("carla", "[Document: regras.pdf]", "document"),
+            row("carla", "olha isso", "photo"),
+        ]
+    )
+    assert lines == [
+        "ana: bora jogar hoje? / às 20h",
+        "bruno: [2 mídias]",
+        "carla: [Document: regras.pdf] / olha isso",
+    ], lines
+    print("   ✓ Low-information rows dropped, consecutive messages merged")
+
+    print("\n✅ compact_messages tests passed!")
+
+
+def main():
+    """Run all tests."""
+    try:
+        test_rolling_chunks()
+        test_compaction()
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+        return 0
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return 1
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+
+        traceback.print_exc()
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+"""
+Testa a divisão do áudio em pedaços nos silêncios (plan_chunks e
+split_on_silence), com timestamps de fala sintéticos.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from telegrambot.handlers import chunked_transcription
+from telegrambot.handlers.audio_encoding import SAMPLING_RATE
+from telegrambot.handlers.chunked_transcription import plan_chunks, split_on_silence
+
+
+def speech(*segments: tuple[int, int]) -> list[dict]:
+    """Timestamps no formato do get_speech_timestamps do faster-whisper."""
+    return [{"start": start, "end": end} for start, end in segments]
+
+
+def check_chunks(chunks: list[tuple[int, int]], segments: list[dict], max_samples: int):
+    """Pedaços em ordem, sem sobreposição, dentro do limite e cobrindo toda a fala."""
+    for (_, previous_end), (start, _) in zip(chunks, chunks[1:]):
+        assert start >= previous_end, f"Overlapping chunks: {chunks}"
+    for start, end in chunks:
+        assert 0 < end - start <= max_samples, f"Chunk out of bounds: {(start, end)}"
+    for segment in segments:
+        for sample in (segment["start"], segment["end"] - 1):
+            assert any(start <= sample < end for start, end in chunks), (sample, chunks)
+
+
+def test_plan_chunks():
+    """Agrupa a fala até o limite e só corta nos silêncios."""
+    print("\n" + "=" * 50)
+    print("Testing plan_chunks")
+    print("=" * 50)
+
+    segments = speech((0, 4), (5, 8), (9, 14), (16, 18))
+    chunks = plan_chunks(segments, 10)
+    assert chunks == [(0, 8), (9, 18)], chunks
+    check_chunks(chunks, segments, 10)
+    print("   ✓ Segments grouped up to the limit, cut in the silence between them")
+
+    segments = speech((0, 4), (4, 10), (10, 12))
+    chunks = plan_chunks(segments, 10)
+    assert chunks == [(0, 10), (10, 12)], chunks
+    check_chunks(chunks, segments, 10)
+    print("   ✓ Chunk exactly at the limit, adjacent chunks do not overlap")
+
+    segments = speech((0, 3), (5, 27))
+    chunks = plan_chunks(segments, 10)
+    assert chunks == [(0, 3), (5, 15), (15, 25), (25, 27)], chunks
+    check_chunks(chunks, segments, 10)
+    print("   ✓ Segment longer than the limit split at fixed intervals")
+
+    assert plan_chunks([], 10) == []
+    print("   ✓ No speech, no chunks")
+
+    segments = speech((2, 5), (7, 9))
+    assert plan_chunks(segments, 100) == [(2, 9)]
+    print("   ✓ Audio shorter than one chunk stays whole")
+
+    print("\n✅ plan_chunks tests passed!")
+
+
+def test_split_on_silence():
+    """Fatia o áudio nos pedaços planejados a partir do VAD."""
+    print("\n" + "=" * 50)
+    print("Testing split_on_silence")
+    print("=" * 50)
+
+    audio = np.arange(5 * SAMPLING_RATE, dtype=np.float32)
+    second = SAMPLING_RATE
+    original = chunked_transcription.get_speech_timestamps
+    try:
+        chunked_transcription.get_speech_timestamps = lambda *args, **kwargs: speech(
+            (0, second // 2), (second, 2 * second), (3 * second, 4 * second)
+        )
+        chunks = split_on_silence(audio, max_seconds=2)
+        assert [(int(c[0]), len(c)) for c in chunks] == [
+            (0, 2 * second),
+            (3 * second, second),
+        ], [(c[0], len(c)) for c in chunks]
+        assert np.array_equal(chunks[1], audio[3 * second : 4 * second])
+        print("   ✓ Audio sliced at the planned boundaries")
+
+        chunked_transcription.get_speech_timestamps = lambda *args, **kwargs: speech(
+            (100, 900)
+        )
+        chunks = split_on_silence(audio[:second], max_seconds=30)
+        assert len(chunks) == 1 and np.array_equal(chunks[0], audio[100:900])
+        print("   ✓ Short audio becomes a single chunk")
+    finally:
+        chunked_transcription.get_speech_timestamps = original
+
+    assert split_on_silence(np.zeros(2 * SAMPLING_RATE, dtype=np.float32)) == []
+    print("   ✓ Silence yields no chunks (real VAD)")
+
+    print("\n✅ split_on_silence tests passed!")
+
+
+def main():
+    """Run all tests."""
+    try:
+        test_plan_chunks()
+        test_split_on_silence()
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+        return 0
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return 1
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+
+        traceback.print_exc()
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
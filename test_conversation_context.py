@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+"""
+Testa o contexto das menções ao bot (telegrambot/handlers/conversation.py).
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from domain import Message, MessageService, init_database
+from telegrambot.handlers.conversation import BOT_SENDER, ConversationContext, Turn
+
+CHAT_ID = -456456456
+OTHER_CHAT_ID = -456456457
+
+
+class CountingService(MessageService):
+    """MessageService que conta as consultas ao banco."""
+
+    def __init__(self):
+        super().__init__()
+        self.queries = 0
+
+    def get_chat_message(self, *args, **kwargs):
+        self.queries += 1
+        return super().get_chat_message(*args, **kwargs)
+
+    def get_last_messages(self, *args, **kwargs):
+        self.queries += 1
+        return super().get_last_messages(*args, **kwargs)
+
+
+def cleanup():
+    Message.delete().where(Message.chat_id.in_([CHAT_ID, OTHER_CHAT_ID])).execute()
+
+
+def save(message_id: int, from_user: str, text: str, reply_to=None, message_type="text"):
+    Message.create(
+        platform_message_id=message_id,
+        text=text,
+        chat_id=CHAT_ID,
+        from_user=from_user,
+        reply_to_message_id=reply_to,
+        message_type=message_type,
+    )
+
+
+def test_reply_chain_from_window():
+    """A thread vem da janela em memória e é reaproveitada no follow-up."""
+    print("\n" + "=" * 50)
+    print("Testing reply chain and thread cache")
+    print("=" * 50)
+
+    init_database()
+    cleanup()
+    service = CountingService()
+    context = ConversationContext(service, window=20, recent_turns=5)
+    try:
+        context.record(CHAT_ID, 1, "ana", "alguém viu o jogo ontem?")
+        context.record(CHAT_ID, 2, "bruno", "vi, foi 3 a 1", reply_to=1)
+        context.record(CHAT_ID, 3, "carla", "quem vai no churrasco?")
+        context.record(CHAT_ID, 4, "ana", "@fimosin_bot quem fez os gols?", reply_to=2)
+
+        prompt = context.build(
+            CHAT_ID, 4, "ana", "@fimosin_bot quem fez os gols?", reply_to=2
+        ).prompt
+        conversation = prompt.split("Conversa respondida:\n")[1].split("\n\n")[0]
+        assert conversation == "ana: alguém viu o jogo ontem?\nbruno: vi, foi 3 a 1", prompt
+        assert prompt.endswith("ana: @fimosin_bot quem fez os gols?"), prompt
+        assert "carla: quem vai no churrasco?" in prompt.split("Conversa respondida")[0]
+        print("   ✓ Whole reply chain in order, recent turns kept apart")
+
+        queries = service.queries
+        context.record_answer(CHAT_ID, 5, "Fulano e Beltrano.", reply_to=4)
+        context.record(CHAT_ID, 6, "bruno", "@fimosin_bot e quem deu o passe?", reply_to=5)
+        prompt = context.build(
+            CHAT_ID, 6, "bruno", "@fimosin_bot e quem deu o passe?", reply_to=5
+        ).prompt
+        assert f"{BOT_SENDER}: Fulano e Beltrano." in prompt
+        assert "ana: alguém viu o jogo ontem?" in prompt
+        assert service.queries == queries, "Follow-up queried the database"
+        assert context.metrics()["hits"] == 1, context.metrics()
+        print("   ✓ Follow-up to the bot answer reuses the cached thread, no DB query")
+
+        context.record(CHAT_ID, 2, "bruno", "vi, foi 3 a 2", message_type="edited_message")
+        prompt = context.build(CHAT_ID, 7, "ana", "@fimosin_bot placar?", reply_to=5).prompt
+        assert "bruno: vi, foi 3 a 2" in prompt and "3 a 1" not in prompt, prompt
+        print("   ✓ Edits replace the message and drop the cached threads")
+
+        # A conversa recente muda o prompt, mas não a chave do cache de respostas
+        first = context.build(CHAT_ID, 8, "ana", "@fimosin_bot placar?", reply_to=5)
+        context.record(CHAT_ID, 9, "carla", "alguém traz gelo?")
+        second = context.build(CHAT_ID, 10, "ana", "@fimosin_bot placar?", reply_to=5)
+        assert first.prompt != second.prompt
+        assert first.cache_text == second.cache_text, (first.cache_text, second.cache_text)
+        assert "Mensagens recentes" not in first.cache_text
+        assert first.cache_text.endswith("ana: @fimosin_bot placar?")
+        print("   ✓ Cache text keeps the thread and leaves recent turns out")
+    finally:
+        cleanup()
+
+    print("\n✅ Reply chain tests passed!")
+
+
+def test_database_fallback():
+    """Mensagens fora da janela (ex.: após reiniciar) vêm do banco."""
+    print("\n" + "=" * 50)
+    print("Testing database fallback")
+    print("=" * 50)
+
+    init_database()
+    cleanup()
+    try:
+        save(10, "ana", "qual filme a gente vê sábado?")
+        save(11, "Bot", "Que tal Duna?", reply_to=10, message_type="ai_response")
+        save(12, "bruno", "/tldr")
+        save(13, "carla", "eu topo qualquer um")
+
+        service = CountingService()
+        context = ConversationContext(service, window=20, recent_turns=5)
+        prompt = context.build(CHAT_ID, 14, "ana", "@fimosin_bot e o segundo?", reply_to=11).prompt
+        assert "ana: qual filme a gente vê sábado?\nBot: Que tal Duna?" in prompt, prompt
+        assert "carla: eu topo qualquer um" in prompt
+        assert "/tldr" not in prompt
+        print("   ✓ Chain and recent turns loaded from MessageService")
+
+        queries = service.queries
+        context.build(CHAT_ID, 15, "carla", "@fimosin_bot oi")
+        assert service.queries == queries, "Window seeded from the database twice"
+        print("   ✓ Window seeded from the database only once per chat")
+
+        seed = Turn(99, "dani", "mensagem que ninguém salvou")
+        prompt = context.build(
+            CHAT_ID, 16, "ana", "@fimosin_bot resume", reply_to=99, reply_seed=seed
+        ).prompt
+        assert "dani: mensagem que ninguém salvou" in prompt
+        print("   ✓ Unknown replied message falls back to Telegram's copy")
+    finally:
+        cleanup()
+
+    print("\n✅ Database fallback tests passed!")
+
+
+def test_chat_scoped_update():
+    """A resposta final do bot atualiza a linha do próprio chat."""
+    print("\n" + "=" * 50)
+    print("Testing chat-scoped answer update")
+    print("=" * 50)
+
+    init_database()
+    cleanup()
+    try:
+        # mesmo id de mensagem em dois chats
+        Message.create(
+            platform_message_id=20,
+            text="outra conversa",
+            chat_id=OTHER_CHAT_ID,
+            from_user="dani",
+            message_type="text",
+        )
+        save(20, "Bot", "Pensando…", message_type="ai_response")
+
+        service = MessageService()
+        assert service.update_chat_message_text(CHAT_ID, 20, "Resposta final")
+        assert service.get_chat_message(OTHER_CHAT_ID, 20).text == "outra conversa"
+        print("   ✓ Row with the same id in another chat untouched")
+
+        context = ConversationContext(service, window=10)
+        prompt = context.build(CHAT_ID, 21, "ana", "@fimosin_bot e aí?", reply_to=20).prompt
+        assert "Bot: Resposta final" in prompt and "Pensando" not in prompt, prompt
+        print("   ✓ Reply to the bot after a restart sees the final answer")
+    finally:
+        cleanup()
+
+    print("\n✅ Chat-scoped update tests passed!")
+
+
+def test_token_budget():
+    """O prompt respeita o orçamento, mantendo a menção e as mais próximas."""
+    print("\n" + "=" * 50)
+    print("Testing token budget")
+    print("=" * 50)
+
+    init_database()
+    cleanup()
+    context = ConversationContext(MessageService(), window=100, recent_turns=100, max_tokens=120)
+    try:
+        previous = None
+        for i in range(1, 41):
+            context.record(CHAT_ID, i, f"user{i % 2}", f"mensagem número {i} da thread", previous)
+            previous = i
+        prompt = context.build(
+            CHAT_ID, 41, "ana", "@fimosin_bot resume a thread", reply_to=40
+        ).prompt
+        assert prompt.endswith("ana: @fimosin_bot resume a thread")
+        assert "mensagem número 40 da thread" in prompt
+        assert "mensagem número 1 da" not in prompt
+        assert len(prompt) / 3.5 <= 140, len(prompt)
+        print("   ✓ Oldest turns dropped to fit the budget, mention always kept")
+
+        bare = ConversationContext(MessageService(), window=10)
+        mention = bare.build(CHAT_ID, 1, "ana", "@fimosin_bot oi")
+        assert mention.prompt == mention.cache_text == "@fimosin_bot oi"
+        print("   ✓ Mention without context is sent as is")
+    finally:
+        cleanup()
+
+    print("\n✅ Token budget tests passed!")
+
+
+def main():
+    """Run all tests."""
+    try:
+        test_reply_chain_from_window()
+        test_database_fallback()
+        test_chat_scoped_update()
+        test_token_budget()
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+        return 0
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return 1
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+
+        traceback.print_exc()
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
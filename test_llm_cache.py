@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+"""
+Testa o cache de respostas de LLM (LlmCacheService e providers.cache).
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from domain import LlmCacheService, LlmCacheStats, LlmResponseCache, init_database
+from providers.cache import CHAT, RESUME, ResponseCache, content_key, prompt_key
+from providers.factory import ProviderServerError
+
+
+def test_keys():
+    """Variações triviais compartilham a chave; modelo e conteúdo não."""
+    print("\n" + "=" * 50)
+    print("Testing cache keys")
+    print("=" * 50)
+
+    key = prompt_key("Qual a capital da França?", "glm-4.7")
+    assert key == prompt_key("  qual a capital   da FRANÇA?\n", "glm-4.7")
+    assert key != prompt_key("Qual a capital da França?", "llama")
+    assert key != prompt_key("Qual a capital da França?", "glm-4.7", "seja breve")
+    assert key.startswith(f"{CHAT}:")
+    print("   ✓ Prompt keys normalized, model and system prompt included")
+
+    url = "https://www.youtube.com/watch?v=dQw4w9WgXcQ&utm_source=x"
+    key = content_key(url, "texto", "glm-4.7")
+    assert key == content_key("https://youtu.be/dQw4w9WgXcQ", "texto", "glm-4.7")
+    assert key != content_key(url, "texto mudou", "glm-4.7")
+    assert key.startswith(f"{RESUME}:")
+    print("   ✓ Content keys use the canonical link and content hash")
+
+    print("\n✅ Cache key tests passed!")
+
+
+def test_llm_cache():
+    """TTL, despejo LRU e métricas de acerto."""
+    print("\n" + "=" * 50)
+    print("Testing LlmCacheService")
+    print("=" * 50)
+
+    init_database()
+    prefix = "test-llm:"
+    kind = "test-llm"
+    LlmResponseCache.delete().where(LlmResponseCache.key.startswith(prefix)).execute()
+    LlmCacheStats.delete().where(LlmCacheStats.kind == kind).execute()
+
+    service = LlmCacheService(max_entries=10_000, max_bytes=10 * 1024 * 1024)
+    try:
+        assert service.get(f"{prefix}a", kind) is None, "Unexpected cache hit"
+        assert service.put(f"{prefix}a", kind, "resposta", ttl=60, model="glm-4.7")
+        cached = service.get(f"{prefix}a", kind)
+        assert cached and cached.text == "resposta" and cached.model == "glm-4.7"
+        print("   ✓ Answer stored and found")
+
+        assert service.put(f"{prefix}old", kind, "velha", ttl=0.05)
+        time.sleep(0.1)
+        assert service.get(f"{prefix}old", kind) is None, "Expired entry returned"
+        print("   ✓ Expired entries are not returned")
+
+        metrics = service.metrics()["kinds"][kind]
+        assert (metrics["hits"], metrics["misses"]) == (1, 2), metrics
+        assert metrics["hit_rate"] == 0.333, metrics
+        print("   ✓ Hit rate recorded per kind")
+
+        current = LlmResponseCache.select().count()
+        small = LlmCacheService(max_entries=current + 1, max_bytes=10 * 1024 * 1024)
+        small.put(f"{prefix}new", kind, "nova", ttl=60)
+        small.put(f"{prefix}newer", kind, "mais nova", ttl=60)
+        assert LlmResponseCache.select().count() <= current + 1, "Cache over capacity"
+        assert small.get(f"{prefix}newer", kind), "Newest entry evicted"
+        assert not LlmResponseCache.get_or_none(LlmResponseCache.key == f"{prefix}old")
+        print("   ✓ Expired and least recently used entries evicted")
+    finally:
+        LlmResponseCache.delete().where(
+            LlmResponseCache.key.startswith(prefix)
+        ).execute()
+        LlmCacheStats.delete().where(LlmCacheStats.kind == kind).execute()
+
+    print("\n✅ LlmCacheService tests passed!")
+
+
+def test_cached_stream():
+    """Só respostas completas são guardadas; acertos não chamam o LLM."""
+    print("\n" + "=" * 50)
+    print("Testing ResponseCache.astream")
+    print("=" * 50)
+
+    init_database()
+    prefix = "test-llm-stream:"
+    kind = "test-llm"
+    cache = ResponseCache()
+    calls = []
+
+    def llm(fail=False):
+        async def stream():
+            calls.append(1)
+            yield "Olá"
+            if fail:
+                raise ProviderServerError("caiu")
+            yield ", mundo"
+
+        return stream
+
+    async def collect(stream):
+        return "".join([piece async for piece in stream])
+
+    async def run():
+        try:
+            await collect(cache.astream(f"{prefix}x", kind, llm(fail=True)))
+            raise AssertionError("Expected the stream to fail")
+        except ProviderServerError:
+            pass
+        assert await collect(cache.astream(f"{prefix}x", kind, llm())) == "Olá, mundo"
+        assert await collect(cache.astream(f"{prefix}x", kind, llm())) == "Olá, mundo"
+        assert len(calls) == 2, calls
+
+    try:
+        asyncio.run(run())
+        print("   ✓ Failed stream not cached, complete one served from cache")
+    finally:
+        LlmResponseCache.delete().where(
+            LlmResponseCache.key.startswith(prefix)
+        ).execute()
+        LlmCacheStats.delete().where(LlmCacheStats.kind == kind).execute()
+
+    print("\n✅ ResponseCache tests passed!")
+
+
+def main():
+    """Run all tests."""
+    try:
+        test_keys()
+        test_llm_cache()
+        test_cached_stream()
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+        return 0
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return 1
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+
+        traceback.print_exc()
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
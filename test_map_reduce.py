@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+"""
+Testa o chunker por tokens e o resumo em map-reduce do /resume.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from providers.router import Backend, CircuitBreaker, ProviderRouter
+from providers.summarize import MapReduceSummarizer
+from providers.tokens import chunk_text, count_tokens, fit_lines, token_budget
+
+DOCUMENT = "\n\n".join(
+    " ".join(f"Frase {p}.{s} do parágrafo {p} com algumas palavras." for s in range(8))
+    for p in range(40)
+)
+
+
+def test_chunk_text():
+    """Pedaços respeitam o limite, cobrem o texto e cortam em frases."""
+    print("\n" + "=" * 50)
+    print("Testing chunk_text")
+    print("=" * 50)
+
+    assert chunk_text("", 100) == []
+    assert chunk_text("curto", 100) == ["curto"]
+    print("   ✓ Short text is a single chunk")
+
+    chunks = chunk_text(DOCUMENT, 200)
+    assert len(chunks) > 1
+    assert all(count_tokens(chunk) <= 200 for chunk in chunks), "Chunk over limit"
+    assert all(chunk.endswith(".") for chunk in chunks), "Chunk cut mid-sentence"
+    assert " ".join(" ".join(chunks).split()) == " ".join(DOCUMENT.split())
+    print(f"   ✓ {count_tokens(DOCUMENT)} tokens in {len(chunks)} chunks of <= 200")
+
+    chunks = chunk_text("x" * 5000, 100)
+    assert len(chunks) > 1 and all(count_tokens(chunk) <= 100 for chunk in chunks)
+    print("   ✓ Oversized words are cut")
+
+    lines = [f"user{i}: mensagem número {i}" for i in range(100)]
+    kept = fit_lines(lines, 100)
+    assert kept and kept == lines[-len(kept):], kept
+    assert sum(count_tokens(line) + 1 for line in kept) <= 100
+    assert token_budget("llama-3.1-8b-instant", 1000) < token_budget("glm-4.7", 1000)
+    print(f"   ✓ Newest {len(kept)} lines kept within a 100 token budget")
+
+    print("\n✅ chunk_text tests passed!")
+
+
+def test_map_reduce():
+    """Partes em paralelo com limite de concorrência, espalhadas nos backends."""
+    print("\n" + "=" * 50)
+    print("Testing MapReduceSummarizer")
+    print("=" * 50)
+
+    calls = []
+    active = {"now": 0, "max": 0}
+
+    def backend(name: str) -> Backend:
+        async def call(message: str) -> str:
+            calls.append(name)
+            active["now"] += 1
+            active["max"] = max(active["max"], active["now"])
+            await asyncio.sleep(0.02)
+            active["now"] -= 1
+            return "resumo curto da parte."
+
+        async def stream(message: str):
+            calls.append(f"{name}-stream")
+            yield "resumo "
+            yield "final" if "resumos parciais" in message else "direto"
+
+        return Backend(name, call, breaker=CircuitBreaker(name), stream=stream)
+
+    router = ProviderRouter([backend("zai"), backend("groq")], hedge_after=5)
+    summarizer = MapReduceSummarizer(router, chunk_tokens=400, concurrency=3)
+
+    async def collect(title, content):
+        stream = summarizer.astream(title, content, "Resuma")
+        return "".join([piece async for piece in stream])
+
+    async def run():
+        assert await collect("Curto", "texto pequeno") == "resumo direto"
+        assert calls == ["zai-stream"], calls
+        print("   ✓ Content that fits goes in a single prompt")
+
+        calls.clear()
+        assert await collect("Longo", DOCUMENT) == "resumo final"
+        parts = len(chunk_text(DOCUMENT, 400))
+        assert len(calls) == parts + 1, calls
+        assert active["max"] == 3, active
+        print(f"   ✓ {parts} parts mapped with at most 3 concurrent calls, then reduced")
+
+        assert calls.count("zai") and calls.count("groq"), calls
+        assert abs(calls.count("zai") - calls.count("groq")) <= 1, calls
+        print("   ✓ Map calls spread over the backends")
+
+        calls.clear()
+        summarizer.chunk_tokens = 200
+        assert await collect("Longo", DOCUMENT) == "resumo final"
+        assert len(calls) > len(chunk_text(DOCUMENT, 200)) + 1, calls
+        assert calls[-1] == "zai-stream", calls
+        print("   ✓ Partial summaries that do not fit are mapped again")
+
+    asyncio.run(run())
+
+    # Primário acima do atraso do hedge: o map não pode disparar o secundário
+    calls.clear()
+    active.update(now=0, max=0)
+    router = ProviderRouter([backend("zai"), backend("groq")], hedge_after=0.005)
+    summarizer = MapReduceSummarizer(router, chunk_tokens=400, concurrency=3)
+    asyncio.run(collect("Longo", DOCUMENT))
+    assert active["max"] <= 3 and router.hedges == 0, (active, router.hedges)
+    print("   ✓ Map calls are not hedged, the cap holds per provider call")
+
+    # Resumos parciais que não encolhem: o reduce ainda cabe no limite
+    prompts = []
+
+    async def echo(message: str) -> str:
+        return message
+
+    async def capture(message: str):
+        prompts.append(message)
+        yield "resumo"
+
+    echoing = Backend("echo", echo, breaker=CircuitBreaker("echo"), stream=capture)
+    summarizer = MapReduceSummarizer(ProviderRouter([echoing]), chunk_tokens=400)
+    assert asyncio.run(collect("Longo", DOCUMENT)) == "resumo"
+    content = prompts[-1].split("content: ", 1)[1]
+    assert count_tokens(content) <= 400, count_tokens(content)
+    assert "[Parte 1]" in content
+    print("   ✓ Reduce prompt truncated when summaries stop shrinking")
+
+    print("\n✅ MapReduceSummarizer tests passed!")
+
+
+def main():
+    """Run all tests."""
+    try:
+        test_chunk_text()
+        test_map_reduce()
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+        return 0
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return 1
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+
+        traceback.print_exc()
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""
+Testa a escolha do formato baixado a partir do info do probe (download_media).
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import yt_dlp
+
+from telegrambot.handlers.errors import VideoNotFound
+from telegrambot.handlers.utils import download_media
+
+
+def fake_info() -> dict:
+    """Resultado de extrator com vídeo e áudio separados e progressivos."""
+
+    def fmt(format_id, height, vcodec="avc1", acodec="mp4a", ext="mp4"):
+        return {
+            "format_id": format_id,
+            "url": f"https://example.com/{format_id}",
+            "ext": ext,
+            "height": height,
+            "width": height and height * 16 // 9,
+            "vcodec": vcodec,
+            "acodec": acodec,
+            "protocol": "https",
+        }
+
+    return {
+        "id": "fake",
+        "title": "Fake video",
+        "extractor": "fake",
+        "extractor_key": "Fake",
+        "webpage_url": "https://example.com/watch/fake",
+        "formats": [
+            fmt("a", None, vcodec="none", ext="m4a"),
+            fmt("p360", 360),
+            fmt("p720", 720),
+            fmt("v720", 720, acodec="none"),
+            fmt("v1080", 1080, acodec="none"),
+        ],
+    }
+
+
+def test_download_uses_video_profile():
+    """O perfil "video" escolhe de novo o formato, ignorando o do probe."""
+    print("\n" + "=" * 50)
+    print("Testing download_media format selection")
+    print("=" * 50)
+
+    # Probe com o seletor padrão quando há ffmpeg: bestvideo+bestaudio
+    with yt_dlp.YoutubeDL({"quiet": True, "format": "bestvideo+bestaudio"}) as probe:
+        info = probe.process_ie_result(fake_info(), download=False)
+    assert [f["format_id"] for f in info["requested_formats"]] == ["v1080", "a"]
+
+    downloaded = []
+    original = yt_dlp.YoutubeDL.process_info
+
+    def record(self, info_dict):
+        formats = info_dict.get("requested_formats") or [info_dict]
+        downloaded.append([f["format_id"] for f in formats])
+
+    yt_dlp.YoutubeDL.process_info = record
+    try:
+        download_media(info)
+        raise AssertionError("Expected no file to be written")
+    except VideoNotFound:
+        pass
+    finally:
+        yt_dlp.YoutubeDL.process_info = original
+
+    assert downloaded == [["p720"]], downloaded
+    assert info["requested_formats"], "Probe info was modified"
+    print("   ✓ 720p mp4 downloaded instead of the probe's 1080p merge")
+
+    print("\n✅ download_media tests passed!")
+
+
+def main():
+    """Run all tests."""
+    try:
+        test_download_uses_video_profile()
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+        return 0
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return 1
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+
+        traceback.print_exc()
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
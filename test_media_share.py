@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+"""
+Testa a canonicalização de links e a detecção de links repetidos
+(MediaShareService).
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from domain import MediaShare, MediaShareService, canonicalize_link, init_database
+
+
+def test_canonicalize_link():
+    """Variações do mesmo conteúdo devem gerar a mesma chave."""
+    print("\n" + "=" * 50)
+    print("Testing canonicalize_link")
+    print("=" * 50)
+
+    groups = [
+        [
+            "https://www.instagram.com/reel/DAbc123xyz/?igsh=MWQ1ZGUxMzBkMA==",
+            "https://instagram.com/reels/DAbc123xyz",
+            "https://m.instagram.com/p/DAbc123xyz/?utm_source=ig_web_copy_link",
+        ],
+        [
+            "https://x.com/someone/status/1790000000000000000?s=46&t=abc",
+            "https://twitter.com/someone/status/1790000000000000000",
+            "https://mobile.twitter.com/i/status/1790000000000000000/photo/1",
+            "https://fxtwitter.com/someone/status/1790000000000000000",
+        ],
+        [
+            "https://www.youtube.com/shorts/dQw4w9WgXcQ?feature=share",
+            "https://youtube.com/shorts/dQw4w9WgXcQ?si=xyz",
+            "https://youtu.be/dQw4w9WgXcQ",
+            "https://m.youtube.com/watch?v=dQw4w9WgXcQ&t=10",
+        ],
+        [
+            "https://www.facebook.com/reel/123456789012345?mibextid=abc",
+            "https://m.facebook.com/reel/123456789012345/",
+        ],
+        [
+            "https://bsky.app/profile/Someone.bsky.social/post/3kxyzabc",
+            "https://bsky.app/profile/someone.bsky.social/post/3kxyzabc/",
+        ],
+    ]
+
+    keys = []
+    for group in groups:
+        group_keys = {canonicalize_link(link) for link in group}
+        assert len(group_keys) == 1, f"Keys differ: {group_keys}"
+        keys.append(group_keys.pop())
+        print(f"   ✓ {keys[-1]}")
+
+    assert len(set(keys)) == len(keys), "Different contents share a key"
+
+    generic = canonicalize_link("https://Example.com/a/b/?utm_source=x&page=2")
+    assert generic == "https://example.com/a/b?page=2", generic
+    print(f"   ✓ {generic}")
+
+    print("\n✅ canonicalize_link tests passed!")
+
+
+def test_previous_shares():
+    """O mesmo reel com outra URL deve ser detectado como repetido."""
+    print("\n" + "=" * 50)
+    print("Testing MediaShareService")
+    print("=" * 50)
+
+    init_database()
+    service = MediaShareService()
+    chat_id = 424242
+    MediaShare.delete().where(MediaShare.chat_id == chat_id).execute()
+
+    try:
+        assert not service.get_previous_shares(
+            "https://www.instagram.com/reel/Test123/", chat_id
+        ), "Unexpected share"
+
+        assert service.record_share(
+            "https://www.instagram.com/reel/Test123/?igsh=abc", "alice", chat_id
+        )
+        assert service.record_share(
+            "https://instagram.com/reels/Test123", "bob", chat_id
+        )
+        print("   ✓ Shares recorded")
+
+        shares = service.get_previous_shares(
+            "https://m.instagram.com/p/Test123", chat_id
+        )
+        assert [s.sender for s in shares] == ["alice", "bob"], shares
+        print(f"   ✓ First share by {shares[0].sender} at {shares[0].created_at}")
+
+        assert not service.get_previous_shares(
+            "https://instagram.com/reel/Test123", chat_id + 1
+        ), "Shares leaked across chats"
+        print("   ✓ Lookup is scoped per chat")
+
+        recent = list(service.iter_recent_shares(chat_id))
+        assert [s.sender for s in recent] == ["bob", "alice"], recent
+        print("   ✓ Recent shares iterated newest first")
+    finally:
+        MediaShare.delete().where(MediaShare.chat_id == chat_id).execute()
+
+    print("\n✅ MediaShareService tests passed!")
+
+
+def main():
+    """Run all tests."""
+    try:
+        test_canonicalize_link()
+        test_previous_shares()
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+        return 0
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return 1
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+
+        traceback.print_exc()
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,265 @@
+#!/usr/bin/env python
+"""
+Testa o circuit breaker e o hedge entre backends de chat (ProviderRouter).
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from providers.factory import ProviderServerError, ProviderUnavailableError
+from providers.router import CLOSED, HALF_OPEN, OPEN, Backend, CircuitBreaker, ProviderRouter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def fake_backend(name: str, delay: float = 0.0, fail: bool = False, calls=None) -> Backend:
+    async def call(message: str) -> str:
+        if calls is not None:
+            calls.append(name)
+        await asyncio.sleep(delay)
+        if fail:
+            raise ProviderServerError(f"{name} down")
+        return f"{name}: {message}"
+
+    async def stream(message: str):
+        if calls is not None:
+            calls.append(name)
+        await asyncio.sleep(delay)
+        if fail:
+            raise ProviderServerError(f"{name} down")
+        for piece in (f"{name}:", " ", message):
+            yield piece
+            await asyncio.sleep(0.01)
+
+    return Backend(
+        name, call, breaker=CircuitBreaker(name, failures=2, cooldown=30), stream=stream
+    )
+
+
+async def collect(stream) -> str:
+    return "".join([piece async for piece in stream])
+
+
+def test_circuit_breaker():
+    """Abre após falhas seguidas, deixa um probe passar após o cooldown."""
+    print("\n" + "=" * 50)
+    print("Testing CircuitBreaker")
+    print("=" * 50)
+
+    clock = FakeClock()
+    breaker = CircuitBreaker("zai", failures=3, window=10, cooldown=30, clock=clock)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow()
+    print("   ✓ Opens after consecutive failures")
+
+    clock.now = 31
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert not breaker.allow(), "More than one probe let through"
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow()
+    print("   ✓ Failed probe opens it again")
+
+    clock.now = 62
+    assert breaker.allow()
+    breaker.record_success(0.5)
+    assert breaker.state == CLOSED and breaker.allow()
+    print("   ✓ Successful probe closes it")
+
+    # Taxa de erro alta mesmo sem falhas seguidas
+    breaker = CircuitBreaker("groq", failures=100, error_rate=0.5, window=10, clock=clock)
+    for ok in (True, False, True, False):
+        if ok:
+            breaker.record_success(1.0)
+        else:
+            breaker.record_failure()
+    assert breaker.state == CLOSED, "Opened before half of the window"
+    breaker.record_failure()
+    assert breaker.state == OPEN, breaker.snapshot()
+    breaker.record_success(1.0)
+    assert breaker.state == OPEN, "Late answer closed an open circuit"
+    assert breaker.latency_quantile(0.9) == 1.0
+    print("   ✓ Opens on error rate over the window")
+
+    print("\n✅ CircuitBreaker tests passed!")
+
+
+def test_hedging():
+    """Primário lento dispara o secundário; falha rápida passa a vez na hora."""
+    print("\n" + "=" * 50)
+    print("Testing ProviderRouter hedging")
+    print("=" * 50)
+
+    async def run():
+        router = ProviderRouter(
+            [fake_backend("zai", delay=0.01), fake_backend("groq", delay=0.01)],
+            hedge_after=0.2,
+        )
+        assert await router.complete("oi") == "zai: oi"
+        assert router.hedges == 0
+        print("   ✓ Fast primary answers alone")
+
+        calls = []
+        router = ProviderRouter(
+            [
+                fake_backend("zai", delay=5, calls=calls),
+                fake_backend("groq", delay=0.01, calls=calls),
+            ],
+            hedge_after=0.05,
+        )
+        start = time.monotonic()
+        assert await router.complete("oi") == "groq: oi"
+        assert time.monotonic() - start < 1, "Waited for the slow primary"
+        assert router.hedges == 1 and router.hedge_wins == 1
+        print("   ✓ Slow primary is hedged and the first answer wins")
+
+        # Perder a corrida conta como falha: na segunda vez o circuito abre
+        assert await router.complete("oi") == "groq: oi"
+        zai = router.backends[0].breaker
+        assert zai.state == OPEN, zai.snapshot()
+        calls.clear()
+        assert await router.complete("oi") == "groq: oi"
+        assert calls == ["groq"], calls
+        print("   ✓ Open circuit skips the degraded backend")
+
+        # Secundário em half-open e primário rápido: o probe não fica preso
+        clock = FakeClock()
+        groq = fake_backend("groq")
+        groq.breaker = CircuitBreaker("groq", failures=1, cooldown=30, clock=clock)
+        groq.breaker.record_failure()
+        clock.now = 31
+        router = ProviderRouter([fake_backend("zai", delay=0.01), groq], hedge_after=5)
+        for _ in range(3):
+            assert await router.complete("oi") == "zai: oi"
+            assert groq.breaker.state == HALF_OPEN and not groq.breaker.probing
+        assert groq.breaker.allow(), "Half-open secondary stuck refusing calls"
+        print("   ✓ Unused half-open secondary releases its probe")
+
+        router = ProviderRouter(
+            [fake_backend("zai", fail=True), fake_backend("groq", delay=0.01)],
+            hedge_after=5,
+        )
+        start = time.monotonic()
+        assert await router.complete("oi") == "groq: oi"
+        assert time.monotonic() - start < 1, "Waited for the hedge delay"
+        assert router.hedges == 0
+        print("   ✓ Early failure hands over without waiting")
+
+        router = ProviderRouter(
+            [fake_backend("zai", fail=True), fake_backend("groq", fail=True)],
+            hedge_after=5,
+        )
+        assert await router.chat("oi") is None
+        assert await router.chat("oi") is None
+        try:
+            await router.complete("oi")
+            raise AssertionError("Expected every circuit to be open")
+        except ProviderUnavailableError:
+            pass
+        metrics = router.metrics()
+        assert metrics["backends"]["groq"]["state"] == OPEN, metrics
+        print("   ✓ No answer when every backend is down")
+
+    asyncio.run(run())
+    print("\n✅ ProviderRouter tests passed!")
+
+
+def test_streaming():
+    """O hedge do streaming é decidido pelo primeiro pedaço."""
+    print("\n" + "=" * 50)
+    print("Testing ProviderRouter streaming")
+    print("=" * 50)
+
+    async def run():
+        router = ProviderRouter(
+            [fake_backend("zai", delay=0.01), fake_backend("groq")], hedge_after=0.5
+        )
+        assert await collect(router.astream("oi")) == "zai: oi"
+        assert router.backends[0].breaker.snapshot()["calls"] == 1
+        print("   ✓ Primary streams alone and is recorded")
+
+        router = ProviderRouter(
+            [fake_backend("zai", delay=5), fake_backend("groq")], hedge_after=0.05
+        )
+        start = time.monotonic()
+        assert await collect(router.astream("oi")) == "groq: oi"
+        assert time.monotonic() - start < 1, "Waited for the slow primary"
+        assert router.hedge_wins == 1
+        assert router.backends[0].breaker.outcomes[-1] is False
+        print("   ✓ Slow first token is hedged")
+
+        clock = FakeClock()
+        groq = fake_backend("groq")
+        groq.breaker = CircuitBreaker("groq", failures=1, cooldown=30, clock=clock)
+        groq.breaker.record_failure()
+        clock.now = 31
+        router = ProviderRouter([fake_backend("zai", delay=0.01), groq], hedge_after=5)
+        for _ in range(3):
+            assert await collect(router.astream("oi")) == "zai: oi"
+            assert groq.breaker.state == HALF_OPEN and not groq.breaker.probing
+        print("   ✓ Unused half-open hedge releases its probe")
+
+        router = ProviderRouter(
+            [fake_backend("zai", fail=True), fake_backend("groq")], hedge_after=5
+        )
+        assert await collect(router.astream("oi")) == "groq: oi"
+        print("   ✓ Early failure hands over without waiting")
+
+        # Consumidor desiste no meio: nada é contado e o probe é liberado
+        router = ProviderRouter([fake_backend("zai")], hedge_after=5)
+        stream = router.astream("oi")
+        assert await anext(stream) == "zai:"
+        await stream.aclose()
+        zai = router.backends[0].breaker
+        assert zai.snapshot()["calls"] == 0 and not zai.probing
+        print("   ✓ Closing the stream releases the backend")
+
+        router = ProviderRouter(
+            [fake_backend("zai", fail=True), fake_backend("groq", fail=True)]
+        )
+        try:
+            await collect(router.astream("oi"))
+            raise AssertionError("Expected the stream to fail")
+        except ProviderServerError:
+            pass
+        print("   ✓ Error raised when every backend fails")
+
+    asyncio.run(run())
+    print("\n✅ ProviderRouter streaming tests passed!")
+
+
+def main():
+    """Run all tests."""
+    try:
+        test_circuit_breaker()
+        test_hedging()
+        test_streaming()
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+        return 0
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return 1
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+
+        traceback.print_exc()
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
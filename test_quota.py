@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+"""
+Testa as cotas compartilhadas entre processos (QuotaService e providers.quota).
+"""
+
+import asyncio
+import multiprocessing
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from domain import QuotaBucket, QuotaService, init_database
+from providers.factory import ProviderRateLimitError, QuotaExceededError, RateLimitExceededError
+from providers.quota import QuotaLimit, QuotaManager, SharedRateLimiter
+from providers.retry import RetryPolicy
+from providers.router import CLOSED, Backend, CircuitBreaker, ProviderRouter
+
+PREFIX = "test-quota"
+
+
+def cleanup():
+    QuotaBucket.delete().where(QuotaBucket.key.startswith(PREFIX)).execute()
+
+
+def take_all(name: str, attempts: int, results) -> None:
+    """Processo filho: tenta reservar ``attempts`` vezes do mesmo bucket."""
+    init_database()
+    limiter = SharedRateLimiter(name, [QuotaLimit(10, 3600)])
+    results.put(sum(limiter.try_acquire() for _ in range(attempts)))
+
+
+def test_token_buckets():
+    """Reserva em todos os buckets ou em nenhum; fichas voltam com o tempo."""
+    print("\n" + "=" * 50)
+    print("Testing QuotaService token buckets")
+    print("=" * 50)
+
+    init_database()
+    cleanup()
+    service = QuotaService()
+    minute = (f"{PREFIX}:a:60", 3.0, 3 / 60)
+    day = (f"{PREFIX}:a:86400", 4.0, 4 / 86400)
+    try:
+        assert service.take([minute, day], 2) == 0
+        assert service.take([minute, day], 1) == 0
+        wait = service.take([minute, day], 1)
+        assert 15 < wait <= 20, wait
+        print("   ✓ Bucket empties and reports the refill wait")
+
+        # 1 ficha no dia, mas o minuto está vazio: nada é tirado do dia
+        available, _ = service.peek([day])
+        assert 0.99 < available < 1.01, available
+        print("   ✓ Denied reservation takes nothing from the other buckets")
+
+        fast = (f"{PREFIX}:b:1", 2.0, 20.0)
+        assert service.take([fast], 2) == 0
+        assert service.take([fast], 1) > 0
+        time.sleep(0.1)
+        assert service.take([fast], 1) == 0
+        assert service.take([fast], 5) == float("inf"), "More than capacity granted"
+        print("   ✓ Tokens refill over time, requests above capacity never fit")
+
+        usage = service.usage()[f"{PREFIX}:a:60"]
+        assert (usage["granted"], usage["denied"], usage["capacity"]) == (2, 1, 3.0), usage
+        print("   ✓ Granted and denied counted per bucket")
+    finally:
+        cleanup()
+
+    print("\n✅ QuotaService tests passed!")
+
+
+def test_shared_limiter():
+    """Vários processos disputando o mesmo bucket não passam da cota."""
+    print("\n" + "=" * 50)
+    print("Testing SharedRateLimiter across processes")
+    print("=" * 50)
+
+    init_database()
+    cleanup()
+    try:
+        results = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(target=take_all, args=(f"{PREFIX}:shared", 6, results))
+            for _ in range(3)
+        ]
+        for worker in workers:
+            worker.start()
+        granted = sum(results.get(timeout=30) for _ in workers)
+        for worker in workers:
+            worker.join()
+        assert granted == 10, granted
+        print("   ✓ 3 processes x 6 attempts granted exactly the 10 calls of the quota")
+
+        limiter = SharedRateLimiter(f"{PREFIX}:shared", [QuotaLimit(10, 3600)])
+        assert limiter.remaining() == 0
+        assert 300 < limiter.reset_in() <= 360
+        try:
+            limiter.check()
+            raise AssertionError("Expected the quota to be exceeded")
+        except RateLimitExceededError as e:
+            assert isinstance(e, ProviderRateLimitError) and e.retry_after > 300
+        print("   ✓ RateLimiter contract kept (remaining, reset_in, check)")
+    finally:
+        cleanup()
+
+    print("\n✅ SharedRateLimiter tests passed!")
+
+
+def test_async_acquire():
+    """acquire espera a ficha sem bloquear o loop; timeout=0 não espera."""
+    print("\n" + "=" * 50)
+    print("Testing QuotaManager.acquire")
+    print("=" * 50)
+
+    init_database()
+    cleanup()
+    # 2 chamadas que se repõem em 0.2s: uma ficha a cada 0.1s
+    manager = QuotaManager({(PREFIX, "async"): [QuotaLimit(2, 0.2)]})
+
+    async def run():
+        assert await manager.atry_acquire(PREFIX, "async", 2)
+        assert not await manager.atry_acquire(PREFIX, "async")
+        try:
+            await manager.acquire(PREFIX, "async", timeout=0)
+            raise AssertionError("Expected a rate limit error")
+        except ProviderRateLimitError:
+            pass
+
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        start = time.monotonic()
+        await manager.acquire(PREFIX, "async", timeout=1)
+        waited = time.monotonic() - start
+        task.cancel()
+        assert 0.05 < waited < 0.5, waited
+        assert ticks >= 3, "Event loop blocked while waiting"
+        assert await manager.atry_acquire("other", "model"), "Unlimited pair refused"
+
+    try:
+        asyncio.run(run())
+        print("   ✓ Waits for the refill without blocking the event loop")
+        print("   ✓ timeout=0 fails fast, pairs without quota are not limited")
+    finally:
+        cleanup()
+
+    print("\n✅ QuotaManager tests passed!")
+
+
+def test_router_quota_denial():
+    """Cota local esgotada não abre o circuito nem é retentada."""
+    print("\n" + "=" * 50)
+    print("Testing quota denials in the ProviderRouter")
+    print("=" * 50)
+
+    init_database()
+    cleanup()
+    manager = QuotaManager({(PREFIX, "router"): [QuotaLimit(1, 3600)]})
+    calls = []
+
+    async def call(message: str) -> str:
+        await manager.acquire(PREFIX, "router", timeout=0)
+        calls.append(message)
+        return message
+
+    backend = Backend(
+        "limited",
+        call,
+        retry=RetryPolicy(attempts=3, base_delay=0.01),
+        breaker=CircuitBreaker("limited", failures=2),
+    )
+    router = ProviderRouter([backend])
+
+    async def run():
+        assert await router.complete("oi") == "oi"
+        for _ in range(3):
+            try:
+                await router.complete("oi")
+                raise AssertionError("Expected the quota to be exceeded")
+            except QuotaExceededError:
+                pass
+
+    try:
+        asyncio.run(run())
+        assert calls == ["oi"], calls
+        assert backend.breaker.state == CLOSED, backend.breaker.snapshot()
+        assert backend.breaker.snapshot()["calls"] == 1
+        print("   ✓ Local denials are neither retried nor counted as failures")
+    finally:
+        cleanup()
+
+    print("\n✅ Router quota tests passed!")
+
+
+def main():
+    """Run all tests."""
+    try:
+        test_token_buckets()
+        test_shared_limiter()
+        test_async_acquire()
+        test_router_quota_denial()
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+        return 0
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return 1
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+
+        traceback.print_exc()
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
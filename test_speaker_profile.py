@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""
+Testa o perfil de idioma e de modelo por falante (SpeakerProfileService).
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from domain import (
+    SpeakerModelQuality,
+    SpeakerProfile,
+    SpeakerProfileService,
+    init_database,
+)
+
+CHAT_ID = -987654321
+MODELS = ["base", "small"]  # do menor para o maior
+
+
+def cleanup():
+    for model in (SpeakerProfile, SpeakerModelQuality):
+        model.delete().where(model.chat_id == CHAT_ID).execute()
+
+
+def test_language_pinning():
+    """O idioma é fixado após detecções confiantes e solto se a qualidade cair."""
+    print("\n" + "=" * 50)
+    print("Testing language pinning")
+    print("=" * 50)
+
+    init_database()
+    cleanup()
+    try:
+        service = SpeakerProfileService()
+        assert service.get_profile(CHAT_ID, 1, MODELS).language is None
+
+        service.record(CHAT_ID, 1, "small", "pt", 0.95, -0.3)
+        service.record(CHAT_ID, 1, "small", "pt", 0.5, -0.3)  # pouco confiante: ignorada
+        service.record(CHAT_ID, 1, "small", "pt", 0.9, -0.3)
+        assert service.get_profile(CHAT_ID, 1, MODELS).language is None, "Pinned too early"
+        service.record(CHAT_ID, 1, "small", "pt", 0.9, -0.3)
+        assert service.get_profile(CHAT_ID, 1, MODELS).language == "pt"
+        print("   ✓ Language pinned after a confident streak")
+
+        service.record(CHAT_ID, 1, "small", "pt", 1.0, -1.5, pinned=True)
+        assert service.get_profile(CHAT_ID, 1, MODELS).language is None, "Still pinned"
+        print("   ✓ Low quality transcription unpins the language")
+
+        assert service.get_profile(CHAT_ID, 2, MODELS).language is None, "Leaked across users"
+        print("   ✓ Profiles are per user")
+    finally:
+        cleanup()
+
+
+def test_model_selection():
+    """Menor modelo que atinge a qualidade; modelos ruins são evitados."""
+    print("\n" + "=" * 50)
+    print("Testing model selection")
+    print("=" * 50)
+
+    init_database()
+    cleanup()
+    try:
+        service = SpeakerProfileService()
+        assert service.get_profile(CHAT_ID, 3, MODELS).model_size is None
+
+        for _ in range(2):
+            service.record(CHAT_ID, 3, "small", "pt", 0.9, -0.3)
+        assert service.get_profile(CHAT_ID, 3, MODELS).model_size == "small"
+        service.record(CHAT_ID, 3, "small", "pt", 0.9, -0.3)
+        assert service.get_profile(CHAT_ID, 3, MODELS).model_size == "base", (
+            "Smaller model not tried after the larger one proved good"
+        )
+        print("   ✓ Smaller model tried once the larger one is proven")
+
+        service.record(CHAT_ID, 3, "base", "pt", 0.9, -1.4)
+        assert service.get_profile(CHAT_ID, 3, MODELS).model_size == "small"
+        print("   ✓ Model below the quality bar is skipped")
+    finally:
+        cleanup()
+
+    print("\n✅ SpeakerProfileService tests passed!")
+
+
+def main():
+    """Run all tests."""
+    try:
+        test_language_pinning()
+        test_model_selection()
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+        return 0
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return 1
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+
+        traceback.print_exc()
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""
+Testa a renderização de respostas em streaming no Telegram
+(close_markdown e render_stream).
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from telegram.error import BadRequest
+
+from providers.factory import ProviderServerError
+from telegrambot.handlers.streaming import (
+    CURSOR,
+    FAILED_TEXT,
+    INTERRUPTED_NOTE,
+    close_markdown,
+    render_stream,
+)
+
+
+class FakeMessage:
+    """Registra as edições; rejeita Markdown com marcadores desbalanceados."""
+
+    def __init__(self):
+        self.edits = []
+        self.replies = []
+
+    async def edit_text(self, text, parse_mode=None, **kwargs):
+        if parse_mode and text.count("*") % 2:
+            raise BadRequest("Can't parse entities")
+        self.edits.append((text, parse_mode))
+
+    async def reply_text(self, text, parse_mode=None, **kwargs):
+        self.replies.append(text)
+
+
+async def pieces(items, delay=0.0, error=None):
+    for item in items:
+        await asyncio.sleep(delay)
+        yield item
+    if error:
+        raise error
+
+
+def test_close_markdown():
+    """Fecha entidades abertas sem criar entidades vazias."""
+    print("\n" + "=" * 50)
+    print("Testing close_markdown")
+    print("=" * 50)
+
+    assert close_markdown("ok *negrito* e _itálico_") == "ok *negrito* e _itálico_"
+    assert close_markdown("um *negrito") == "um *negrito*"
+    assert close_markdown("um *negrito _e itálico") == "um *negrito _e itálico_*"
+    assert close_markdown("termina em *") == "termina em "
+    assert close_markdown("código `x = 1") == "código `x = 1`"
+    assert close_markdown("`a*b` e *c") == "`a*b` e *c*", "Marker inside code counted"
+    assert close_markdown("```\nprint(1)") == "```\nprint(1)\n```"
+    assert close_markdown("veja [o site](http://exa") == "veja"
+    assert close_markdown("[link](http://a.b) e *x") == "[link](http://a.b) e *x*"
+    print("   ✓ Partial Markdown is balanced")
+
+    print("\n✅ close_markdown tests passed!")
+
+
+def test_render_stream():
+    """Edições agrupadas, resposta final formatada e métricas de latência."""
+    print("\n" + "=" * 50)
+    print("Testing render_stream")
+    print("=" * 50)
+
+    async def run():
+        message = FakeMessage()
+        result = await render_stream(
+            message, pieces(["Olá", ", *mundo", "*!"] * 10, delay=0.1)
+        )
+        assert result.text == "Olá, *mundo*!" * 10
+        assert 0.05 < result.first_token < result.total
+        assert result.chunks == 30
+        # ~3s de stream com uma edição a cada 1,5s no máximo
+        intermediate = [text for text, _ in message.edits if text.endswith(CURSOR)]
+        assert 1 <= len(intermediate) <= 3, message.edits
+        assert message.edits[-1] == (result.text, "markdown"), message.edits[-1]
+        print("   ✓ Edits coalesced, final answer formatted")
+
+        message = FakeMessage()
+        result = await render_stream(message, pieces(["um *solto"]))
+        assert message.edits[-1] == ("um *solto", None), message.edits
+        print("   ✓ Unparseable answer sent as plain text")
+
+        message = FakeMessage()
+        result = await render_stream(
+            message, pieces(["parcial"], error=ProviderServerError("caiu"))
+        )
+        assert result.error is not None and result.text == "parcial"
+        assert message.edits[-1][0] == "parcial" + INTERRUPTED_NOTE
+        print("   ✓ Interrupted stream keeps the partial answer")
+
+        message = FakeMessage()
+        result = await render_stream(
+            message, pieces([], error=ProviderServerError("caiu"))
+        )
+        assert result.first_token is None and message.edits[-1][0] == FAILED_TEXT
+        print("   ✓ No tokens: failure message")
+
+        message = FakeMessage()
+        await render_stream(message, pieces(["a" * 5000]), parse_mode=None)
+        assert len(message.edits[-1][0]) == 4096 and message.replies == ["a" * 904]
+        print("   ✓ Long answer continues in a reply")
+
+    asyncio.run(run())
+    print("\n✅ render_stream tests passed!")
+
+
+def main():
+    """Run all tests."""
+    try:
+        test_close_markdown()
+        test_render_stream()
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+        return 0
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return 1
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+
+        traceback.print_exc()
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
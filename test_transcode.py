@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+"""
+Testa o plano de recompressão para caber no limite de upload
+(plan_transcode e fit_to_upload_limit), sem precisar do ffmpeg.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from telegrambot.handlers import transcode
+from telegrambot.handlers.errors import MediaTooLarge
+from telegrambot.handlers.transcode import (
+    AUDIO_KBPS,
+    UPLOAD_LIMIT_BYTES,
+    MediaInfo,
+    fit_to_upload_limit,
+    plan_transcode,
+)
+
+
+def video(duration: float, height: int = 1080, audio_kbps: int = 128) -> MediaInfo:
+    return MediaInfo(
+        duration=duration,
+        bit_rate=None,
+        width=height * 16 // 9,
+        height=height,
+        audio_kbps=audio_kbps,
+    )
+
+
+def audio(duration: float, audio_kbps: int = 128) -> MediaInfo:
+    return MediaInfo(
+        duration=duration, bit_rate=None, width=None, height=None, audio_kbps=audio_kbps
+    )
+
+
+def test_under_limit():
+    """Arquivo que já cabe volta intacto, sem probe nem transcodificação."""
+    print("\n" + "=" * 50)
+    print("Testing file already under the limit")
+    print("=" * 50)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Probed a file that already fits")
+
+    original = transcode.probe_media
+    transcode.probe_media = fail
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "video.mp4")
+            with open(path, "wb") as f:
+                f.write(b"\0" * 1024)
+            assert fit_to_upload_limit(path, limit_bytes=2048) == path
+            assert os.path.exists(path)
+    finally:
+        transcode.probe_media = original
+    print("   ✓ Same path returned, nothing probed")
+
+    print("\n✅ Under-limit tests passed!")
+
+
+def test_plan_video():
+    """Bitrate dentro do orçamento, altura pela escada, sem aumentar a resolução."""
+    print("\n" + "=" * 50)
+    print("Testing plan_transcode for video")
+    print("=" * 50)
+
+    plan = plan_transcode(video(600))
+    size = (plan.video_kbps + plan.audio_kbps) * 1000 / 8 * 600
+    assert size <= UPLOAD_LIMIT_BYTES, size
+    assert plan.audio_kbps == AUDIO_KBPS
+    assert plan.height == 360, plan
+    print(f"   ✓ 10 min 1080p -> {plan.video_kbps}k at {plan.height}p, fits the limit")
+
+    plan = plan_transcode(video(120, height=480, audio_kbps=64))
+    assert plan.height is None, plan
+    assert plan.audio_kbps == 64
+    print("   ✓ Never upscales, keeps a lower source audio bitrate")
+
+    print("\n✅ Video plan tests passed!")
+
+
+def test_plan_audio_only():
+    """Só áudio: sem escala nem piso de vídeo."""
+    print("\n" + "=" * 50)
+    print("Testing plan_transcode for audio-only media")
+    print("=" * 50)
+
+    # uma hora: pouco orçamento para vídeo, mas o áudio cabe
+    plan = plan_transcode(audio(3600))
+    assert plan.video_kbps == 0 and plan.height is None, plan
+    assert plan.audio_kbps == AUDIO_KBPS
+    assert plan.audio_kbps * 1000 / 8 * 3600 <= UPLOAD_LIMIT_BYTES
+    print("   ✓ Long audio re-encoded at the audio bitrate, no video floor")
+
+    print("\n✅ Audio-only plan tests passed!")
+
+
+def test_too_long():
+    """Abaixo do piso de bitrate não há plano: MediaTooLarge."""
+    print("\n" + "=" * 50)
+    print("Testing media too long to fit")
+    print("=" * 50)
+
+    for info in (video(4 * 3600), audio(10 * 3600), video(0)):
+        try:
+            plan_transcode(info)
+            raise AssertionError(f"Expected MediaTooLarge for {info}")
+        except MediaTooLarge:
+            pass
+    print("   ✓ MediaTooLarge for long video, long audio and unknown duration")
+
+    print("\n✅ Too-long tests passed!")
+
+
+def main():
+    """Run all tests."""
+    try:
+        test_under_limit()
+        test_plan_video()
+        test_plan_audio_only()
+        test_too_long()
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+        return 0
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return 1
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+
+        traceback.print_exc()
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""
+Testa o cache persistente de transcrições (TranscriptService).
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from domain import TranscriptCache, TranscriptService, init_database
+
+
+def test_transcript_cache():
+    """Entradas são encontradas por qualquer chave e despejadas por LRU."""
+    print("\n" + "=" * 50)
+    print("Testing TranscriptService")
+    print("=" * 50)
+
+    init_database()
+    prefix = "test-transcript:"
+    TranscriptCache.delete().where(TranscriptCache.key.startswith(prefix)).execute()
+
+    service = TranscriptService(max_entries=10_000, max_bytes=10 * 1024 * 1024)
+    try:
+        assert service.get(f"{prefix}url") is None, "Unexpected cache hit"
+
+        assert service.put(
+            [f"{prefix}url", f"{prefix}sha256"],
+            "olá pessoal",
+            language="pt",
+            title="Vídeo",
+            origin="GROQ",
+        )
+        for key in (f"{prefix}url", f"{prefix}sha256"):
+            cached = service.get(key)
+            assert cached and cached.text == "olá pessoal", cached
+            assert (cached.language, cached.title, cached.origin) == (
+                "pt",
+                "Vídeo",
+                "GROQ",
+            )
+        print("   ✓ Transcript stored under every key")
+
+        current = TranscriptCache.select().count()
+        small = TranscriptService(max_entries=current + 1, max_bytes=10 * 1024 * 1024)
+        small.get(f"{prefix}url")  # mais recente que sha256
+        small.put([f"{prefix}new"], "novo")
+        small.put([f"{prefix}newer"], "mais novo")
+        assert TranscriptCache.select().count() <= current + 1, "Cache over capacity"
+        assert small.get(f"{prefix}newer"), "Newest entry evicted"
+        print("   ✓ Least recently used entries evicted")
+    finally:
+        TranscriptCache.delete().where(
+            TranscriptCache.key.startswith(prefix)
+        ).execute()
+
+    print("\n✅ TranscriptService tests passed!")
+
+
+def main():
+    """Run all tests."""
+    try:
+        test_transcript_cache()
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+        return 0
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return 1
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+
+        traceback.print_exc()
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""
+Testa o roteamento de transcrições entre Groq e whisper local
+(TranscriptionScheduler).
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from providers.factory import RateLimiter
+from telegrambot.handlers.transcription_scheduler import (
+    GROQ,
+    TranscriptionScheduler,
+    local_backend,
+)
+
+
+def test_rate_limiter():
+    """try_acquire reserva sem lançar exceção e respeita a janela."""
+    print("\n" + "=" * 50)
+    print("Testing RateLimiter.try_acquire")
+    print("=" * 50)
+
+    limiter = RateLimiter(3, 60)
+    assert limiter.try_acquire(2)
+    assert limiter.remaining() == 1
+    assert not limiter.try_acquire(2), "Reserved more calls than allowed"
+    assert limiter.remaining() == 1, "Failed reservation consumed quota"
+    assert 59 < limiter.reset_in(2) <= 60
+    assert limiter.reset_in(1) == 0
+    print("   ✓ Non-raising reservation and reset time")
+
+
+def test_routing():
+    """Groq enquanto houver cota; depois o melhor modelo local dentro do orçamento."""
+    print("\n" + "=" * 50)
+    print("Testing TranscriptionScheduler routing")
+    print("=" * 50)
+
+    scheduler = TranscriptionScheduler(
+        local_models=["small", "base"],
+        latency_budget=30,
+        groq_limiter=RateLimiter(2, 60),
+        groq_enabled=True,
+    )
+
+    route = scheduler.route(10)
+    assert route.backend == GROQ and not route.delay, route
+    assert scheduler.route(10, chunks=2).backend != GROQ, "Quota overbooked"
+    assert scheduler.route(10).backend == GROQ
+    print("   ✓ Groq used while quota lasts")
+
+    # Sem cota: esperar ~60s pelo Groq perde para o whisper local
+    route = scheduler.route(10)
+    assert route.backend == local_backend("small"), route
+    print("   ✓ Short audio falls back to the most accurate local model")
+
+    # Fila longa no small: o base cabe no orçamento, o small não
+    with scheduler.job(route, 300) as job:
+        job.started()
+        route = scheduler.route(10)
+        assert route.backend == local_backend("base"), route
+    print("   ✓ Queue depth moves jobs to a faster model")
+
+    # Áudio enorme: nada cabe no orçamento, então fica na fila do Groq
+    route = scheduler.route(3000)
+    assert route.backend == GROQ and route.delay > 0, route
+    print("   ✓ Long audio queued for the next Groq slot")
+
+    metrics = scheduler.metrics()
+    small = metrics["backends"][local_backend("small")]
+    assert small["jobs"] == 1 and small["in_flight"] == 0, small
+    assert small["audio_seconds"] == 300
+    assert metrics["groq_quota"]["remaining"] == 0
+    print("   ✓ Per-backend metrics recorded")
+
+    print("\n✅ TranscriptionScheduler tests passed!")
+
+
+def main():
+    """Run all tests."""
+    try:
+        test_rate_limiter()
+        test_routing()
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+        return 0
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return 1
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+
+        traceback.print_exc()
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+"""
+Testa o pool de instâncias do YoutubeDL (telegrambot/handlers/ydl_pool.py)
+com instâncias falsas, sem rede.
+"""
+
+import queue
+import sys
+import threading
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from telegrambot.handlers.ydl_pool import YDLPool
+
+
+class StubYDL:
+    """Só o que o pool usa do YoutubeDL: params["outtmpl"] e close()."""
+
+    def __init__(self, opts: dict):
+        self.params = {"outtmpl": {"default": opts["outtmpl"]}}
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class StubPool(YDLPool):
+    def __init__(self, size: int = 2):
+        super().__init__("stub", lambda: {"outtmpl": "%(id)s.%(ext)s"}, size=size)
+        self.created = []
+
+    def _create(self):
+        ydl = StubYDL(self.opts_factory())
+        self.created.append(ydl)
+        return ydl
+
+
+def test_checkout_and_return():
+    """Instâncias são reaproveitadas e o outtmpl vale só durante o uso."""
+    print("\n" + "=" * 50)
+    print("Testing YDLPool checkout and return")
+    print("=" * 50)
+
+    pool = StubPool(size=2)
+    with pool.acquire(outtmpl="/tmp/a/video.%(ext)s") as first:
+        assert first.params["outtmpl"]["default"] == "/tmp/a/video.%(ext)s"
+        with pool.acquire() as second:
+            assert second is not first
+            assert second.params["outtmpl"]["default"] == "%(id)s.%(ext)s"
+    assert first.params["outtmpl"]["default"] == "%(id)s.%(ext)s"
+    print("   ✓ Per-call outtmpl override, restored on return")
+
+    with pool.acquire() as again:
+        assert again in (first, second)
+    assert len(pool.created) == 2, pool.created
+    print("   ✓ Returned instances reused, no more than size created")
+
+    try:
+        with pool.acquire(outtmpl="/tmp/b/audio.%(ext)s"):
+            raise ValueError("download failed")
+    except ValueError:
+        pass
+    assert all(y.params["outtmpl"]["default"] == "%(id)s.%(ext)s" for y in pool.created)
+    print("   ✓ outtmpl restored when the caller raises")
+
+    single = StubPool(size=1)
+    with single.acquire():
+        try:
+            with single.acquire(timeout=0.05):
+                raise AssertionError("Handed out a busy instance")
+        except queue.Empty:
+            pass
+    print("   ✓ Waits for a free instance up to the timeout")
+
+    print("\n✅ Checkout tests passed!")
+
+
+def test_close_with_checked_out_instances():
+    """close() fecha as ociosas; as emprestadas fecham ao voltar."""
+    print("\n" + "=" * 50)
+    print("Testing YDLPool.close with instances in use")
+    print("=" * 50)
+
+    pool = StubPool(size=2)
+    pool.warm()
+    idle, busy = pool.created
+    with pool.acquire() as held:
+        assert held is busy
+        pool.close()
+        assert idle.closed and not held.closed
+        print("   ✓ Idle instance closed, the one in use left alone")
+    assert held.closed
+    print("   ✓ Instance returned after close() is closed, not queued")
+
+    try:
+        with pool.acquire():
+            raise AssertionError("Acquired from a closed pool")
+    except RuntimeError:
+        pass
+    assert len(pool.created) == 2
+    print("   ✓ acquire() on a closed pool fails instead of creating instances")
+
+    single = StubPool(size=1)
+    errors = []
+
+    def wait():
+        try:
+            with single.acquire():
+                pass
+        except RuntimeError as e:
+            errors.append(e)
+
+    with single.acquire():
+        waiter = threading.Thread(target=wait)
+        waiter.start()
+        single.close()
+        waiter.join(timeout=2)
+    assert not waiter.is_alive(), "Waiter still blocked after close()"
+    assert len(errors) == 1, errors
+    print("   ✓ Callers waiting for an instance are woken by close()")
+
+    print("\n✅ Close tests passed!")
+
+
+def main():
+    """Run all tests."""
+    try:
+        test_checkout_and_return()
+        test_close_with_checked_out_instances()
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+        return 0
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return 1
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+
+        traceback.print_exc()
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())